@@ -0,0 +1,10 @@
+"""
+Benchmarks for the café hot paths.
+
+Each module is a standalone script run from the project root, e.g.
+
+    python -m benchmarks.suggestions
+
+They run against a throwaway copy of the configured database (created and
+dropped like Django's test database), never against real data.
+"""
@@ -0,0 +1,164 @@
+# benchmarks/common.py
+"""Shared plumbing: Django setup, a scratch database, timing statistics and baselines"""
+import contextlib
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coffe_house.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def scratch_database():
+    """Create a fresh test database for the run, drop it afterwards"""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def _stats(samples, elapsed_s):
+    samples.sort()
+    return {
+        'runs': len(samples),
+        'ops_per_s': len(samples) / elapsed_s,
+        'mean_us': statistics.fmean(samples),
+        'p50_us': samples[len(samples) // 2],
+        'p95_us': samples[max(int(len(samples) * 0.95) - 1, 0)],
+        'p99_us': samples[max(int(len(samples) * 0.99) - 1, 0)],
+    }
+
+
+def measure(fn, repeat=1000, warmup=10):
+    """Run `fn` `repeat` times, return throughput and latency stats in microseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    began = time.perf_counter()
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - started) / 1000)
+    return _stats(samples, time.perf_counter() - began)
+
+
+def measure_concurrent(fn, repeat=1000, threads=4, warmup=10):
+    """
+    `repeat` calls of `fn` spread over `threads` threads, each with its own
+    database connection — throughput under contention, latency per call
+    """
+    from django.db import connection
+
+    for _ in range(warmup):
+        fn()
+    samples, errors = [], []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(calls):
+        try:
+            barrier.wait()
+            for _ in range(calls):
+                started = time.perf_counter_ns()
+                fn()
+                samples.append((time.perf_counter_ns() - started) / 1000)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker, args=(repeat // threads,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return _stats(samples, time.perf_counter() - began)
+
+
+def queries_per_call(fn, calls=5):
+    """Average number of SQL statements one call of `fn` runs"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as captured:
+        for _ in range(calls):
+            fn()
+    return len(captured) / calls
+
+
+def report(title, rows):
+    """Print `{label: stats}` as an aligned table (ops/s, queries, connections when measured)"""
+    extra = [(key, head) for key, head in (('ops_per_s', 'ops/s'), ('queries', 'queries'), ('connections', 'conns'))
+             if any(key in stats for stats in rows.values())]
+    print(f"\n{title}")
+    print(f"{'':28}{'mean µs':>12}{'p50 µs':>12}{'p95 µs':>12}{'p99 µs':>12}" + "".join(f"{h:>10}" for _, h in extra))
+    for label, stats in rows.items():
+        print(
+            f"{label:28}{stats['mean_us']:>12.1f}{stats['p50_us']:>12.1f}"
+            f"{stats['p95_us']:>12.1f}{stats['p99_us']:>12.1f}"
+            + "".join(f"{stats.get(key, float('nan')):>10.1f}" for key, _ in extra)
+        )
+
+
+def environment():
+    """What a baseline was measured on — comparisons only mean something on the same box"""
+    import django
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW server_version")
+        server = cursor.fetchone()[0]
+    return {
+        'host': platform.node(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'postgres': server,
+        'cpus': os.cpu_count(),
+    }
+
+
+def save_baseline(path, params, results):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'params': params, 'results': results}, f, indent=2, sort_keys=True)
+    print(f"\nBaseline written to {path}")
+
+
+def compare(path, params, results, metrics=('ops_per_s', 'p50_us', 'p95_us', 'p99_us', 'queries')):
+    """Print the change against a saved baseline, per scenario and metric (+ = more)"""
+    with open(path) as f:
+        baseline = json.load(f)
+    for key, (then, now) in {
+        'environment': (baseline['environment'], environment()),
+        'params': (baseline['params'], params),
+    }.items():
+        if then != now:
+            print(f"\n!! {key} differs from the baseline — numbers aren't comparable: {then} vs {now}")
+
+    print(f"\nChange vs. {path}")
+    print(f"{'':28}" + "".join(f"{m:>12}" for m in metrics))
+    for label, stats in results.items():
+        old = baseline['results'].get(label)
+        if old is None:
+            print(f"{label:28}{'(new)':>12}")
+            continue
+        cells = []
+        for metric in metrics:
+            if not old.get(metric):
+                cells.append(f"{'-':>12}")
+            else:
+                cells.append(f"{(stats[metric] - old[metric]) / old[metric]:>+12.1%}")
+        print(f"{label:28}" + "".join(cells))
@@ -0,0 +1,116 @@
+# benchmarks/connection_modes.py
+"""
+Guest checkout under the three ways a worker can hold database connections:
+
+    connect-per-request   CONN_MAX_AGE = 0, no pool — a new connection (TCP +
+                          auth) for every request
+    persistent            CONN_MAX_AGE = 60 — one connection per thread, kept
+    pooled                psycopg_pool (DB_POOL) — shared by all threads
+
+Each "request" is a checkout through the test client followed by the
+close_old_connections() Django's handler runs when a request finishes.
+Threads stand in for a worker's concurrent requests; with more threads than
+--pool-size, pooled requests queue for a connection instead of opening more.
+`conns` is the most server connections seen open at once during the run.
+
+    python -m benchmarks.connection_modes [--repeat 400] [--threads 8] [--pool-size 4]
+"""
+import argparse
+import contextlib
+import itertools
+import threading
+
+from benchmarks.common import measure_concurrent, report, scratch_database, setup_django
+from benchmarks import fixtures
+
+
+def configure(mode, pool_size):
+    """Switch the default alias in place — every thread's connection reads this dict"""
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        connection.close_pool()
+    settings_dict = connections.settings["default"]
+    settings_dict["OPTIONS"] = {k: v for k, v in settings_dict.get("OPTIONS", {}).items() if k != "pool"}
+    if mode == "connect-per-request":
+        settings_dict["CONN_MAX_AGE"] = 0
+    elif mode == "persistent":
+        settings_dict["CONN_MAX_AGE"] = 60
+    else:
+        settings_dict["CONN_MAX_AGE"] = 0
+        settings_dict["OPTIONS"]["pool"] = {"min_size": pool_size, "max_size": pool_size, "timeout": 30}
+
+
+@contextlib.contextmanager
+def peak_connections(result, interval=0.05):
+    """Sample pg_stat_activity while the block runs; result["connections"] = most seen at once"""
+    import psycopg
+    from django.db import connection
+
+    done = threading.Event()
+    result["connections"] = 0
+    params = connection.get_connection_params()  # a plain connection — not one of the modes measured
+
+    def sample():
+        with psycopg.connect(**params, autocommit=True) as conn:
+            while not done.wait(interval):
+                count = conn.execute(
+                    "SELECT count(*) - 1 FROM pg_stat_activity WHERE datname = current_database()"
+                ).fetchone()[0]  # - 1: not counting the sampler
+                result["connections"] = max(result["connections"], count)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        yield result
+    finally:
+        done.set()
+        sampler.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=400, help="checkouts per mode")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import close_old_connections
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    with scratch_database():
+        product_ids = fixtures.menu()
+        drinks = itertools.cycle(product_ids["Espresso Bar"])
+        client = Client()
+
+        def checkout():
+            response = client.post(
+                "/api/orders/",
+                {"customer_name": "Guest", "items": [{"product": next(drinks), "quantity": 1}]},
+                content_type="application/json",
+            )
+            assert response.status_code == 201, response.content[:300]
+            close_old_connections()  # end of request, as the real handler does
+
+        results = {}
+        for mode in ("connect-per-request", "persistent", "pooled"):
+            configure(mode, args.pool_size)
+            peak = {}
+            with peak_connections(peak):
+                results[mode] = measure_concurrent(checkout, repeat=args.repeat, threads=args.threads)
+            results[mode].update(peak)
+        configure("persistent", args.pool_size)  # let scratch_database() drop its database
+
+        report(
+            f"Guest checkout, {args.threads} threads, {args.repeat} requests per mode "
+            f"(pool size {args.pool_size})",
+            results,
+        )
+
+
+if __name__ == "__main__":
+    main()
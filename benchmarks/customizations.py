@@ -0,0 +1,80 @@
+# benchmarks/customizations.py
+"""
+Rendering `customizations_display` for 100k order items: the old per-call
+mapping of lambdas vs. the compiled schema with its memoized render table.
+No database needed.
+
+    python -m benchmarks.customizations [--items 100000] [--repeat 5]
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, report, setup_django
+
+
+def legacy_display(customizations):
+    """OrderItem.get_customization_display as it was before orders/customizations.py"""
+    if not customizations:
+        return "Standard"
+    mapping = {
+        "size": {"small": "S", "medium": "M", "large": "L"},
+        "milk": str.capitalize,
+        "shots": lambda x: f"{int(x)} shot" if x == 1 else f"{int(x)} shots",
+        "syrup": str.capitalize,
+        "temperature": lambda x: f"{int(x)}°C",
+        "ice_level": str.capitalize,
+        "decaf": lambda x: "Decaf" if x else "",
+        "extra_hot": lambda x: "Extra Hot" if x else "",
+    }
+    parts = []
+    for key, value in customizations.items():
+        if value in (False, "", None):
+            continue
+        transform = mapping.get(key)
+        if transform:
+            display = transform(value) if callable(transform) else transform.get(value, str(value))
+            if display:
+                parts.append(display)
+    return ", ".join(parts) or "Custom"
+
+
+def sample_items(count):
+    """Canonical customizations as checkout stores them — a café menu repeats a lot"""
+    from orders.customizations import normalize_customizations
+
+    rng = random.Random(42)
+    items = []
+    for _ in range(count):
+        raw = {"size": rng.choice(["small", "medium", "large"])}
+        if rng.random() < 0.6:
+            raw["milk"] = rng.choice(["whole", "oat", "almond", "soy"])
+        if rng.random() < 0.4:
+            raw["shots"] = rng.randint(1, 3)
+        if rng.random() < 0.3:
+            raw["syrup"] = rng.choice(["vanilla", "caramel", "hazelnut"])
+        if rng.random() < 0.1:
+            raw["decaf"] = True
+        items.append(normalize_customizations(raw) if rng.random() < 0.9 else {})
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from orders.customizations import render_customizations
+
+    items = sample_items(args.items)
+    assert [legacy_display(c) for c in items] == [render_customizations(c) for c in items]
+
+    report(f"Render {args.items} items (one full pass per run)", {
+        "legacy mapping per call": measure(lambda: [legacy_display(c) for c in items], repeat=args.repeat, warmup=1),
+        "compiled + memoized": measure(lambda: [render_customizations(c) for c in items], repeat=args.repeat, warmup=1),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/fixtures.py
+"""Deterministic bulk fixtures — generated in the database, not row by row in Python"""
+from django.db import connection
+
+
+def historical_orders(count, days=365, users=None):
+    """
+    `count` past orders spread over the last `days` days, newest last, one in
+    three belonging to one of `users` (ids) and the rest to guests.
+    Uses generate_series, so a million rows take seconds, not minutes.
+    """
+    from orders.models import Order
+
+    assert connection.vendor == 'postgresql', "historical_orders() needs PostgreSQL"
+    user_ids = list(users or [])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {Order._meta.db_table}
+                (order_number, total_amount, status, is_paid, customer_name, notes,
+                 created_at, updated_at, user_id, slot_minutes, points_redeemed, discount_amount)
+            SELECT
+                'H' || lpad(g::text, 9, '0'),
+                (mod(g, 40) + 3.50)::numeric(10, 2),
+                CASE WHEN mod(g, 50) = 0 THEN 'CANCELLED' ELSE 'COMPLETED' END,
+                true,
+                'Guest ' || mod(g, 1000),
+                '',
+                now() - (%(days)s * interval '1 day') * (1 - g::float / %(count)s),
+                now() - (%(days)s * interval '1 day') * (1 - g::float / %(count)s),
+                CASE WHEN cardinality(%(users)s::bigint[]) > 0 AND mod(g, 3) = 0
+                     THEN (%(users)s::bigint[])[1 + mod(g / 3, greatest(cardinality(%(users)s::bigint[]), 1))]
+                END,
+                0, 0, 0
+            FROM generate_series(1, %(count)s) AS g
+            """,
+            {'count': count, 'days': days, 'users': user_ids},
+        )
+        cursor.execute(f"ANALYZE {Order._meta.db_table}")
+
+
+def order_items(products, per_order=2):
+    """`per_order` items on every existing order, cycling through `products` (ids)"""
+    from orders.models import OrderItem
+
+    assert connection.vendor == 'postgresql', "order_items() needs PostgreSQL"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {OrderItem._meta.db_table} (order_id, product_id, quantity, unit_price, customizations)
+            SELECT o.id,
+                   (%(products)s::bigint[])[1 + mod(o.id + n, cardinality(%(products)s::bigint[]))],
+                   1 + mod(o.id + n, 3),
+                   4.50,
+                   '{{}}'::jsonb
+            FROM {connection.ops.quote_name('orders_order')} AS o, generate_series(1, %(per_order)s) AS n
+            """,
+            {'products': list(products), 'per_order': per_order},
+        )
+        cursor.execute(f"ANALYZE {OrderItem._meta.db_table}")
+
+
+MENU = {
+    # category → (name words, price range in cents, is_merch)
+    "Espresso Bar": (["latte", "cortado", "flat white", "americano", "mocha", "macchiato", "cappuccino"], (300, 650), False),
+    "Cold Drinks": (["cold brew", "iced latte", "nitro", "iced mocha", "affogato"], (400, 700), False),
+    "Tea": (["chai", "matcha", "kenyan black", "rooibos", "hibiscus"], (300, 550), False),
+    "Bakery": (["croissant", "mandazi", "banana bread", "scone", "muffin"], (250, 450), False),
+    "Beans & Merch": (["yirgacheffe beans", "sidamo beans", "savannah mug", "tote bag", "dripper"], (1200, 3500), True),
+}
+FLAVOURS = ["", "oat", "vanilla", "caramel", "honey", "maple", "hazelnut", "cinnamon"]
+
+
+def menu(seed=7):
+    """A café menu (~200 products over MENU's categories); returns {category name: [product ids]}"""
+    import random
+    from decimal import Decimal
+
+    from django.utils.text import slugify
+
+    from products.models import Category, Product
+
+    rng = random.Random(seed)
+    ids = {}
+    for name, (words, (low, high), is_merch) in MENU.items():
+        category = Category.objects.create(name=name)
+        products = [
+            Product(
+                name=f"{flavour} {word}".strip().title(),
+                slug=slugify(f"{name} {flavour} {word}"),
+                short_description=f"{flavour} {word} from the {name.lower()}".strip(),
+                category=category,
+                price=Decimal(rng.randint(low, high)) / 100,
+                is_merch=is_merch,
+                stock_count=1_000_000 if is_merch else 0,
+                featured=rng.random() < 0.05,
+                prep_time_minutes=rng.randint(1, 5) if not is_merch else 0,
+            )
+            for word in words
+            for flavour in (FLAVOURS if not is_merch else [""])
+        ]
+        ids[name] = [product.pk for product in Product.objects.bulk_create(products)]
+    return ids
+
+
+def customers(count):
+    """`count` customer accounts sharing one password hash (hashing is deliberately slow); returns ids"""
+    from django.contrib.auth.hashers import make_password
+
+    from users.models import User
+
+    password = make_password("bench-pass-123")
+    users = User.objects.bulk_create(
+        [User(email=f"customer{i}@bench.coffeehouse", full_name=f"Customer {i}", password=password) for i in range(count)],
+        batch_size=5000,
+    )
+    return [user.pk for user in users]
+
+
+def active_orders(count, minutes=60):
+    """`count` queued orders (PENDING / CONFIRMED / PREPARING) placed over the last `minutes`"""
+    from orders.models import Order
+
+    assert connection.vendor == 'postgresql', "active_orders() needs PostgreSQL"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {Order._meta.db_table}
+                (order_number, total_amount, status, is_paid, customer_name, notes,
+                 created_at, updated_at, slot_minutes, points_redeemed, discount_amount)
+            SELECT
+                'A' || lpad(g::text, 9, '0'),
+                9.00,
+                (ARRAY['PENDING', 'CONFIRMED', 'PREPARING'])[1 + mod(g, 3)],
+                mod(g, 3) > 0,
+                'Walk-in ' || g,
+                '',
+                now() - (%(minutes)s * interval '1 minute') * (1 - g::float / %(count)s),
+                now() - (%(minutes)s * interval '1 minute') * (1 - g::float / %(count)s),
+                0, 0, 0
+            FROM generate_series(1, %(count)s) AS g
+            """,
+            {'count': count, 'minutes': minutes},
+        )
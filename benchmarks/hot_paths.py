@@ -0,0 +1,131 @@
+# benchmarks/hot_paths.py
+"""
+End-to-end requests on the ordering hot paths, through URL routing,
+middleware, authentication and rendering, the way the apps call them:
+
+    guest checkout       POST /api/orders/
+    logged-in checkout   POST /api/orders/                  (JWT)
+    active dashboard     GET  /api/orders/active/           (barista JWT)
+    menu list            GET  /api/products/catalog/
+    suggestions          GET  /api/products/catalog/suggestions/?q=
+    order history        GET  /api/orders/                  (customer JWT)
+
+on a deterministic data set: the same menu, customers, queue and history
+(a million past orders by default) every run. Reports throughput, latency
+percentiles and SQL statements per request. Save a baseline, then compare
+later runs against it on the same machine:
+
+    python -m benchmarks.hot_paths --save benchmarks/baseline.json
+    python -m benchmarks.hot_paths --compare benchmarks/baseline.json
+    python -m benchmarks.hot_paths --orders 100000 --repeat 100 --threads 4
+"""
+import argparse
+import itertools
+
+from benchmarks.common import (
+    compare, measure, measure_concurrent, queries_per_call, report, save_baseline, scratch_database, setup_django,
+)
+from benchmarks import fixtures
+
+QUERIES = ["la", "lat", "oat l", "cold", "chai", "van", "croi", "mat", "hon", "xyz"]
+
+
+def scenarios(product_ids, customer_ids, barista):
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from users.models import User
+
+    def bearer(user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    customer = User.objects.get(pk=customer_ids[0])
+    customer_auth, barista_auth = bearer(customer), bearer(barista)
+    drinks = itertools.cycle(product_ids["Espresso Bar"] + product_ids["Cold Drinks"])
+    pastries = itertools.cycle(product_ids["Bakery"])
+    queries = itertools.cycle(QUERIES)
+    client = Client()
+
+    def call(method, url, expected, auth=None, **kwargs):
+        response = getattr(client, method)(url, **kwargs, **(auth or {}))
+        assert response.status_code == expected, (url, response.status_code, response.content[:300])
+
+    def basket():
+        return {"items": [
+            {"product": next(drinks), "quantity": 1, "customizations": {"size": "large", "milk": "oat"}},
+            {"product": next(pastries), "quantity": 2},
+        ]}
+
+    return {
+        "guest checkout": lambda: call(
+            "post", "/api/orders/", 201, data={"customer_name": "Guest", **basket()}, content_type="application/json"
+        ),
+        "logged-in checkout": lambda: call(
+            "post", "/api/orders/", 201, auth=customer_auth, data=basket(), content_type="application/json"
+        ),
+        "active dashboard": lambda: call("get", "/api/orders/active/", 200, auth=barista_auth),
+        "menu list": lambda: call("get", "/api/products/catalog/", 200),
+        "suggestions": lambda: call("get", "/api/products/catalog/suggestions/", 200, data={"q": next(queries)}),
+        "order history": lambda: call("get", "/api/orders/", 200, auth=customer_auth),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1_000_000, help="historical orders")
+    parser.add_argument("--customers", type=int, default=5_000)
+    parser.add_argument("--queue", type=int, default=60, help="orders waiting in the kitchen")
+    parser.add_argument("--repeat", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--threads", type=int, default=1, help="concurrent clients (own DB connection each)")
+    parser.add_argument("--only", action="append", help="run just this scenario (repeatable)")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import setup_test_environment
+
+    from orders.scheduling import kitchen
+    from products.cache import bump_menu_version
+    from users.models import User
+
+    setup_test_environment()  # test client host, in-memory email
+    with scratch_database():
+        product_ids = fixtures.menu()
+        customer_ids = fixtures.customers(args.customers)
+        barista = User.objects.create_user(
+            email="barista@bench.coffeehouse", password="bench-pass-123", full_name="Bench Barista",
+            role="barista", is_staff=True,
+        )
+        fixtures.historical_orders(args.orders, users=customer_ids)
+        fixtures.active_orders(args.queue)
+        fixtures.order_items([pk for ids in product_ids.values() for pk in ids])
+        bump_menu_version()  # bulk inserts skip the signals; don't serve a menu snapshot from another run
+        kitchen.reset()
+
+        results = {}
+        for name, fn in scenarios(product_ids, customer_ids, barista).items():
+            if args.only and name not in args.only:
+                continue
+            if args.threads > 1:
+                stats = measure_concurrent(fn, repeat=args.repeat, threads=args.threads)
+            else:
+                stats = measure(fn, repeat=args.repeat)
+            stats["queries"] = queries_per_call(fn)
+            results[name] = stats
+
+        params = {"orders": args.orders, "customers": args.customers, "queue": args.queue,
+                  "repeat": args.repeat, "threads": args.threads}
+        report(
+            f"Hot paths — {args.orders} past orders, {args.queue} queued, {args.threads} thread(s), "
+            f"{args.repeat} requests each",
+            results,
+        )
+        if args.compare:
+            compare(args.compare, params, results)
+        if args.save:
+            save_baseline(args.save, params, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/order_export.py
+"""
+Streaming order export: a million orders (two items each) to CSV and NDJSON,
+sampling the process RSS as it goes — it should stay flat from the first
+chunk to the last. For contrast, the nested read serializer over a slice of
+the same table (everything in memory at once).
+
+    python -m benchmarks.order_export [--orders 1000000] [--naive 50000]
+"""
+import argparse
+import os
+import time
+from datetime import timedelta
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def export(fmt, start, end):
+    from reports.export import stream_export
+
+    samples, lines, started = [rss_mb()], 0, time.perf_counter()
+    with open(os.devnull, "w") as sink:
+        for n, chunk in enumerate(stream_export(fmt, start, end), start=1):
+            sink.write(chunk)
+            lines += chunk.count("\n")
+            if n % 200 == 0:
+                samples.append(rss_mb())
+    samples.append(rss_mb())
+    return lines, time.perf_counter() - started, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--naive", type=int, default=50_000, help="orders loaded by the nested serializer")
+    args = parser.parse_args()
+
+    from benchmarks.common import scratch_database, setup_django
+    from benchmarks.fixtures import historical_orders, order_items
+
+    setup_django()
+    from django.db import reset_queries
+    from django.utils import timezone
+
+    from orders.models import Order
+    from orders.serializers import OrderListRetrieveSerializer
+    from products.models import Product
+
+    with scratch_database():
+        products = [Product.objects.create(name=f"Latte {i}", price=4.5).pk for i in range(20)]
+        historical_orders(args.orders, days=30)
+        order_items(products)
+        end = timezone.now() + timedelta(days=1)
+        start = end - timedelta(days=40)
+
+        print(f"\nStreaming export of {args.orders} orders")
+        print(f"{'':10}{'lines':>12}{'seconds':>10}{'RSS start':>12}{'RSS mid':>10}{'RSS end':>10}{'RSS peak':>10}  (MB)")
+        for fmt in ("csv", "ndjson"):
+            lines, seconds, rss = export(fmt, start, end)
+            print(
+                f"{fmt:10}{lines:>12}{seconds:>10.1f}{rss[0]:>12.1f}{rss[len(rss) // 2]:>10.1f}"
+                f"{rss[-1]:>10.1f}{max(rss):>10.1f}"
+            )
+            reset_queries()
+
+        before = rss_mb()
+        orders = Order.objects.prefetch_related(OrderListRetrieveSerializer.items_prefetch())[: args.naive]
+        OrderListRetrieveSerializer(orders, many=True).data
+        print(f"\nNested serializer, {args.naive} orders in memory: RSS {before:.1f} → {rss_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/order_history.py
+"""
+Order history pagination: page-number (OFFSET + COUNT) vs. cursor (keyset on
+created_at, id) — first page and a deep page, over a million-order table.
+
+    python -m benchmarks.order_history [--orders 1000000] [--repeat 30]
+"""
+import argparse
+
+from benchmarks.common import measure, report, scratch_database, setup_django
+from benchmarks.fixtures import historical_orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.pagination import Cursor, PageNumberPagination
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from orders.models import Order
+    from orders.pagination import OrderCursorPagination
+
+    factory = APIRequestFactory()
+
+    def page_number(page):
+        request = Request(factory.get("/api/orders/", {"page": page}))
+        return lambda: list(PageNumberPagination().paginate_queryset(Order.objects.all(), request))
+
+    def cursor_at(offset):
+        paginator = OrderCursorPagination()
+        url = "/api/orders/"
+        if offset:
+            # Walk once to the deep page the way a client would have, keep its cursor
+            row = Order.objects.order_by("-created_at", "-id").values("created_at", "id")[offset]
+            paginator.base_url = "http://testserver/api/orders/"
+            position = paginator._get_position_from_instance(row, paginator.ordering)
+            url = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+        request = Request(factory.get(url))
+        return lambda: list(OrderCursorPagination().paginate_queryset(Order.objects.all(), request))
+
+    with scratch_database():
+        historical_orders(args.orders)
+        deep_page = args.orders // 20 // 2  # halfway through history
+        report(f"Order history over {args.orders} orders (page size 20)", {
+            "page-number, page 1": measure(page_number(1), repeat=args.repeat, warmup=2),
+            f"page-number, page {deep_page}": measure(page_number(deep_page), repeat=args.repeat, warmup=2),
+            "cursor, first page": measure(cursor_at(0), repeat=args.repeat, warmup=2),
+            f"cursor, page {deep_page}": measure(cursor_at(deep_page * 20), repeat=args.repeat, warmup=2),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/suggestions.py
+"""
+Autocomplete: in-memory prefix index vs. the old `name__icontains` ORM query
+on a 10k-product catalog.
+
+    python -m benchmarks.suggestions [--products 10000] [--repeat 500]
+"""
+import argparse
+import itertools
+import random
+
+from benchmarks.common import measure, report, scratch_database, setup_django
+
+WORDS = [
+    "latte", "mocha", "espresso", "cortado", "flat", "white", "cold", "brew", "iced",
+    "oat", "almond", "vanilla", "caramel", "hazelnut", "chai", "matcha", "kenyan",
+    "ethiopian", "yirgacheffe", "sidamo", "nitro", "honey", "cinnamon", "crème",
+    "brûlée", "savannah", "sunrise", "maple", "pumpkin", "spice", "mug", "beans",
+]
+QUERIES = ["la", "lat", "latte", "oat mi", "cold br", "eth", "crème", "xyz", "va", "savannah sun"]
+
+
+def seed(count):
+    from decimal import Decimal
+    from products.models import Category, Product
+
+    rng = random.Random(42)
+    categories = [Category.objects.create(name=name) for name in ("Drinks", "Beans", "Pastries", "Merch")]
+    Product.objects.bulk_create(
+        [
+            Product(
+                name=" ".join(rng.sample(WORDS, 3)).title(),
+                slug=f"product-{i}",
+                short_description=" ".join(rng.sample(WORDS, 5)),
+                category=rng.choice(categories),
+                price=Decimal("4.50"),
+                featured=rng.random() < 0.02,
+                is_merch=rng.random() < 0.1,
+                stock_count=rng.randint(0, 3),
+            )
+            for i in range(count)
+        ],
+        batch_size=2000,
+    )
+
+
+def orm_suggestions(q):
+    from django.db.models import Q
+    from products.models import Product
+
+    qs = Product.objects.select_related("category").filter(category__is_active=True, is_available=True)
+    qs = qs.filter(Q(is_merch=False) | Q(is_merch=True, stock_count__gt=0)).distinct()
+    return list(qs.filter(name__icontains=q).values_list("name", flat=True)[:10])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from products.suggestions import MenuSuggestions
+
+    with scratch_database():
+        seed(args.products)
+        suggestions = MenuSuggestions()
+        build = measure(suggestions.rebuild, repeat=3, warmup=0)
+        queries = itertools.cycle(QUERIES)
+        # Never-seen-before queries: the prefix scan itself, not the memo
+        rng = random.Random(7)
+        fresh = (f"{rng.choice(WORDS)[:rng.randint(2, 5)]}{i % 7 or ''}" for i in itertools.count())
+
+        report(f"Suggestions over {args.products} products", {
+            "index rebuild": build,
+            "ORM icontains": measure(lambda: orm_suggestions(next(queries)), repeat=args.repeat),
+            "prefix index (repeat q)": measure(lambda: suggestions.index.suggest(next(queries)), repeat=args.repeat),
+            "prefix index (fresh q)": measure(lambda: suggestions.index.suggest(next(fresh)), repeat=args.repeat),
+        })
+
+
+if __name__ == "__main__":
+    main()
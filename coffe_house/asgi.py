@@ -2,6 +2,8 @@
 ASGI config for coffe_house project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it under an ASGI server (uvicorn/daphne) for the live barista stream at
+/api/orders/stream/ — WSGI workers can't hold Server-Sent Events open.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
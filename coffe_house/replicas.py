@@ -0,0 +1,112 @@
+# coffe_house/replicas.py
+"""
+Read replicas — menu, history and report reads off the primary.
+
+Views opt in with ReplicaReadMixin: the safe actions listed in
+`replica_actions` run their queries against one of settings.DATABASE_REPLICAS
+(picked per request); everything else — writes, checkout, the barista queue,
+anything inside a transaction — stays on the primary.
+
+Replicas lag a little. After a logged-in user's own write (placing an order,
+say) their reads stick to the primary for REPLICA_LAG_SECONDS, so the order
+they just placed is always in their history. The pin lives in a cache every
+worker shares (REPLICA_PIN_CACHE_ALIAS), since the next request may land on
+another worker.
+"""
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+
+_read_alias = contextvars.ContextVar("replica_read_alias", default=None)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def read_alias():
+    """Replica this request reads from, None on the primary"""
+    return _read_alias.get()
+
+
+def reading_from_replica() -> bool:
+    return _read_alias.get() is not None
+
+
+@contextlib.contextmanager
+def use_replica(alias=None):
+    """Route reads in this block to `alias` (default: a random replica; none configured → primary)"""
+    alias = alias or (random.choice(settings.DATABASE_REPLICAS) if settings.DATABASE_REPLICAS else None)
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def _pin_key(user_id) -> str:
+    return f"replica:pin:{user_id}"
+
+
+def pin_to_primary(user):
+    """`user` just wrote — read from the primary until the replicas have caught up"""
+    caches[settings.REPLICA_PIN_CACHE_ALIAS].set(_pin_key(user.pk), 1, settings.REPLICA_LAG_SECONDS)
+
+
+def pinned_to_primary(user) -> bool:
+    return user.is_authenticated and caches[settings.REPLICA_PIN_CACHE_ALIAS].get(_pin_key(user.pk)) is not None
+
+
+class ReplicaRouter:
+    """Reads go where use_replica() says, writes and migrations to the primary"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # same data on every alias
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaReadMixin:
+    """
+    For DRF views: `replica_actions` (viewset action names; None = every safe
+    request of an APIView) read from a replica, unless the user is pinned.
+    A successful unsafe request by a logged-in user pins them.
+    """
+    replica_actions = None
+
+    _replica_token = None
+
+    def reads_from_replica(self, request) -> bool:
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and (self.replica_actions is None or getattr(self, "action", None) in self.replica_actions)
+            and not pinned_to_primary(request.user)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)  # authentication first: pins are per user
+        if self.reads_from_replica(request):
+            self._replica_token = _read_alias.set(random.choice(settings.DATABASE_REPLICAS))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # The serializer has already run by now, so no query is left to route
+        if self._replica_token is not None:
+            _read_alias.reset(self._replica_token)
+            self._replica_token = None
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -47,10 +47,12 @@ INSTALLED_APPS = [
     'users',
     'products',
     'orders',
+    'reports',
 ]
 
 # ────────────────────── MIDDLEWARE ────────────────────── #
 MIDDLEWARE = [
+    'reports.profiling.ProfilingMiddleware',             # ← no-op unless PROFILING_ENABLED
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',        # ← for production static files
     'corsheaders.middleware.CorsMiddleware',
@@ -94,10 +96,117 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', '254caffeine'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
-        'CONN_MAX_AGE': 60,
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,  # a persistent connection the server dropped is replaced, not reused
     }
 }
 
+# psycopg3 connection pool — one per process, shared by every thread (and ASGI's
+# sync_to_async threads), instead of one persistent connection per thread.
+# Size it so that workers × DB_POOL_MAX_SIZE stays under Postgres' max_connections.
+# Tests run with plain connections (coffe_house/test_settings.py).
+DB_POOL = os.getenv('DB_POOL', 'True') == 'True'
+if DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # connections go back to the pool, not closed
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),          # wait for a free connection, then error
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),       # idle extras above min_size are closed
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),  # recycled (server-side memory)
+        },  # CONN_HEALTH_CHECKS above → Django checks each connection as it leaves the pool
+    }
+
+# ────────────────────── READ REPLICAS ────────────────────── #
+# Streaming replicas of 'default' (comma-separated hosts, same credentials) serve the
+# menu, order history and report reads (coffe_house/replicas.py). Writes, checkout and
+# the barista queue always use the primary.
+DB_REPLICA_HOSTS = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+for n, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica{n}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = [f'replica{n}' for n in range(1, len(DB_REPLICA_HOSTS) + 1)]
+DATABASE_ROUTERS = ['coffe_house.replicas.ReplicaRouter']
+# How far behind the primary a replica may be: a user's reads stay on the primary
+# this long after their own write (e.g. checkout), and menu snapshots read off a
+# replica are only cached this long
+REPLICA_LAG_SECONDS = int(os.getenv('REPLICA_LAG_SECONDS', '5'))
+REPLICA_PIN_CACHE_ALIAS = 'menu'  # shared by every worker — the next request may land on another one
+
+# ────────────────────── ORDER NUMBERS ────────────────────── #
+# AtomicUpdateAllocator → one UPDATE ... RETURNING per order, gap-free
+# BlockAllocator        → each worker leases a block of numbers, near-zero contention
+ORDER_NUMBER_ALLOCATOR = os.getenv('ORDER_NUMBER_ALLOCATOR', 'orders.numbering.AtomicUpdateAllocator')
+ORDER_NUMBER_BLOCK_SIZE = int(os.getenv('ORDER_NUMBER_BLOCK_SIZE', '20'))
+
+# ────────────────────── ORDER ARCHIVE ────────────────────── #
+# `manage.py archive_orders` (cron) moves finished orders this old, with their items and
+# status events, out of the live tables; history reads and rollups cover both (orders/archive.py)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv('ORDER_ARCHIVE_AFTER_DAYS', '90'))
+ORDER_ARCHIVE_BATCH_SIZE = 1000  # orders per transaction — keeps row locks and WAL bursts short
+
+# ────────────────────── CHECKOUT RETRIES ────────────────────── #
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24      # replay window for an Idempotency-Key
+IDEMPOTENCY_PENDING_TIMEOUT = 30        # an unfinished claim older than this was abandoned
+
+# ────────────────────── LIVE ORDER EVENTS ────────────────────── #
+# Fan-out for GET /api/orders/stream/ — LocalBroker is per-process, swap for a shared backend
+ORDER_EVENTS_BROKER = os.getenv('ORDER_EVENTS_BROKER', 'orders.events.LocalBroker')
+ORDER_EVENTS_MAX_PENDING = 100  # events buffered per dashboard before it is dropped
+
+# ────────────────────── KITCHEN PACING ────────────────────── #
+# ETAs on /orders/active/ and in the checkout response (orders/scheduling.py)
+KITCHEN_STATIONS = int(os.getenv('KITCHEN_STATIONS', '2'))  # baristas making orders in parallel
+KITCHEN_RESYNC_SECONDS = 30  # re-read the queue from the DB (orders taken by other workers)
+
+# Scheduled pickups: each window takes at most PICKUP_SLOT_CAPACITY prep minutes (orders/slots.py)
+PICKUP_SLOT_MINUTES = 15
+PICKUP_SLOT_CAPACITY = int(os.getenv('PICKUP_SLOT_CAPACITY', KITCHEN_STATIONS * PICKUP_SLOT_MINUTES))
+
+# ────────────────────── LOYALTY ────────────────────── #
+# "10 = 1 free" — points per non-merch item on completion, and the price of a free item (users/loyalty.py)
+LOYALTY_POINTS_PER_ITEM = 1
+LOYALTY_REWARD_POINTS = 10
+
+# ────────────────────── REPORTS ────────────────────── #
+ORDER_EXPORT_CHUNK_SIZE = 2000  # rows fetched per server-side cursor round trip
+
+# ────────────────────── PROFILING ────────────────────── #
+# Per-endpoint query counts and timings → GET /api/reports/metrics/ (reports/profiling.py)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+# Most queries an endpoint may run per request — over budget is logged, and fails
+# tests that use reports.testing.QueryBudgetMixin. Staff endpoints include the JWT user lookup
+QUERY_BUDGETS = {
+    'ProductViewSet.list': 3,
+    'ProductViewSet.retrieve': 2,
+    'CategoryViewSet.list': 2,
+    'OrderViewSet.list': 3,
+    'OrderViewSet.retrieve': 3,
+    'OrderViewSet.active': 3,
+    'OrderViewSet.create': 12,
+    'OrderViewSet.update_status': 12,
+    'SalesReportAPI': 2,
+    'ProductSalesReportAPI': 2,
+    'CategorySalesReportAPI': 2,
+    'TransitionTimingsReportAPI': 2,
+}
+
+# ────────────────────── CACHES ────────────────────── #
+# 'menu' is file-based so every worker on the box shares one menu version
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'menu': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('MENU_CACHE_DIR', str(BASE_DIR / '.cache' / 'menu')),
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+MENU_CACHE_ALIAS = 'menu'
+MENU_CACHE_TIMEOUT = 60 * 60 * 24  # snapshots are retired by version bumps, not by age
+SUGGESTIONS_REBUILD_SECONDS = 60 * 60  # full autocomplete rebuild (refreshes popularity)
+
 # ────────────────────── AUTH & SOCIAL ────────────────────── #
 AUTH_USER_MODEL = 'users.User'
 
@@ -155,6 +264,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Product photos are re-encoded at these widths as WebP + JPEG (products/images.py).
+# Variant names carry a content hash — serve /media/products/variants/ with a far-future Cache-Control
+PRODUCT_IMAGE_WIDTHS = (160, 320, 640, 1024)
+PRODUCT_IMAGE_ASYNC = os.getenv('PRODUCT_IMAGE_ASYNC', 'True') == 'True'  # False → resize inline
+
 # ────────────────────── INTERNATIONALIZATION ────────────────────── #
 LANGUAGE_CODE = 'en-ca'           # ← Canada, not US
 TIME_ZONE = 'America/Toronto'     # ← Toronto time
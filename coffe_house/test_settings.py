@@ -0,0 +1,29 @@
+# coffe_house/test_settings.py
+"""
+Settings for the test suite — `python manage.py test` picks them; other
+runners set them explicitly:
+
+    DJANGO_SETTINGS_MODULE=coffe_house.test_settings python -m django test
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# Plain connections, not the pool: test databases are created and dropped per
+# run, and TransactionTestCase threads open their own
+DATABASES['default'].get('OPTIONS', {}).pop('pool', None)
+
+# Replica routing is off; the routing tests opt in with
+# override_settings(DATABASE_REPLICAS=['replica']) on this second alias onto
+# the test database
+DATABASES = {
+    'default': DATABASES['default'],
+    'replica': {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}},
+}
+DATABASE_REPLICAS = []
+
+# In-memory caches: the file-based 'menu' cache is shared with the local dev
+# server (menu versions, replica pins), and tests must not bump or read it
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'menu': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'menu'},
+}
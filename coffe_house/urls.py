@@ -11,6 +11,7 @@ urlpatterns = [
     path('api/products/', include('products.urls')),     # Menu + categories
     path('api/orders/', include('orders.urls')),          # Core ordering system
     path('api/auth/', include('users.urls')),             # ← Registration, login, profile
+    path('api/reports/', include('reports.urls')),        # Manager sales & timing reports
 
     # ───── Social / Third-party Auth ─────
     path('social-auth/', include('social_django.urls')),  # Google, Apple, etc.
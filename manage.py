@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coffe_house.settings')
+    # `test` gets the test settings (plain connections, the routing tests' replica alias)
+    settings_module = 'coffe_house.test_settings' if sys.argv[1:2] == ['test'] else 'coffe_house.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -0,0 +1,62 @@
+# orders/analytics.py
+"""
+Order timing rollups — status events (live and archived) → StatusTransitionStats.
+
+Each event already carries the time spent in its from_status, so a rollup is
+one GROUP BY per granularity over an indexed `at` range, with Postgres'
+percentile_cont doing the percentiles. Buckets are recomputed whole and
+upserted, so re-running a window is harmless.
+"""
+from django.db.models import Aggregate, Count, FloatField, Max
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import StatusEventHistory, StatusTransitionStats
+
+PERCENTILES = {"p50_seconds": 0.5, "p90_seconds": 0.9, "p95_seconds": 0.95}
+
+
+class Percentile(Aggregate):
+    """percentile_cont(fraction) WITHIN GROUP (ORDER BY expression) — PostgreSQL"""
+    function = "PERCENTILE_CONT"
+    name = "Percentile"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def rollup_status_events(start, end) -> int:
+    """
+    Rebuild the hour and day buckets from the one holding `start` up to `end`
+    (normally now — a bucket cut short by `end` is completed by the next run).
+    Returns the number of rows written.
+    """
+    tz = timezone.get_current_timezone()
+    hour_start = timezone.localtime(start).replace(minute=0, second=0, microsecond=0)
+    written = 0
+    for granularity, trunc, since in (
+        (StatusTransitionStats.HOUR, TruncHour, hour_start),
+        (StatusTransitionStats.DAY, TruncDay, hour_start.replace(hour=0)),
+    ):
+        rows = (
+            StatusEventHistory.objects.filter(at__gte=since, at__lt=end)
+            .annotate(bucket=trunc("at", tzinfo=tz))
+            .order_by()
+            .values("bucket", "from_status", "to_status")
+            .annotate(
+                count=Count("id"),
+                max_seconds=Max("duration_seconds"),
+                **{field: Percentile("duration_seconds", fraction) for field, fraction in PERCENTILES.items()},
+            )
+        )
+        stats = [StatusTransitionStats(granularity=granularity, **row) for row in rows]
+        StatusTransitionStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["granularity", "bucket", "from_status", "to_status"],
+            update_fields=["count", "max_seconds", *PERCENTILES],
+        )
+        written += len(stats)
+    return written
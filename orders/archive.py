@@ -0,0 +1,75 @@
+# orders/archive.py
+"""
+Order archival — keep the live `orders_order` table down to the working set.
+
+Orders that finished (COMPLETED / CANCELLED) more than ORDER_ARCHIVE_AFTER_DAYS
+ago move, with their items and status events, into ArchivedOrder /
+ArchivedOrderItem / ArchivedOrderStatusEvent, in batches of
+ORDER_ARCHIVE_BATCH_SIZE. Each batch is one transaction: copy with
+INSERT ... SELECT (nothing round-trips through Python), then delete the live
+rows. Rows being changed elsewhere are skipped (SKIP LOCKED) and picked up by
+the next run, so archiving never blocks checkout or the barista queue.
+
+Ids and order numbers are kept. History reads go through OrderHistory (the
+live + archive view), so receipts, customer history, exports and sales
+rollups see both halves. Status events move with their order and the timing
+rollups read both halves too (StatusEventHistory), so a bucket rebuilt after
+archiving comes out the same. Loyalty entries keep their link, switched from
+`order` to `archived_order`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import NOT_PROVIDED, F
+from django.utils import timezone
+
+from users.models import LoyaltyEntry
+
+from .models import ArchivedOrder, ArchivedOrderItem, ArchivedOrderStatusEvent, Order, OrderItem, OrderStatusEvent
+
+FINISHED_STATUSES = ("COMPLETED", "CANCELLED")
+
+
+def _copy_sql(target, source, key) -> str:
+    """INSERT INTO target SELECT the same columns FROM source WHERE key = ANY(ids)"""
+    columns = ", ".join(
+        connection.ops.quote_name(field.column)
+        for field in target._meta.concrete_fields if field.db_default is NOT_PROVIDED
+    )
+    return (
+        f"INSERT INTO {target._meta.db_table} ({columns}) "
+        f"SELECT {columns} FROM {source._meta.db_table} WHERE {key} = ANY(%s)"
+    )
+
+
+def archive_batch(before, batch_size) -> int:
+    """Move up to batch_size finished orders created before `before`; returns how many moved"""
+    with transaction.atomic():
+        ids = list(
+            Order.objects.filter(created_at__lt=before, status__in=FINISHED_STATUSES)
+            .order_by("created_at", "id")
+            .select_for_update(skip_locked=True)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(_copy_sql(ArchivedOrder, Order, "id"), [ids])
+            cursor.execute(_copy_sql(ArchivedOrderItem, OrderItem, "order_id"), [ids])
+            cursor.execute(_copy_sql(ArchivedOrderStatusEvent, OrderStatusEvent, "order_id"), [ids])
+        LoyaltyEntry.objects.filter(order_id__in=ids).update(archived_order_id=F("order_id"), order=None)
+        # Children first, each copied above — nothing is left for a cascade to drop
+        OrderStatusEvent.objects.filter(order_id__in=ids).delete()
+        OrderItem.objects.filter(order_id__in=ids).delete()
+        Order.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_orders(days=None, batch_size=None):
+    """Archive every finished order older than `days`; yields the size of each batch moved"""
+    days = settings.ORDER_ARCHIVE_AFTER_DAYS if days is None else days
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH_SIZE
+    before = timezone.now() - timedelta(days=days)
+    while moved := archive_batch(before, batch_size):
+        yield moved
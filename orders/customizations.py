@@ -0,0 +1,146 @@
+# orders/customizations.py
+"""
+Drink customization schema — declared once, compiled at import.
+
+    normalize_customizations({"Size": "Large", "shots": "2", "decaf": False})
+    → {"shots": 2, "size": "large"}          (validated, canonical, compact)
+
+    render_customizations({"shots": 2, "size": "large"})
+    → "L, 2 shots"                           (memoized per normalized tuple)
+
+Checkout stores only the canonical form, so identical drinks share one
+cache entry in the render table no matter how the app spelled them.
+"""
+import functools
+from abc import ABC, abstractmethod
+
+from django.core.exceptions import ValidationError
+
+
+class Option(ABC):
+    """
+    One customization key: how to validate/canonicalize it and how to display
+    it. SCHEMA builds its options at import, so a subclass missing either
+    method fails there, not at checkout.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+
+    @abstractmethod
+    def clean(self, value):
+        """Canonical value, or ValidationError"""
+
+    @abstractmethod
+    def render(self, value) -> str:
+        """Display text for a canonical value"""
+
+
+class Choice(Option):
+    def __init__(self, choices, label=None):
+        super().__init__(label)
+        self.choices = dict(choices)  # canonical value → display text
+
+    def clean(self, value):
+        if not isinstance(value, str) or value.strip().lower() not in self.choices:
+            raise ValidationError(f"must be one of: {', '.join(self.choices)}.")
+        return value.strip().lower()
+
+    def render(self, value):
+        return self.choices.get(value, str(value))
+
+
+class Number(Option):
+    def __init__(self, minimum, maximum, render, label=None):
+        super().__init__(label)
+        self.minimum, self.maximum, self._render = minimum, maximum, render
+
+    def clean(self, value):
+        if isinstance(value, bool):
+            raise ValidationError("must be a whole number.")
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError("must be a whole number.")
+        if number != value and str(number) != str(value).strip():
+            raise ValidationError("must be a whole number.")
+        if not self.minimum <= number <= self.maximum:
+            raise ValidationError(f"must be between {self.minimum} and {self.maximum}.")
+        return number
+
+    def render(self, value):
+        return self._render(int(value))
+
+
+class Flag(Option):
+    def clean(self, value):
+        if not isinstance(value, bool):
+            raise ValidationError("must be true or false.")
+        return value
+
+    def render(self, value):
+        return self.label if value else ""
+
+
+# Display order = declaration order
+SCHEMA = {
+    "size": Choice({"small": "S", "medium": "M", "large": "L"}),
+    "milk": Choice({m: m.capitalize() for m in ("whole", "skim", "oat", "almond", "soy", "coconut", "lactose-free")}),
+    "shots": Number(1, 6, lambda n: f"{n} shot" if n == 1 else f"{n} shots"),
+    "syrup": Choice({s: s.capitalize() for s in ("vanilla", "caramel", "hazelnut", "mocha", "maple", "cinnamon")}),
+    "temperature": Number(40, 95, lambda n: f"{n}°C"),
+    "ice_level": Choice({i: i.capitalize() for i in ("none", "light", "regular", "extra")}),
+    "decaf": Flag("Decaf"),
+    "extra_hot": Flag("Extra Hot"),
+}
+_ORDER = {key: position for position, key in enumerate(SCHEMA)}
+_EMPTY = (False, "", None)
+
+
+def normalize_customizations(raw) -> dict:
+    """Validate against SCHEMA; return the canonical compact dict (defaults dropped)"""
+    if raw in (None, ""):
+        return {}
+    if not isinstance(raw, dict):
+        raise ValidationError("Customizations must be an object.")
+
+    cleaned, errors = {}, {}
+    for key, value in raw.items():
+        option = SCHEMA.get(str(key).strip().lower())
+        if option is None:
+            errors[key] = ValidationError(f"Unknown customization '{key}'.")
+            continue
+        if value in _EMPTY:
+            continue
+        try:
+            cleaned[str(key).strip().lower()] = option.clean(value)
+        except ValidationError as exc:
+            errors[key] = ValidationError(f"{key} {exc.messages[0]}")
+    if errors:
+        raise ValidationError(errors)
+    return {key: cleaned[key] for key in sorted(cleaned, key=_ORDER.__getitem__)}
+
+
+@functools.lru_cache(maxsize=4096)
+def _render(items: tuple) -> str:
+    parts = [
+        SCHEMA[key].render(value)
+        for key, value in sorted(items, key=lambda kv: _ORDER.get(kv[0], -1))
+        if key in SCHEMA and value not in _EMPTY
+    ]
+    return ", ".join(part for part in parts if part) or "Custom"
+
+
+def render_customizations(customizations) -> str:
+    """Display string for stored customizations — never raises on legacy data"""
+    if not customizations:
+        return "Standard"
+    try:
+        # Canonical rows are their own cache key: one tuple() and a dict lookup per item
+        return _render(tuple(customizations.items()))
+    except (TypeError, ValueError, AttributeError):
+        pass
+    try:  # pre-schema row with a list/dict somewhere — render just the known keys
+        return _render(tuple((k, v) for k, v in customizations.items() if k in SCHEMA))
+    except (TypeError, ValueError, AttributeError):
+        return "Custom"
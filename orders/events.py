@@ -0,0 +1,122 @@
+# orders/events.py
+"""
+Order events for the barista dashboard stream (GET /api/orders/stream/).
+
+Views publish `order.created` / `order.status_changed` after their transaction
+commits; every open dashboard connection has a Subscription fed by the broker.
+The broker is picked with settings.ORDER_EVENTS_BROKER — LocalBroker keeps
+everything in-process (one server process); a Redis/Postgres LISTEN backend
+only needs the same publish()/subscribe() pair.
+"""
+import asyncio
+import functools
+import json
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+SNAPSHOT = "snapshot"
+
+
+@dataclass(frozen=True)
+class Event:
+    type: str
+    data: str  # JSON, encoded once at publish time and shared by every subscriber
+
+    def to_sse(self) -> str:
+        return f"event: {self.type}\ndata: {self.data}\n\n"
+
+
+def make_event(event_type: str, payload) -> Event:
+    return Event(event_type, json.dumps(payload, cls=JSONEncoder, separators=(",", ":")))
+
+
+class Subscription:
+    """One connected dashboard — events are handed over to its event loop thread-safely"""
+
+    def __init__(self, broker, max_pending: int):
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def push(self, event: Event):
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # event loop already gone — connection died without cleanup
+            self.close()
+
+    def _put(self, event: Event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up — drop it; the client reconnects and gets a fresh snapshot
+            self.overflowed = True
+            self.close()
+
+    async def get(self, timeout: float):
+        """Next event, or None when nothing happened within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process fan-out to every subscriber of this server process"""
+
+    def __init__(self, max_pending=None):
+        self.max_pending = max_pending or settings.ORDER_EVENTS_MAX_PENDING
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event: Event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(event)
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.ORDER_EVENTS_BROKER)()
+
+
+@receiver(setting_changed)
+def _reset_broker(*, setting, **kwargs):
+    if setting in ('ORDER_EVENTS_BROKER', 'ORDER_EVENTS_MAX_PENDING'):
+        get_broker.cache_clear()
+
+
+def publish_on_commit(event_type: str, payload):
+    """
+    Deliver only once the surrounding transaction has committed. The payload is
+    encoded now — or, when it's a callable, built at commit time, after the
+    on-commit work registered before it (e.g. the kitchen schedule update).
+    """
+    if callable(payload):
+        transaction.on_commit(lambda: get_broker().publish(make_event(event_type, payload())))
+        return
+    event = make_event(event_type, payload)
+    transaction.on_commit(lambda: get_broker().publish(event))
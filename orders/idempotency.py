@@ -0,0 +1,98 @@
+# orders/idempotency.py
+"""
+`Idempotency-Key` support for POST /api/orders/.
+
+The key is claimed in its own short transaction before checkout starts, so a
+concurrent duplicate sees it immediately and gets 409 instead of placing a
+second order. The 201 body is stored in the checkout transaction itself —
+order and stored response commit together — and retries replay it without
+touching the order tables or burning another order number.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class KeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed. Retry shortly."
+    default_code = 'idempotency_key_in_use'
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+    default_code = 'idempotency_key_reused'
+
+
+class InvalidKey(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Idempotency-Key must be 1-255 characters."
+    default_code = 'invalid_idempotency_key'
+
+
+def fingerprint(request) -> str:
+    user_id = request.user.pk if request.user.is_authenticated else None
+    raw = json.dumps([user_id, request.data], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def begin(key: str, request_fingerprint: str):
+    """
+    Claim `key` for this request. Returns None when the caller owns it now,
+    or the finished IdempotencyKey whose response should be replayed.
+    """
+    if not 0 < len(key) <= 255:
+        raise InvalidKey()
+
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key=key, fingerprint=request_fingerprint)
+        return None
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if record is None:  # purged between our INSERT and SELECT — claim again
+        return begin(key, request_fingerprint)
+
+    now = timezone.now()
+    expired = record.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    abandoned = (
+        record.response_code is None
+        and record.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_PENDING_TIMEOUT)
+    )
+    if expired or abandoned:
+        # Conditional take-over: only one of several racing retries wins
+        taken = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+            fingerprint=request_fingerprint, response_code=None, response_body=None, created_at=now
+        )
+        if taken:
+            return None
+        raise KeyInUse()
+
+    if record.fingerprint != request_fingerprint:
+        raise KeyReused()
+    if record.response_code is None:
+        raise KeyInUse()
+    return record
+
+
+def complete(key: str, response_code: int, response_body):
+    """Store the response — call inside the checkout transaction"""
+    IdempotencyKey.objects.filter(key=key).update(response_code=response_code, response_body=response_body)
+
+
+def abandon(key: str):
+    """Checkout failed: free the key so the client can retry with it"""
+    IdempotencyKey.objects.filter(key=key, response_code__isnull=True).delete()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from orders.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = "Move finished orders older than ORDER_ARCHIVE_AFTER_DAYS to the archive tables (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Archive orders placed more than this many days ago")
+        parser.add_argument("--batch-size", type=int, help="Orders moved per transaction")
+
+    def handle(self, *args, **options):
+        moved = sum(archive_orders(options["days"], options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} orders."))
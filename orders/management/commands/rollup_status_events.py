@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.analytics import rollup_status_events
+
+
+class Command(BaseCommand):
+    help = "Roll order status events up into hourly/daily transition timings (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=int, default=26,
+            help="Recompute buckets from this many hours back (default 26: today and yesterday's tail)",
+        )
+
+    def handle(self, *args, **options):
+        end = timezone.now()
+        written = rollup_status_events(end - timedelta(hours=options["hours"]), end)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} transition stats rows."))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_history_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PickupSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(unique=True)),
+                ('capacity_minutes', models.PositiveIntegerField()),
+                ('booked_minutes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Pickup Slot',
+                'verbose_name_plural': 'Pickup Slots',
+                'ordering': ['start'],
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='slot_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='pickup_slot',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='orders.pickupslot'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_pickup_slots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusTransitionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour/day, local time')),
+                ('from_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('to_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('count', models.PositiveIntegerField()),
+                ('p50_seconds', models.FloatField()),
+                ('p90_seconds', models.FloatField()),
+                ('p95_seconds', models.FloatField()),
+                ('max_seconds', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Status Transition Stats',
+                'verbose_name_plural': 'Status Transition Stats',
+                'ordering': ['granularity', 'bucket', 'from_status', 'to_status'],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'bucket', 'from_status', 'to_status'), name='orders_transition_stats_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('to_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('duration_seconds', models.PositiveIntegerField(help_text='Time spent in from_status')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='orders.order')),
+            ],
+            options={
+                'verbose_name': 'Order Status Event',
+                'verbose_name_plural': 'Order Status Events',
+                'ordering': ['order', 'at'],
+                'indexes': [models.Index(fields=['order', 'at'], name='orders_statusevent_order_at'), models.Index(fields=['at'], name='orders_statusevent_at')],
+            },
+        ),
+    ]
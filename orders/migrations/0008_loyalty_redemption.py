@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:18
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_status_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='discount_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='points_redeemed',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
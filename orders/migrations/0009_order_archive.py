@@ -0,0 +1,122 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:34
+
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+ORDER_COLUMNS = (
+    "id, user_id, order_number, total_amount, points_redeemed, discount_amount, status, is_paid, "
+    "requested_pickup_time, customer_name, notes, created_at, updated_at"
+)
+ITEM_COLUMNS = "id, order_id, product_id, quantity, unit_price, customizations"
+
+CREATE_VIEWS = f"""
+CREATE VIEW orders_history AS
+    SELECT {ORDER_COLUMNS}, false AS archived FROM orders_order
+    UNION ALL
+    SELECT {ORDER_COLUMNS}, true AS archived FROM orders_archivedorder;
+CREATE VIEW orders_history_item AS
+    SELECT {ITEM_COLUMNS} FROM orders_orderitem
+    UNION ALL
+    SELECT {ITEM_COLUMNS} FROM orders_archivedorderitem;
+"""
+DROP_VIEWS = "DROP VIEW orders_history_item; DROP VIEW orders_history;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_loyalty_redemption'),
+        ('products', '0003_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_number', models.CharField(max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('points_redeemed', models.PositiveIntegerField()),
+                ('discount_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('is_paid', models.BooleanField()),
+                ('requested_pickup_time', models.DateTimeField(null=True)),
+                ('customer_name', models.CharField(max_length=100)),
+                ('notes', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived', models.BooleanField()),
+            ],
+            options={
+                'verbose_name_plural': 'Order History',
+                'db_table': 'orders_history',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderHistoryItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('customizations', models.JSONField()),
+            ],
+            options={
+                'db_table': 'orders_history_item',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('order_number', models.CharField(max_length=20, unique=True)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('points_redeemed', models.PositiveIntegerField(default=0)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('is_paid', models.BooleanField()),
+                ('requested_pickup_time', models.DateTimeField(blank=True, null=True)),
+                ('customer_name', models.CharField(blank=True, max_length=100)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Order',
+                'verbose_name_plural': 'Archived Orders',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('customizations', models.JSONField(blank=True, default=dict)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.archivedorder')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Archived Order Item',
+                'verbose_name_plural': 'Archived Order Items',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['created_at', 'id'], name='orders_archived_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='orders_archived_user_created'),
+        ),
+        migrations.RunSQL(CREATE_VIEWS, DROP_VIEWS),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_order_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ('PENDING', 'CONFIRMED', 'PREPARING', 'READY'))), fields=['requested_pickup_time', 'created_at'], name='orders_active_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+EVENT_COLUMNS = "id, order_id, from_status, to_status, at, duration_seconds"
+
+CREATE_VIEW = f"""
+CREATE VIEW orders_status_event_history AS
+    SELECT {EVENT_COLUMNS} FROM orders_orderstatusevent
+    UNION ALL
+    SELECT {EVENT_COLUMNS} FROM orders_archivedorderstatusevent;
+"""
+DROP_VIEW = "DROP VIEW orders_status_event_history;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_active_queue_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusEventHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('to_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('at', models.DateTimeField()),
+                ('duration_seconds', models.PositiveIntegerField()),
+            ],
+            options={
+                'db_table': 'orders_status_event_history',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderStatusEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('from_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('to_status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('PREPARING', 'Preparing'), ('READY', 'Ready for Pickup'), ('COMPLETED', 'Picked Up'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('at', models.DateTimeField()),
+                ('duration_seconds', models.PositiveIntegerField()),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='orders.archivedorder')),
+            ],
+            options={
+                'verbose_name': 'Archived Order Status Event',
+                'verbose_name_plural': 'Archived Order Status Events',
+                'ordering': ['order', 'at'],
+                'indexes': [models.Index(fields=['at'], name='orders_archivedevent_at')],
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+    ]
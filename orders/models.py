@@ -1,17 +1,21 @@
 # orders/models.py
-from django.db import models, transaction
+from django.db import models
 from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
 from django.utils import timezone
 from django.db.models import F, Sum
+from django.db.models.functions import Now
 from products.models import Product
 from decimal import Decimal
 
+from .customizations import render_customizations
+
 
 class OrderCounter(models.Model):
     """
-    One row per day → guarantees unique, sequential order numbers
-    Used by real cafés, Shopify, Square, etc.
-    100% race-condition proof even at 1000 orders/second
+    One row per day → unique, sequential order numbers (`YYYYMMDD-NNNN`).
+    Allocation strategy lives in orders/numbering.py (settings.ORDER_NUMBER_ALLOCATOR):
+    atomic `UPDATE ... RETURNING` per order, or block leases served from memory.
     """
     date = models.DateField(unique=True, db_index=True)
     last_sequence = models.PositiveIntegerField(default=0)
@@ -22,17 +26,35 @@ class OrderCounter(models.Model):
 
     @classmethod
     def get_next_order_number(cls) -> str:
-        today = timezone.now().date()
-        with transaction.atomic():
-            counter, created = cls.objects.get_or_create(date=today)
-            counter.last_sequence += 1
-            counter.save(update_fields=['last_sequence'])
-            return f"{today.strftime('%Y%m%d')}-{counter.last_sequence:04d}"
+        from .numbering import get_allocator
+        return get_allocator().next_order_number()
 
     def __str__(self):
         return f"{self.date} → {self.last_sequence:04d}"
 
 
+class PickupSlot(models.Model):
+    """
+    One row per pickup window (settings.PICKUP_SLOT_MINUTES long) — how many prep
+    minutes the bar can absorb for it and how many are already promised.
+    Created on first booking; orders/slots.py books it with a conditional UPDATE.
+    """
+    start = models.DateTimeField(unique=True)
+    capacity_minutes = models.PositiveIntegerField()
+    booked_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["start"]
+        verbose_name = "Pickup Slot"
+        verbose_name_plural = "Pickup Slots"
+
+    def __str__(self):
+        return f"{self.start:%Y-%m-%d %H:%M} → {self.booked_minutes}/{self.capacity_minutes} min"
+
+
+ACTIVE_STATUSES = ("PENDING", "CONFIRMED", "PREPARING", "READY")  # the barista queue
+
+
 class Order(models.Model):
     """
     Customer order — drinks, beans, merch — guest or logged-in
@@ -47,6 +69,9 @@ class Order(models.Model):
 
     order_number = models.CharField(max_length=20, unique=True, editable=False, db_index=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
+    # Loyalty reward spent at checkout ("10 = 1 free") — taken off the items' total
+    points_redeemed = models.PositiveIntegerField(default=0, editable=False)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
 
     STATUS_CHOICES = [
         ("PENDING", "Pending"),
@@ -60,6 +85,11 @@ class Order(models.Model):
     is_paid = models.BooleanField(default=False, db_index=True)
 
     requested_pickup_time = models.DateTimeField(null=True, blank=True)
+    # Capacity taken in the pickup window (scheduled pickups only) — given back on cancel
+    pickup_slot = models.ForeignKey(
+        PickupSlot, on_delete=models.SET_NULL, related_name="orders", null=True, blank=True, editable=False
+    )
+    slot_minutes = models.PositiveIntegerField(default=0, editable=False)
     customer_name = models.CharField(max_length=100, blank=True)
     notes = models.TextField(blank=True)
 
@@ -74,6 +104,15 @@ class Order(models.Model):
             models.Index(fields=["status"]),
             models.Index(fields=["user"]),
             models.Index(fields=["is_paid"]),
+            # Keyset pagination: history pages by (created_at, id), globally and per customer
+            models.Index(fields=["created_at", "id"], name="orders_created_id_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="orders_user_created_id_idx"),
+            # Barista queue: only the few active rows, already in pickup order (views.active_queue)
+            models.Index(
+                fields=["requested_pickup_time", "created_at"],
+                name="orders_active_queue_idx",
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+            ),
         ]
         verbose_name_plural = "Orders"
 
@@ -81,22 +120,24 @@ class Order(models.Model):
         name = self.user.full_name if self.user else (self.customer_name or "Guest")
         return f"Order {self.order_number} – {name}"
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, update_fields=None, **kwargs):
         is_new = self.pk is None
 
         if is_new:
             # 100% safe, atomic, sequential order number
             self.order_number = OrderCounter.get_next_order_number()
-
-        # Always recalculate total from items (database-level accuracy)
-        self.total_amount = self.calculate_total()
-        super().save(*args, **kwargs)
+        elif update_fields is None or 'total_amount' in update_fields:
+            # Recalculate total from items (database-level accuracy).
+            # New orders have no items yet — the batched checkout path
+            # computes their total in Python before the first save.
+            self.total_amount = self.calculate_total()
+        super().save(*args, update_fields=update_fields, **kwargs)
 
     def calculate_total(self) -> Decimal:
         total = self.items.aggregate(
             total=Sum(F('unit_price') * F('quantity'), output_field=models.DecimalField())
         )['total'] or Decimal('0.00')
-        return total.quantize(Decimal('0.00'))
+        return max(total - self.discount_amount, Decimal('0.00')).quantize(Decimal('0.00'))
 
 
 class OrderItem(models.Model):
@@ -121,30 +162,237 @@ class OrderItem(models.Model):
         return (self.unit_price * self.quantity).quantize(Decimal('0.00'))
 
     def get_customization_display(self) -> str:
-        if not self.customizations:
-            return "Standard"
-
-        mapping = {
-            "size": {"small": "S", "medium": "M", "large": "L"},
-            "milk": str.capitalize,
-            "shots": lambda x: f"{int(x)} shot" if x == 1 else f"{int(x)} shots",
-            "syrup": str.capitalize,
-            "temperature": lambda x: f"{int(x)}°C",
-            "ice_level": str.capitalize,
-            "decaf": lambda x: "Decaf" if x else "",
-            "extra_hot": lambda x: "Extra Hot" if x else "",
-        }
-
-        parts = []
-        for key, value in self.customizations.items():
-            if value in (False, "", None):
-                continue
-            transform = mapping.get(key)
-            if transform:
-                display = transform(value) if callable(transform) else transform.get(value, str(value))
-                if display:
-                    parts.append(display)
-        return ", ".join(parts) or "Custom"
+        return render_customizations(self.customizations)
+
+    def __str__(self):
+        return f"{self.quantity}× {self.product.name} ({self.get_customization_display()})"
+
+class IdempotencyKey(models.Model):
+    """
+    Checkout retry guard — one row per `Idempotency-Key` header.
+    response_code is NULL while the first request is still running; afterwards
+    the stored 201 body is replayed to retries until the key expires.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64, help_text="sha256 of user + payload")
+    response_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    # DRF's encoder, so a replay renders byte-for-byte like the first response
+    response_body = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+
+    def __str__(self):
+        return f"{self.key} → {self.response_code or 'in progress'}"
+
+
+class OrderStatusEvent(models.Model):
+    """
+    Append-only status history — one row per transition, written in the same
+    transaction as the status change. duration_seconds is the time the order
+    spent in from_status (the first one counts from created_at), so timing
+    analytics never have to pair rows up.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="status_events")
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    at = models.DateTimeField(default=timezone.now)
+    duration_seconds = models.PositiveIntegerField(help_text="Time spent in from_status")
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        ordering = ["order", "at"]
+        indexes = [
+            models.Index(fields=["order", "at"], name="orders_statusevent_order_at"),
+            models.Index(fields=["at"], name="orders_statusevent_at"),  # rollup range scans
+        ]
+        verbose_name = "Order Status Event"
+        verbose_name_plural = "Order Status Events"
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} → {self.to_status} ({self.duration_seconds}s)"
+
+    @classmethod
+    def record(cls, order, from_status, changed_by=None):
+        """Log order's transition out of from_status; call inside the status-change transaction"""
+        now = timezone.now()
+        since = cls.objects.filter(order=order).order_by("-at").values_list("at", flat=True).first()
+        return cls.objects.create(
+            order=order,
+            from_status=from_status,
+            to_status=order.status,
+            at=now,
+            duration_seconds=max(int((now - (since or order.created_at)).total_seconds()), 0),
+            changed_by=changed_by,
+        )
+
+
+class StatusTransitionStats(models.Model):
+    """
+    Rolled-up timings per transition (e.g. CONFIRMED → PREPARING = queue time),
+    per hour and per day — built by `manage.py rollup_status_events`.
+    """
+    HOUR, DAY = "hour", "day"
+    GRANULARITY_CHOICES = [(HOUR, "Hour"), (DAY, "Day")]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour/day, local time")
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    count = models.PositiveIntegerField()
+    p50_seconds = models.FloatField()
+    p90_seconds = models.FloatField()
+    p95_seconds = models.FloatField()
+    max_seconds = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["granularity", "bucket", "from_status", "to_status"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "bucket", "from_status", "to_status"], name="orders_transition_stats_unique"
+            ),
+        ]
+        verbose_name = "Status Transition Stats"
+        verbose_name_plural = "Status Transition Stats"
 
     def __str__(self):
-        return f"{self.quantity}× {self.product.name} ({self.get_customization_display()})"
\ No newline at end of file
+        return f"{self.bucket:%Y-%m-%d %H:%M} {self.from_status} → {self.to_status}: p50 {self.p50_seconds:.0f}s"
+
+
+# ────────────────────── ARCHIVE ────────────────────── #
+class ArchivedOrder(models.Model):
+    """
+    A finished order moved out of the live table by `manage.py archive_orders`
+    (orders/archive.py) — same id, number and amounts, read-only from then on.
+    """
+    id = models.BigIntegerField(primary_key=True)  # the live order's id, kept
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_orders", null=True, blank=True
+    )
+    order_number = models.CharField(max_length=20, unique=True)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    points_redeemed = models.PositiveIntegerField(default=0)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    is_paid = models.BooleanField()
+    requested_pickup_time = models.DateTimeField(null=True, blank=True)
+    customer_name = models.CharField(max_length=100, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(db_default=Now())  # filled in by the INSERT ... SELECT
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="orders_archived_created_id"),
+            models.Index(fields=["user", "created_at", "id"], name="orders_archived_user_created"),
+        ]
+        verbose_name = "Archived Order"
+        verbose_name_plural = "Archived Orders"
+
+    def __str__(self):
+        return f"Archived order {self.order_number}"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name="items")
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="+")
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    customizations = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        verbose_name = "Archived Order Item"
+        verbose_name_plural = "Archived Order Items"
+
+
+class ArchivedOrderStatusEvent(models.Model):
+    """An OrderStatusEvent of an archived order — same id, append-only as before"""
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name="status_events")
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    at = models.DateTimeField()
+    duration_seconds = models.PositiveIntegerField()
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        ordering = ["order", "at"]
+        indexes = [models.Index(fields=["at"], name="orders_archivedevent_at")]  # rollup range scans
+        verbose_name = "Archived Order Status Event"
+        verbose_name_plural = "Archived Order Status Events"
+
+
+class OrderHistory(models.Model):
+    """
+    Every order, live or archived — the `orders_history` view (UNION ALL of
+    both tables, migration 0009). Filters and keyset ordering are pushed into
+    each branch, so the (user, created_at, id) indexes serve both halves.
+    Read-only: writes go to Order.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, related_name="+", null=True)
+    order_number = models.CharField(max_length=20)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    points_redeemed = models.PositiveIntegerField()
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    is_paid = models.BooleanField()
+    requested_pickup_time = models.DateTimeField(null=True)
+    customer_name = models.CharField(max_length=100)
+    notes = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = "orders_history"
+        ordering = ["-created_at"]
+        verbose_name_plural = "Order History"
+
+    def __str__(self):
+        return f"Order {self.order_number}"
+
+
+class OrderHistoryItem(models.Model):
+    """Items of OrderHistory — the `orders_history_item` view"""
+    order = models.ForeignKey(OrderHistory, on_delete=models.DO_NOTHING, related_name="items")
+    product = models.ForeignKey(Product, on_delete=models.DO_NOTHING, related_name="+")
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    customizations = models.JSONField()
+
+    class Meta:
+        managed = False
+        db_table = "orders_history_item"
+
+    def get_subtotal(self) -> Decimal:
+        return (self.unit_price * self.quantity).quantize(Decimal('0.00'))
+
+    def get_customization_display(self) -> str:
+        return render_customizations(self.customizations)
+
+
+class StatusEventHistory(models.Model):
+    """
+    Every status event, live or archived — the `orders_status_event_history`
+    view (migration 0011). The timing rollups read this, so rebuilding a bucket
+    after its orders were archived gives the same numbers.
+    """
+    order = models.ForeignKey(OrderHistory, on_delete=models.DO_NOTHING, related_name="status_events")
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    at = models.DateTimeField()
+    duration_seconds = models.PositiveIntegerField()
+
+    class Meta:
+        managed = False
+        db_table = "orders_status_event_history"
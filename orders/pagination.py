@@ -0,0 +1,87 @@
+# orders/pagination.py
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Keyset pagination for order history, opt-in with `?pagination=cursor`. The
+    cursor is the (created_at, id) pair of the row it stops at, so a page is
+    `WHERE (created_at, id) < (…)` on the (created_at, id) index — no OFFSET,
+    even for orders placed in the same instant, and no COUNT(*) over orders.
+    Page 500 costs what page 1 costs.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.position is not None:
+            try:
+                self._parse_position(cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination's, with the position filter on the whole (created_at, id) key —
+        # the stock one only looks at ordering[0] and pages through ties by OFFSET
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        queryset = queryset.order_by(*(self._reverse(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = self._beyond(queryset, current_position, older=not reverse)
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if len(results) > len(self.page) else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position, self.previous_position = following_position, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            return f"{instance['created_at'].isoformat()}|{instance['id']}"
+        return f"{instance.created_at.isoformat()}|{instance.pk}"
+
+    @staticmethod
+    def _parse_position(position):
+        created_at, pk = position.split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+
+    @staticmethod
+    def _reverse(ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    def _beyond(self, queryset, position, older):
+        """Rows after `position` in the direction of travel"""
+        created_at, pk = self._parse_position(position)
+        # The created_at bound is the index range; the exclude drops the part of the tie already seen
+        if older:
+            return queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=pk)
+        return queryset.filter(created_at__gte=created_at).exclude(created_at=created_at, id__lte=pk)
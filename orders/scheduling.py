@@ -0,0 +1,265 @@
+# orders/scheduling.py
+"""
+Kitchen pacing — when will each active order actually be ready?
+
+Every queued order needs `sum(quantity × product.prep_time_minutes)` minutes
+at one of settings.KITCHEN_STATIONS barista stations. Orders are served by
+due time (requested pickup, or when they were placed for ASAP orders), and a
+station never starts an order earlier than it must to hit its pickup time
+(drinks for 3pm aren't made at 9am):
+
+    start    = max(earliest free station, due − prep)
+    ready_at = start + prep
+
+Waiting orders live in a sorted queue; the station state reached before each
+position is kept as a checkpoint. A new order or status change therefore only
+re-plans the orders behind it, and a checkout quote is one bisect into the
+checkpoints. Orders being prepared hold their station until they're done.
+
+Each process keeps its own schedule (like the suggestion index) and reloads
+it from the database every KITCHEN_RESYNC_SECONDS, or when a dashboard shows
+an order it hasn't seen — another worker took it.
+"""
+import bisect
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import F, Sum
+from django.dispatch import receiver
+from django.utils import timezone
+
+WAITING_STATUSES = ("PENDING", "CONFIRMED")
+QUEUED_STATUSES = WAITING_STATUSES + ("PREPARING",)
+
+# Estimates older than this are re-planned from scratch: time has passed, so
+# a station that was "free now" and a queue that hasn't moved both slipped
+REPLAN_SECONDS = 30
+
+
+@dataclass(slots=True)
+class Ticket:
+    order_id: int
+    status: str
+    due: datetime           # requested pickup, else placed-at (ASAP)
+    prep: timedelta
+    started_at: datetime = None  # PREPARING only
+
+    @property
+    def priority(self) -> tuple:
+        return (self.due, self.order_id)
+
+
+@dataclass(frozen=True, slots=True)
+class Estimate:
+    position: int           # 0 = on a station now, 1 = next up, ...
+    start: datetime
+    ready_at: datetime
+
+
+class KitchenSchedule:
+    """Incremental list scheduling of queued orders over `stations` stations"""
+
+    def __init__(self, stations: int):
+        self.stations = max(1, stations)
+        self._lock = threading.RLock()
+        self._tickets = {}       # order_id → Ticket
+        self._queue = []         # waiting tickets' priorities, sorted
+        self._checkpoints = []   # station free-times heap before queue[i]; one extra at the end
+        self._estimates = {}     # order_id → Estimate
+        self._valid = 0          # queue[:_valid] has current estimates
+        self._planned_at = None  # None → in-progress orders changed, re-plan everything
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, order_id):
+        return order_id in self._tickets
+
+    def status_of(self, order_id):
+        ticket = self._tickets.get(order_id)
+        return ticket.status if ticket else None
+
+    # ────────────── maintenance ────────────── #
+    def load(self, tickets):
+        with self._lock:
+            self._tickets = {ticket.order_id: ticket for ticket in tickets}
+            self._queue = sorted(t.priority for t in self._tickets.values() if t.status in WAITING_STATUSES)
+            self._planned_at = None
+
+    def upsert(self, ticket: Ticket):
+        """New order or status change — orders that leave the queue (READY, ...) are dropped"""
+        with self._lock:
+            self.remove(ticket.order_id)
+            if ticket.status in WAITING_STATUSES:
+                position = bisect.bisect_left(self._queue, ticket.priority)
+                self._queue.insert(position, ticket.priority)
+                self._valid = min(self._valid, position)
+            elif ticket.status == "PREPARING":
+                self._planned_at = None
+            else:
+                return
+            self._tickets[ticket.order_id] = ticket
+
+    def remove(self, order_id):
+        with self._lock:
+            ticket = self._tickets.pop(order_id, None)
+            if ticket is None:
+                return
+            self._estimates.pop(order_id, None)
+            if ticket.status in WAITING_STATUSES:
+                position = bisect.bisect_left(self._queue, ticket.priority)
+                del self._queue[position]
+                self._valid = min(self._valid, position)
+            else:
+                self._planned_at = None
+
+    # ────────────── planning ────────────── #
+    def _plan(self, now: datetime):
+        if self._planned_at is None or (now - self._planned_at).total_seconds() > REPLAN_SECONDS:
+            self._estimates = {}
+            self._checkpoints = [self._in_progress(now)]
+            self._valid = 0
+            self._planned_at = now
+
+        # Only positions from the first change onwards are re-planned
+        del self._checkpoints[self._valid + 1:]
+        stations = list(self._checkpoints[self._valid])
+        for position in range(self._valid, len(self._queue)):
+            ticket = self._tickets[self._queue[position][1]]
+            start = max(heapq.heappop(stations), ticket.due - ticket.prep)
+            heapq.heappush(stations, start + ticket.prep)
+            self._estimates[ticket.order_id] = Estimate(position + 1, start, start + ticket.prep)
+            self._checkpoints.append(tuple(stations))
+        self._valid = len(self._queue)
+
+    def _in_progress(self, now: datetime) -> tuple:
+        """Station free-times once the orders already being made are done"""
+        stations = [now] * self.stations
+        preparing = sorted(
+            (t for t in self._tickets.values() if t.status == "PREPARING"),
+            key=lambda t: (t.started_at, t.order_id),
+        )
+        for ticket in preparing:
+            free = heapq.heappop(stations)
+            # An idle station has been busy with it since it started; more orders
+            # in progress than stations → it's effectively queued behind one
+            start = ticket.started_at if free <= now else max(free, ticket.started_at)
+            ready_at = max(start + ticket.prep, now)  # running over → "any minute now"
+            heapq.heappush(stations, ready_at)
+            self._estimates[ticket.order_id] = Estimate(0, start, ready_at)
+        return tuple(stations)
+
+    def estimates(self, now=None) -> dict:
+        """order_id → Estimate for every queued order"""
+        with self._lock:
+            self._plan(now or timezone.now())
+            return dict(self._estimates)
+
+    def quote(self, prep: timedelta, due=None, now=None) -> Estimate:
+        """Where a new order would land — nothing already queued is re-planned"""
+        now = now or timezone.now()
+        due = due or now
+        with self._lock:
+            self._plan(now)
+            position = bisect.bisect_right(self._queue, (due, float("inf")))
+            start = max(self._checkpoints[position][0], due - prep)
+            return Estimate(position + 1, start, start + prep)
+
+
+def order_prep(order) -> timedelta:
+    """Prep time of an order whose items (with products) are already loaded"""
+    return timedelta(minutes=sum(item.quantity * item.product.prep_time_minutes for item in order.items.all()))
+
+
+def ticket_for(order, started_at=None) -> Ticket:
+    return Ticket(
+        order_id=order.pk,
+        status=order.status,
+        due=order.requested_pickup_time or order.created_at,
+        prep=order_prep(order),
+        started_at=started_at or order.updated_at,
+    )
+
+
+class Kitchen:
+    """Process-wide schedule, kept in step with the orders table"""
+
+    def __init__(self):
+        self.schedule = None
+        self._lock = threading.Lock()
+        self._loaded_at = 0.0
+
+    def reset(self):
+        with self._lock:
+            self.schedule = None
+
+    def refresh(self, orders=()):
+        """Reload when stale, or when `orders` (fresh from the DB) disagree with the schedule"""
+        schedule = self.schedule
+        stale = time.monotonic() - self._loaded_at > settings.KITCHEN_RESYNC_SECONDS
+        if schedule is not None and not stale and all(
+            schedule.status_of(order.pk) == order.status
+            for order in orders if order.status in QUEUED_STATUSES
+        ):
+            return schedule
+        with self._lock:
+            self.load()
+            return self.schedule
+
+    def load(self):
+        """The whole queue in one query — prep minutes summed by the database"""
+        from .models import Order
+
+        rows = Order.objects.filter(status__in=QUEUED_STATUSES).order_by().annotate(
+            prep_minutes=Sum(F("items__quantity") * F("items__product__prep_time_minutes")),
+        ).values("id", "status", "requested_pickup_time", "created_at", "updated_at", "prep_minutes")
+        schedule = KitchenSchedule(settings.KITCHEN_STATIONS)
+        schedule.load(
+            Ticket(
+                order_id=row["id"],
+                status=row["status"],
+                due=row["requested_pickup_time"] or row["created_at"],
+                prep=timedelta(minutes=row["prep_minutes"] or 0),
+                started_at=row["updated_at"],
+            )
+            for row in rows
+        )
+        self.schedule = schedule
+        self._loaded_at = time.monotonic()
+
+    def estimates(self, orders=()) -> dict:
+        return self.refresh(orders).estimates()
+
+    def quote(self, order) -> Estimate:
+        """ETA for an order that is being placed (not yet in the schedule)"""
+        schedule = self.refresh()
+        # A reload inside the checkout transaction already sees the new row — it
+        # is queued for real by schedule_on_commit(), only if the checkout commits
+        schedule.remove(order.pk)
+        return schedule.quote(order_prep(order), due=order.requested_pickup_time or timezone.now())
+
+    def apply(self, ticket: Ticket):
+        schedule = self.schedule
+        if schedule is not None:  # not loaded yet → the first load will read it
+            schedule.upsert(ticket)
+
+
+kitchen = Kitchen()
+
+
+def schedule_on_commit(order):
+    """Feed a created/updated order to this process's schedule once it's committed"""
+    ticket = ticket_for(order, started_at=timezone.now())  # items are read now, inside the request
+    transaction.on_commit(lambda: kitchen.apply(ticket))
+
+
+@receiver(setting_changed)
+def _reset_kitchen(*, setting, **kwargs):
+    if setting in ("KITCHEN_STATIONS", "KITCHEN_RESYNC_SECONDS"):
+        kitchen.reset()
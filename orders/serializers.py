@@ -1,11 +1,24 @@
 # orders/serializers.py
 from rest_framework import serializers
+from django.conf import settings
+from django.db.models import Prefetch
 from django.utils import timezone
 from decimal import Decimal
 
+from .customizations import normalize_customizations
 from .models import Order, OrderItem
+from .slots import SlotFull, prep_minutes, reserve_slot
+from products.inventory import InsufficientStock, merch_quantities, reserve_stock
 from products.models import Product
-from products.serializers import ProductDetailSerializer
+from users.loyalty import NotEnoughPoints, redeem_for_order, reward_discount
+
+
+class OrderProductSummarySerializer(serializers.Serializer):
+    """Compact product card embedded in order items — price is the frozen snapshot"""
+    id = serializers.IntegerField(source="product_id", read_only=True)
+    name = serializers.CharField(source="product.name", read_only=True)
+    slug = serializers.CharField(source="product.slug", read_only=True)
+    price = serializers.DecimalField(source="unit_price", max_digits=10, decimal_places=2, read_only=True)
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -14,7 +27,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         queryset=Product.objects.all(),
         write_only=True,
     )
-    product_details = ProductDetailSerializer(source="product", read_only=True)
+    product_details = OrderProductSummarySerializer(source="*", read_only=True)
     customizations_display = serializers.SerializerMethodField()
     subtotal = serializers.SerializerMethodField()
 
@@ -35,6 +48,9 @@ class OrderItemSerializer(serializers.ModelSerializer):
     def get_customizations_display(self, obj):
         return obj.get_customization_display()
 
+    def validate_customizations(self, value):
+        return normalize_customizations(value)
+
     def get_subtotal(self, obj):
         return obj.get_subtotal()
 
@@ -48,20 +64,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
         return data
 
-    def create(self, validated_data):
-        product = validated_data.pop("product")
-        item = OrderItem.objects.create(
-            product=product,
-            unit_price=product.price,  # freeze price at time of order
-            **validated_data
-        )
-        return item
-
 
 class OrderListRetrieveSerializer(serializers.ModelSerializer):
     """Used for GET /orders/ and /orders/<number>/"""
     items = OrderItemSerializer(many=True, read_only=True)
-    items_count = serializers.IntegerField(source="items.count", read_only=True)
+    items_count = serializers.SerializerMethodField()
     status_display = serializers.CharField(source="get_status_display", read_only=True)
 
     class Meta:
@@ -71,6 +78,8 @@ class OrderListRetrieveSerializer(serializers.ModelSerializer):
             "order_number",
             "user",
             "total_amount",
+            "discount_amount",
+            "points_redeemed",
             "status",
             "status_display",
             "is_paid",
@@ -85,15 +94,67 @@ class OrderListRetrieveSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "order_number",
             "total_amount",
+            "discount_amount",
+            "points_redeemed",
             "created_at",
             "updated_at",
             "items_count",
         ]
 
+    @staticmethod
+    def items_prefetch(item_model=OrderItem) -> Prefetch:
+        """Everything the read model needs for items, in ONE query per page (OrderHistoryItem for history)"""
+        return Prefetch(
+            "items",
+            queryset=item_model.objects.select_related("product").only(
+                "id", "order_id", "product_id", "quantity", "unit_price", "customizations",
+                "product__id", "product__name", "product__slug", "product__is_merch",
+                "product__prep_time_minutes",
+            ).order_by("id"),
+        )
+
+    def get_items_count(self, obj) -> int:
+        return len(obj.items.all())  # served from the prefetch, no COUNT(*)
+
+
+class ActiveOrderSerializer(OrderListRetrieveSerializer):
+    """Barista queue — the read model plus kitchen ETAs from context["estimates"]"""
+    queue_position = serializers.SerializerMethodField()
+    estimated_ready_at = serializers.SerializerMethodField()
+
+    class Meta(OrderListRetrieveSerializer.Meta):
+        fields = OrderListRetrieveSerializer.Meta.fields + ["queue_position", "estimated_ready_at"]
+
+    def _estimate(self, obj):
+        return self.context.get("estimates", {}).get(obj.pk)
+
+    def get_queue_position(self, obj):
+        estimate = self._estimate(obj)
+        return estimate.position if estimate else None
+
+    def get_estimated_ready_at(self, obj):
+        estimate = self._estimate(obj)
+        return serializers.DateTimeField().to_representation(estimate.ready_at) if estimate else None
+
+
+class OrderItemWriteSerializer(serializers.ModelSerializer):
+    """Nested item payload for checkout — products are resolved in bulk by the parent"""
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+    class Meta:
+        model = OrderItem
+        fields = ["product", "quantity", "customizations"]
+
+    def validate_customizations(self, value):
+        # Canonical form ({"size": "large", "shots": 2}) is what gets stored
+        return normalize_customizations(value)
+
 
 class OrderCreateSerializer(serializers.ModelSerializer):
     """POST /api/orders/ — accepts nested items"""
-    items = OrderItemSerializer(many=True, write_only=True)
+    items = OrderItemWriteSerializer(many=True, write_only=True)
+    redeem_reward = serializers.BooleanField(default=False, write_only=True)  # spend points on a free item
 
     class Meta:
         model = Order
@@ -103,6 +164,7 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             "customer_name",
             "notes",
             "items",
+            "redeem_reward",
         ]
         extra_kwargs = {
             "user": {"required": False, "allow_null": True},
@@ -116,24 +178,104 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         if pickup and pickup < timezone.now():
             raise serializers.ValidationError("Pickup time cannot be in the past.")
 
-        # Guest checkout: require name
-        if not data.get("user") and not data.get("customer_name"):
+        # Guest checkout: require name (a logged-in customer is attached by the view)
+        request = self.context.get("request")
+        logged_in = request is not None and request.user.is_authenticated
+        if not data.get("user") and not logged_in and not data.get("customer_name"):
             raise serializers.ValidationError("customer_name is required for guest orders.")
 
         return data
 
+    def validate_items(self, items):
+        """Resolve every product in ONE query instead of one per item."""
+        product_ids = {item["product"] for item in items}
+        products = Product.objects.in_bulk(product_ids)
+
+        missing = sorted(product_ids - products.keys())
+        if missing:
+            raise serializers.ValidationError(
+                f"Invalid product id(s): {', '.join(map(str, missing))}."
+            )
+
+        for item in items:
+            product = products[item["product"]]
+            if not product.in_stock:
+                raise serializers.ValidationError(f"'{product.name}' is out of stock or unavailable.")
+            item["product"] = product
+        return items
+
     def create(self, validated_data):
+        """
+        Batched checkout — constant number of queries whatever the basket size:
+        freeze prices, total in Python, save the order once, bulk insert items.
+        """
         items_data = validated_data.pop("items")
-        order = Order.objects.create(**validated_data)
+        redeem = validated_data.pop("redeem_reward", False)
+        items = [
+            OrderItem(
+                product=item["product"],
+                quantity=item["quantity"],
+                unit_price=item["product"].price,  # freeze price at time of order
+                customizations=item.get("customizations") or {},
+            )
+            for item in items_data
+        ]
 
-        # Create all items
-        for item_data in items_data:
-            OrderItemSerializer().create({**item_data, "order": order})
+        # Take merch stock first — a sold-out line fails before any order row is written
+        try:
+            reserve_stock(merch_quantities((item.product, item.quantity) for item in items))
+        except InsufficientStock as exc:
+            name = next(item.product.name for item in items if item.product.pk == exc.product_id)
+            raise serializers.ValidationError({"items": [f"'{name}' is out of stock or unavailable."]})
 
-        # Triggers calculate_total() + total_amount update
-        order.save()
+        # Scheduled pickup → book its prep minutes in the pickup slot, or offer the next free ones
+        pickup = validated_data.get("requested_pickup_time")
+        if pickup:
+            minutes = prep_minutes((item.product, item.quantity) for item in items)
+            try:
+                validated_data["pickup_slot_id"] = reserve_slot(pickup, minutes)
+            except SlotFull as exc:
+                raise serializers.ValidationError({
+                    "requested_pickup_time": [
+                        f"The {timezone.localtime(exc.start):%H:%M} pickup slot is fully booked."
+                    ],
+                    "next_available_slots": [
+                        serializers.DateTimeField().to_representation(start) for start in exc.alternatives
+                    ],
+                })
+            validated_data["slot_minutes"] = minutes
+
+        total = sum((item.get_subtotal() for item in items), Decimal("0.00"))
+        if redeem:
+            discount = self._reward(validated_data.get("user"), items)
+            validated_data.update(points_redeemed=settings.LOYALTY_REWARD_POINTS, discount_amount=discount)
+            total -= discount
+        order = Order.objects.create(total_amount=total, **validated_data)
+
+        for item in items:
+            item.order = order
+        # bulk_create skips OrderItem.save() → no per-item order re-save
+        OrderItem.objects.bulk_create(items)
+
+        if redeem:
+            try:
+                redeem_for_order(order)  # conditional debit — a concurrent checkout may have spent them
+            except NotEnoughPoints:
+                raise serializers.ValidationError({"redeem_reward": ["Not enough loyalty points."]})
         return order
 
+    def _reward(self, user, items) -> Decimal:
+        """Price of the free item — early checks only, the debit itself is atomic"""
+        request = self.context.get("request")
+        if user is None or request is None or request.user.pk != user.pk:  # only your own points
+            raise serializers.ValidationError({"redeem_reward": ["Log in to use loyalty points."]})
+        if user.loyalty_points < settings.LOYALTY_REWARD_POINTS:
+            raise serializers.ValidationError({"redeem_reward": ["Not enough loyalty points."]})
+        discount = reward_discount((item.product, item.unit_price) for item in items)
+        if discount is None:
+            raise serializers.ValidationError({"redeem_reward": ["Rewards can't be spent on merch."]})
+        return discount
+
 
 class OrderStatusUpdateSerializer(serializers.ModelSerializer):
     """PATCH /api/orders/<number>/status/ — barista only"""
@@ -0,0 +1,123 @@
+# orders/slots.py
+"""
+Pickup-slot admission control — 200 people can't all get their latte at 8:00.
+
+Scheduled pickups are grouped into PICKUP_SLOT_MINUTES windows. Each window
+(a PickupSlot row) has a budget of prep minutes, PICKUP_SLOT_CAPACITY, and a
+running total of what's already promised. An order books
+`sum(quantity × prep_time_minutes)` with one conditional statement:
+
+    UPDATE ... SET booked_minutes = booked_minutes + %s
+    WHERE start = %s AND (booked_minutes = 0 OR booked_minutes + %s <= capacity_minutes)
+    RETURNING booked_minutes
+
+so check and booking can't race, and nothing aggregates over orders. An
+order bigger than a whole slot still gets an empty one. Availability reads
+the same counters: one indexed range query per request.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import PickupSlot
+
+SUGGESTED_SLOTS = 3   # alternatives offered when the requested slot is full
+SEARCH_HOURS = 4      # how far ahead to look for them
+
+
+class SlotFull(Exception):
+    def __init__(self, start, minutes, alternatives):
+        self.start = start
+        self.minutes = minutes
+        self.alternatives = alternatives
+        super().__init__(f"Pickup slot {start:%Y-%m-%d %H:%M} can't take {minutes} more prep minutes.")
+
+
+def slot_length() -> timedelta:
+    return timedelta(minutes=settings.PICKUP_SLOT_MINUTES)
+
+
+def slot_start(when):
+    """8:07 → 8:00 with 15-minute slots"""
+    seconds = int(slot_length().total_seconds())
+    return when - timedelta(seconds=int(when.timestamp()) % seconds, microseconds=when.microsecond)
+
+
+def prep_minutes(lines) -> int:
+    """Prep minutes for (product, quantity) lines"""
+    return sum(product.prep_time_minutes * quantity for product, quantity in lines)
+
+
+def _book(start, minutes):
+    qn = connection.ops.quote_name
+    table = qn(PickupSlot._meta.db_table)
+    booked, capacity = qn("booked_minutes"), qn("capacity_minutes")
+    update = (
+        f"UPDATE {table} SET {booked} = {booked} + %s "
+        f"WHERE {qn('start')} = %s AND ({booked} = 0 OR {booked} + %s <= {capacity}) "
+        f"RETURNING {qn('id')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(update, [minutes, start, minutes])
+        row = cursor.fetchone()
+        if row is None and not PickupSlot.objects.filter(start=start).exists():
+            # First booking for this window — concurrent first bookings meet on one row
+            cursor.execute(
+                f"INSERT INTO {table} ({qn('start')}, {capacity}, {booked}) "
+                f"VALUES (%s, %s, 0) ON CONFLICT DO NOTHING",
+                [start, settings.PICKUP_SLOT_CAPACITY],
+            )
+            cursor.execute(update, [minutes, start, minutes])
+            row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def reserve_slot(when, minutes: int) -> int:
+    """Book `minutes` in the slot holding `when`; returns the PickupSlot id or raises SlotFull"""
+    start = slot_start(when)
+    slot_id = _book(start, minutes)
+    if slot_id is None:
+        raise SlotFull(start, minutes, next_available(start + slot_length(), minutes))
+    return slot_id
+
+
+def release_slot(slot_id: int, minutes: int):
+    """Give a cancelled order's minutes back"""
+    qn = connection.ops.quote_name
+    booked = qn("booked_minutes")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {qn(PickupSlot._meta.db_table)} SET {booked} = {booked} - %s "
+            f"WHERE {qn('id')} = %s AND {booked} >= %s",
+            [minutes, slot_id, minutes],
+        )
+
+
+def availability(start, end) -> list:
+    """Every slot in [start, end) with its remaining budget — slots nobody booked are empty"""
+    start = slot_start(start)
+    booked = {
+        row["start"]: row
+        for row in PickupSlot.objects.filter(start__gte=start, start__lt=end).values(
+            "start", "capacity_minutes", "booked_minutes"
+        )
+    }
+    slots, step = [], slot_length()
+    while start < end:
+        row = booked.get(start) or {"start": start, "capacity_minutes": settings.PICKUP_SLOT_CAPACITY, "booked_minutes": 0}
+        slots.append({**row, "available_minutes": max(row["capacity_minutes"] - row["booked_minutes"], 0)})
+        start += step
+    return slots
+
+
+def fits(slot, minutes: int) -> bool:
+    return slot["booked_minutes"] == 0 or slot["available_minutes"] >= minutes
+
+
+def next_available(after, minutes: int, count: int = SUGGESTED_SLOTS) -> list:
+    """Start times of the first `count` slots from `after` that can take `minutes`"""
+    after = max(after, timezone.now())
+    slots = availability(after, after + timedelta(hours=SEARCH_HOURS))
+    return [slot["start"] for slot in slots if slot["start"] >= after and fits(slot, minutes)][:count]
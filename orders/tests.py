@@ -1,3 +1,1247 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from coffe_house.asgi import application
+from coffe_house.replicas import ReplicaRouter, pinned_to_primary, use_replica
+
+from orders import archive, idempotency
+from orders.analytics import rollup_status_events
+from orders.customizations import Option
+from orders.events import ORDER_CREATED, get_broker, publish_on_commit
+from orders.models import (
+    ArchivedOrder, ArchivedOrderStatusEvent, IdempotencyKey, Order, OrderCounter, OrderItem, OrderStatusEvent, PickupSlot,
+    StatusTransitionStats,
+)
+from orders.numbering import get_allocator
+from orders.scheduling import KitchenSchedule, Ticket, kitchen
+from orders.serializers import OrderCreateSerializer
+from products.cache import menu_cache
+from products.models import Category, Product
+from users.loyalty import NotEnoughPoints, mismatched_balances, post_points
+from users.models import LoyaltyEntry, User
+
+
+class OrderCreateBatchTests(TestCase):
+    """Checkout must cost the same number of queries for 1 item or 20"""
+
+    # resolve products + counter (get_or_create + update) + order insert
+    # + items bulk insert, plus savepoints
+    QUERY_BUDGET = 8
+
+    def setUp(self):
+        drinks = Category.objects.create(name="Drinks")
+        self.products = [
+            Product.objects.create(name=f"Latte {i}", category=drinks, price=Decimal("4.25") + i)
+            for i in range(6)
+        ]
+        # Warm up today's OrderCounter row so every measured order takes the same path
+        self._place_order(1)
+
+    def _payload(self, item_count):
+        return {
+            "customer_name": "Guest Gus",
+            "items": [
+                {"product": self.products[i % len(self.products)].pk, "quantity": 2}
+                for i in range(item_count)
+            ],
+        }
+
+    def _place_order(self, item_count):
+        serializer = OrderCreateSerializer(data=self._payload(item_count))
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _count_queries(self, item_count):
+        with CaptureQueriesContext(connection) as ctx:
+            self._place_order(item_count)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_item_count(self):
+        """A 1-item and a 20-item order run the same queries"""
+        single = self._count_queries(1)
+        many = self._count_queries(20)
+        self.assertEqual(single, many)
+        self.assertLessEqual(many, self.QUERY_BUDGET)
+
+    def test_prices_frozen_and_total_computed_once(self):
+        """Unit prices come from the product, total matches the DB aggregate"""
+        order = self._place_order(6)
+
+        self.assertEqual(order.items.count(), 6)
+        for item in order.items.select_related("product"):
+            self.assertEqual(item.unit_price, item.product.price)
+        self.assertEqual(order.total_amount, order.calculate_total())
+        self.assertEqual(Order.objects.get(pk=order.pk).total_amount, Decimal("81.00"))
+
+    def test_logged_in_checkout_needs_no_customer_name(self):
+        customer = User.objects.create_user(email="kahawa@coffeehouse.com", password="pass12345", full_name="Kahawa Fan")
+        client = APIClient()
+        client.force_authenticate(customer)
+        payload = self._payload(1)
+        del payload["customer_name"]
+        response = client.post(reverse("order-list"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["user"], customer.pk)
+
+        guest = APIClient().post(reverse("order-list"), payload, format="json")
+        self.assertEqual(guest.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_product_rejected(self):
+        """Missing products fail validation without creating anything"""
+        payload = self._payload(1)
+        payload["items"].append({"product": 999999, "quantity": 1})
+        serializer = OrderCreateSerializer(data=payload)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("items", serializer.errors)
+        self.assertEqual(OrderItem.objects.count(), 1)  # only the warm-up order's item
+
+    def test_out_of_stock_merch_rejected(self):
+        """Merch with no stock cannot be ordered"""
+        mug = Product.objects.create(name="Savannah Mug", price=Decimal("15.00"), is_merch=True)
+        serializer = OrderCreateSerializer(data={
+            "customer_name": "Guest Gus",
+            "items": [{"product": mug.pk}],
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("items", serializer.errors)
+
+
+class OrderNumberAllocatorStressTests(TransactionTestCase):
+    """Concurrent checkouts must never share or skip an order number"""
+
+    THREADS = 8
+    PER_THREAD = 25
+
+    def _allocate_concurrently(self):
+        barrier = threading.Barrier(self.THREADS)
+        results, errors = [], []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.PER_THREAD):
+                    with transaction.atomic():
+                        results.append(OrderCounter.get_next_order_number())
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        return results
+
+    def _assert_gap_free(self, numbers):
+        total = self.THREADS * self.PER_THREAD
+        self.assertEqual(len(numbers), total)
+        self.assertEqual(len(set(numbers)), total, "duplicate order numbers issued")
+
+        prefixes = {number.split("-")[0] for number in numbers}
+        self.assertEqual(len(prefixes), 1)
+        sequences = sorted(int(number.split("-")[1]) for number in numbers)
+        self.assertEqual(sequences, list(range(1, total + 1)), "lost sequence numbers")
+
+    @override_settings(ORDER_NUMBER_ALLOCATOR="orders.numbering.AtomicUpdateAllocator")
+    def test_atomic_update_allocator(self):
+        numbers = self._allocate_concurrently()
+        self._assert_gap_free(numbers)
+        self.assertEqual(OrderCounter.objects.get().last_sequence, self.THREADS * self.PER_THREAD)
+
+    @override_settings(
+        ORDER_NUMBER_ALLOCATOR="orders.numbering.BlockAllocator",
+        ORDER_NUMBER_BLOCK_SIZE=7,
+    )
+    def test_block_allocator(self):
+        numbers = self._allocate_concurrently()
+        self._assert_gap_free(numbers)
+        # Counter only moves in whole blocks
+        self.assertEqual(OrderCounter.objects.get().last_sequence % 7, 0)
+        get_allocator().close()
+
+    @override_settings(
+        ORDER_NUMBER_ALLOCATOR="orders.numbering.BlockAllocator",
+        ORDER_NUMBER_BLOCK_SIZE=5,
+    )
+    def test_block_lease_survives_checkout_rollback(self):
+        """A rolled-back checkout must not return its leased block to the pool"""
+        try:
+            with transaction.atomic():
+                first = OrderCounter.get_next_order_number()
+                raise RuntimeError("payment failed")
+        except RuntimeError:
+            pass
+
+        self.assertEqual(OrderCounter.objects.get().last_sequence, 5)
+        self.assertNotEqual(OrderCounter.get_next_order_number(), first)
+        get_allocator().close()
+
+
+class OrderReadQueryCountTests(TestCase):
+    """Order reads must not fan out per order, item, product or category"""
+
+    def setUp(self):
+        drinks = Category.objects.create(name="Drinks")
+        beans = Category.objects.create(name="Beans")
+        products = [
+            Product.objects.create(name=f"Item {i}", category=drinks if i % 2 else beans, price=Decimal("3.50"))
+            for i in range(4)
+        ]
+        self.customer = User.objects.create_user(email="kahawa@coffeehouse.com", password="pass12345", full_name="Kahawa Fan")
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        for n in range(12):
+            serializer = OrderCreateSerializer(data={
+                "items": [{"product": p.pk, "quantity": 1 + n % 3} for p in products[: 1 + n % 4]],
+                "customer_name": "Guest",
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save(user=self.customer if n % 2 else None)
+        self.client = APIClient()
+        self.client.force_authenticate(self.barista)
+
+    def test_list_query_count(self):
+        """Cursor page of orders + one prefetch for all items and products, no COUNT"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("order-list"), {"pagination": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+
+        first = response.data["results"][0]
+        self.assertEqual(first["items_count"], len(first["items"]))
+        self.assertEqual(set(first["items"][0]["product_details"]), {"id", "name", "slug", "price"})
+
+    def test_cursor_pages_cover_history_once(self):
+        # Half the history placed in the same instant: the cursor must page through the tie by id
+        Order.objects.filter(pk__in=Order.objects.order_by("id").values("id")[:6]).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        history = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        seen, url = [], reverse("order-list") + "?pagination=cursor&page_size=5"
+        while url:
+            with CaptureQueriesContext(connection) as queries, self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertNotIn("OFFSET", queries[0]["sql"])
+            seen += [order["id"] for order in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(seen, history)
+
+        # …and back again
+        seen = []
+        while url := response.data["previous"]:
+            response = self.client.get(url)
+            seen = [order["id"] for order in response.data["results"]] + seen
+        self.assertEqual(seen, history[:len(seen)])
+        self.assertEqual(len(seen), 10)  # every page before the last
+
+    def test_page_number_is_the_default(self):
+        response = self.client.get(reverse("order-list"))
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(len(response.data["results"]), 12)
+
+    def test_retrieve_query_count(self):
+        order = Order.objects.filter(user=self.customer).first()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("order-detail", args=[order.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["items_count"], order.items.count())
+
+    def test_active_query_count(self):
+        """Queue + this page's items (no COUNT), and the kitchen queue in one grouped query the first time only"""
+        kitchen.reset()
+        with self.assertNumQueries(3):
+            self.client.get(reverse("order-active"))
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("order-active"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(
+            sorted(order["queue_position"] for order in response.data["results"]), list(range(1, 13))
+        )
+
+    def test_customer_history_query_count(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with self.assertNumQueries(2):
+            response = client.get(reverse("order-list"), {"pagination": "cursor"})
+        self.assertEqual(len(response.data["results"]), 6)
+
+    def test_create_response_uses_read_model(self):
+        """POST /orders/ answers with the compact read model in a single prefetch"""
+        product = Product.objects.first()
+        response = APIClient().post(reverse("order-list"), {
+            "customer_name": "Guest Gus",
+            "items": [{"product": product.pk, "quantity": 2}],
+        }, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["items_count"], 1)
+        self.assertEqual(response.data["items"][0]["product_details"]["slug"], product.slug)
+        self.assertEqual(response.data["total_amount"], "7.00")
+
+
+class ASGIStreamClient:
+    """Drives the real ASGI application for a long-lived streaming response"""
+
+    def __init__(self, app):
+        self.app = app
+        self._disconnected = asyncio.Event()
+        self._chunks = asyncio.Queue()
+        self._buffer = ""
+        self.status = None
+
+    async def open(self, path, headers=()):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "", "server": ("testserver", 80),
+            "client": ("127.0.0.1", 5555),
+            "headers": [(name.encode(), value.encode()) for name, value in headers],
+        }
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        self._task = asyncio.create_task(self.app(scope, self._receive, self._send))
+        message = await asyncio.wait_for(self._chunks.get(), 5)
+        self.status = message["status"]
+
+    async def _receive(self):
+        if not hasattr(self, "_body_sent"):
+            self._body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        await self._chunks.put(message)
+
+    async def next_event(self, timeout=5):
+        """(event type, decoded data) of the next non-comment SSE message"""
+        while True:
+            if "\n\n" in self._buffer:
+                block, self._buffer = self._buffer.split("\n\n", 1)
+                fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+                if "event" in fields:
+                    return fields["event"], json.loads(fields["data"])
+                continue
+            message = await asyncio.wait_for(self._chunks.get(), timeout)
+            self._buffer += message.get("body", b"").decode()
+
+    async def close(self):
+        self._disconnected.set()
+        try:
+            await asyncio.wait_for(self._task, 5)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+
+class OrderStreamTests(TestCase):
+    """GET /api/orders/stream/ — snapshot, then pushed events"""
+
+    def setUp(self):
+        drinks = Category.objects.create(name="Drinks")
+        self.product = Product.objects.create(name="Cortado", category=drinks, price=Decimal("4.00"))
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        self.existing = self._place_order()
+        self.auth = ("authorization", f"Bearer {RefreshToken.for_user(self.barista).access_token}")
+
+    def _place_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(reverse("order-list"), {
+                "customer_name": "Guest Gus",
+                "items": [{"product": self.product.pk}],
+            }, format="json")
+        return response.data
+
+    def _confirm(self, order_id):
+        client = APIClient()
+        client.force_authenticate(self.barista)
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.patch(reverse("order-update-status", args=[order_id]), {"status": "CONFIRMED"}, format="json")
+
+    async def test_snapshot_then_incremental_events(self):
+        stream = ASGIStreamClient(application)
+        await stream.open("/api/orders/stream/", [self.auth])
+        try:
+            self.assertEqual(stream.status, 200)
+
+            event_type, orders = await stream.next_event()
+            self.assertEqual(event_type, "snapshot")
+            self.assertEqual([o["order_number"] for o in orders], [self.existing["order_number"]])
+
+            created = await sync_to_async(self._place_order)()
+            event_type, order = await stream.next_event()
+            self.assertEqual(event_type, "order.created")
+            self.assertEqual(order["order_number"], created["order_number"])
+
+            await sync_to_async(self._confirm)(created["id"])
+            event_type, order = await stream.next_event()
+            self.assertEqual(event_type, "order.status_changed")
+            self.assertEqual((order["id"], order["status"]), (created["id"], "CONFIRMED"))
+            self.assertEqual(set(order), set(orders[0]))  # the snapshot's shape, ETA included
+            self.assertIsNotNone(order["queue_position"])
+            self.assertIsNotNone(order["estimated_ready_at"])
+        finally:
+            await stream.close()
+        self.assertEqual(get_broker()._subscribers, set())
+
+    async def test_requires_barista(self):
+        stream = ASGIStreamClient(application)
+        await stream.open("/api/orders/stream/")
+        await stream.close()
+        self.assertEqual(stream.status, 401)
+
+    def test_refused_under_wsgi(self):
+        """A never-ending stream would tie up a WSGI worker — point the client at /active/ instead"""
+        response = self.client.get("/api/orders/stream/", HTTP_AUTHORIZATION=self.auth[1])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("/api/orders/active/", response.json()["detail"])
+
+    def test_rolled_back_checkout_publishes_nothing(self):
+        """Events go out on commit only"""
+        published = []
+        with mock.patch.object(get_broker(), "publish", published.append):
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        publish_on_commit(ORDER_CREATED, {"id": 1})
+                        raise RuntimeError("card declined")
+                except RuntimeError:
+                    pass
+        self.assertEqual(published, [])
+
+
+class MerchStockCheckoutTests(TestCase):
+    """Checkout takes merch stock, cancelling gives it back"""
+
+    def setUp(self):
+        self.mug = Product.objects.create(name="Savannah Mug", price=Decimal("15.00"), is_merch=True, stock_count=2)
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+
+    def _checkout(self, quantity):
+        return APIClient().post(reverse("order-list"), {
+            "customer_name": "Guest Gus",
+            "items": [{"product": self.mug.pk, "quantity": quantity}],
+        }, format="json")
+
+    def test_checkout_reserves_and_cancel_releases(self):
+        response = self._checkout(2)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.stock_count, 0)
+
+        sold_out = self._checkout(1)
+        self.assertEqual(sold_out.status_code, status.HTTP_400_BAD_REQUEST)
+
+        client = APIClient()
+        client.force_authenticate(self.barista)
+        cancel = client.patch(
+            reverse("order-update-status", args=[response.data["id"]]), {"status": "CANCELLED"}, format="json"
+        )
+        self.assertEqual(cancel.status_code, status.HTTP_200_OK)
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.stock_count, 2)
+
+    def test_more_than_in_stock_rejected_without_writes(self):
+        response = self._checkout(3)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.stock_count, 2)
+
+
+class ConcurrentStatusChangeTests(TransactionTestCase):
+    """Racing PATCHes to the same order apply the transition — and its side effects — once"""
+
+    THREADS = 8
+
+    def setUp(self):
+        self.mug = Product.objects.create(name="Savannah Mug", price=Decimal("15.00"), is_merch=True, stock_count=5)
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+
+    def _race(self, order_id, new_status):
+        barrier = threading.Barrier(self.THREADS)
+        codes, errors = [], []
+
+        def barista():
+            try:
+                client = APIClient()
+                client.force_authenticate(self.barista)
+                barrier.wait()
+                response = client.patch(
+                    reverse("order-update-status", args=[order_id]), {"status": new_status}, format="json"
+                )
+                codes.append(response.status_code)
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=barista) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return sorted(codes)
+
+    def test_concurrent_cancels_release_stock_and_slot_once(self):
+        response = APIClient().post(reverse("order-list"), {
+            "customer_name": "Guest Gus",
+            "items": [{"product": self.mug.pk, "quantity": 2}],
+            "requested_pickup_time": (timezone.now() + timedelta(hours=2)).isoformat(),
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=response.data["id"])
+        slot = PickupSlot.objects.get(pk=order.pickup_slot_id)
+        self.assertGreater(slot.booked_minutes, 0)
+
+        codes = self._race(order.pk, "CANCELLED")
+
+        self.assertEqual(codes, [200] + [400] * (self.THREADS - 1))
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.stock_count, 5)
+        slot.refresh_from_db()
+        self.assertEqual(slot.booked_minutes, 0)
+
+    def test_concurrent_completions_award_points_once(self):
+        latte = Product.objects.create(name="Latte", price=Decimal("5.00"))
+        customer = User.objects.create_user(email="kahawa@coffeehouse.com", password="pass12345", full_name="Kahawa Fan")
+        order = Order.objects.create(user=customer, status="READY", total_amount=Decimal("10.00"))
+        OrderItem.objects.bulk_create([OrderItem(order=order, product=latte, quantity=2, unit_price=latte.price)])
+
+        codes = self._race(order.pk, "COMPLETED")
+
+        self.assertEqual(codes, [200] + [400] * (self.THREADS - 1))
+        customer.refresh_from_db()
+        self.assertEqual(customer.loyalty_points, 2)
+        self.assertEqual(LoyaltyEntry.objects.filter(order=order, reason=LoyaltyEntry.EARNED).count(), 1)
+
+
+class IdempotentCheckoutTests(TestCase):
+    """Retried POST /orders/ with the same Idempotency-Key places one order"""
+
+    def setUp(self):
+        self.product = Product.objects.create(name="Flat White", price=Decimal("4.50"))
+        self.client = APIClient()
+        self.payload = {"customer_name": "Guest Gus", "items": [{"product": self.product.pk}]}
+
+    def _post(self, key, payload=None):
+        return self.client.post(
+            reverse("order-list"), payload or self.payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_stored_response(self):
+        first = self._post("checkout-123")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as ctx:
+            retry = self._post("checkout-123")
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertFalse(any("orders_order" in q["sql"] for q in ctx.captured_queries))
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(OrderCounter.objects.get().last_sequence, 1)  # no burnt sequence
+
+    def test_in_flight_duplicate_gets_conflict(self):
+        IdempotencyKey.objects.create(key="checkout-456", fingerprint=self._fingerprint())
+        self.assertEqual(self._post("checkout-456").status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Order.objects.exists())
+
+    def test_abandoned_claim_is_taken_over(self):
+        IdempotencyKey.objects.create(
+            key="checkout-789", fingerprint=self._fingerprint(), created_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(self._post("checkout-789").status_code, status.HTTP_201_CREATED)
+
+    def test_key_reused_with_other_payload(self):
+        self._post("checkout-abc")
+        other = {"customer_name": "Someone Else", "items": [{"product": self.product.pk, "quantity": 3}]}
+        self.assertEqual(self._post("checkout-abc", other).status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_checkout_frees_key(self):
+        bad = {"customer_name": "Guest Gus", "items": []}
+        self.assertEqual(self._post("checkout-def", bad).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.filter(key="checkout-def").exists())
+
+    def _fingerprint(self):
+        request = mock.Mock(data=self.payload, user=mock.Mock(is_authenticated=False))
+        return idempotency.fingerprint(request)
+
+
+class CustomizationSchemaTests(TestCase):
+    """Customizations are validated and stored canonically at checkout"""
+
+    def setUp(self):
+        self.product = Product.objects.create(name="Latte", price=Decimal("4.50"))
+
+    def _serializer(self, customizations):
+        return OrderCreateSerializer(data={
+            "customer_name": "Guest Gus",
+            "items": [{"product": self.product.pk, "customizations": customizations}],
+        })
+
+    def test_stored_in_canonical_form(self):
+        serializer = self._serializer({"Shots": "2", "size": "Large", "decaf": False, "milk": "OAT"})
+        serializer.is_valid(raise_exception=True)
+        item = serializer.save().items.get()
+
+        self.assertEqual(item.customizations, {"size": "large", "milk": "oat", "shots": 2})
+        self.assertEqual(item.get_customization_display(), "L, Oat, 2 shots")
+
+    def test_bad_customizations_rejected(self):
+        for customizations in ({"sugar": 3}, {"size": "venti"}, {"shots": 2.5}, {"decaf": "yes"}, ["oat"]):
+            with self.subTest(customizations=customizations):
+                serializer = self._serializer(customizations)
+                self.assertFalse(serializer.is_valid())
+                self.assertIn("items", serializer.errors)
+
+    def test_display_of_legacy_rows(self):
+        """Rows saved before the schema still render, they're never re-validated"""
+        item = OrderItem(customizations={"shots": 1, "milk": "oat", "sprinkles": ["x"], "decaf": True})
+        self.assertEqual(item.get_customization_display(), "Oat, 1 shot, Decaf")
+        self.assertEqual(OrderItem(customizations={}).get_customization_display(), "Standard")
+        self.assertEqual(OrderItem(customizations={"shots": [1]}).get_customization_display(), "Custom")
+
+    def test_option_must_clean_and_render(self):
+        class Half(Option):
+            def clean(self, value):
+                return value
+
+        with self.assertRaises(TypeError):
+            Half()
+
+
+class KitchenScheduleTests(TestCase):
+    """ETAs from prep times over parallel stations, updated incrementally"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.schedule = KitchenSchedule(stations=2)
+
+    def _ticket(self, order_id, prep, status="PENDING", due_in=0, started_ago=None):
+        return Ticket(
+            order_id=order_id,
+            status=status,
+            due=self.now + timedelta(minutes=due_in),
+            prep=timedelta(minutes=prep),
+            started_at=self.now - timedelta(minutes=started_ago) if started_ago is not None else None,
+        )
+
+    def _ready_in(self):
+        return {
+            pk: (estimate.position, (estimate.ready_at - self.now) / timedelta(minutes=1))
+            for pk, estimate in self.schedule.estimates(now=self.now).items()
+        }
+
+    def test_orders_share_stations_by_due_time(self):
+        self.schedule.load([
+            self._ticket(1, prep=6, status="PREPARING", started_ago=2),   # 4 min left on station A
+            self._ticket(2, prep=3, due_in=-5),                           # ASAP, placed first → station B
+            self._ticket(3, prep=5, due_in=-1),                           # station B again, free at +3
+            self._ticket(4, prep=2, due_in=60),                           # wanted in an hour → just in time
+        ])
+        self.assertEqual(self._ready_in(), {1: (0, 4), 2: (1, 3), 3: (2, 8), 4: (3, 60)})
+
+    def test_incremental_updates(self):
+        self.schedule.load([self._ticket(1, prep=4, due_in=-3), self._ticket(2, prep=4, due_in=-2)])
+        self.assertEqual(self._ready_in(), {1: (1, 4), 2: (2, 4)})
+
+        self.schedule.upsert(self._ticket(3, prep=2, due_in=-1))         # new order queues behind
+        self.assertEqual(self._ready_in()[3], (3, 6))
+
+        self.schedule.upsert(self._ticket(1, prep=4, status="PREPARING", started_ago=0))
+        self.schedule.upsert(self._ticket(2, prep=4, status="READY"))    # done → leaves the queue
+        self.assertEqual(self._ready_in(), {1: (0, 4), 3: (1, 2)})
+
+    def test_quote_lands_behind_queue(self):
+        self.schedule.load([self._ticket(pk, prep=5, due_in=-pk) for pk in range(1, 5)])
+        quote = self.schedule.quote(timedelta(minutes=3), now=self.now)
+        self.assertEqual(quote.position, 5)
+        self.assertEqual(quote.ready_at, self.now + timedelta(minutes=13))
+        self.assertEqual(len(self.schedule), 4)  # quoting doesn't queue anything
+
+
+class KitchenEtaApiTests(TestCase):
+    def setUp(self):
+        kitchen.reset()
+        self.latte = Product.objects.create(name="Latte", price=Decimal("4.50"), prep_time_minutes=4)
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+
+    def _checkout(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(reverse("order-list"), {
+                "customer_name": "Guest Gus", "items": [{"product": self.latte.pk, "quantity": quantity}],
+            }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    @override_settings(KITCHEN_STATIONS=1)
+    def test_checkout_quotes_behind_queue(self):
+        first = self._checkout(2)   # 8 min
+        second = self._checkout(1)  # waits for the first
+        self.assertEqual(first["queue_position"], 1)
+        self.assertEqual(second["queue_position"], 2)
+        ready = [datetime.fromisoformat(data["estimated_ready_at"]) for data in (first, second)]
+        self.assertAlmostEqual((ready[1] - ready[0]) / timedelta(minutes=1), 4, delta=0.1)
+
+        client = APIClient()
+        client.force_authenticate(self.barista)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(reverse("order-update-status", args=[first["id"]]), {"status": "CONFIRMED"}, format="json")
+        active = client.get(reverse("order-active")).data["results"]
+        self.assertEqual({o["id"]: o["queue_position"] for o in active}, {first["id"]: 1, second["id"]: 2})
+
+
+@override_settings(PICKUP_SLOT_MINUTES=15, PICKUP_SLOT_CAPACITY=10)
+class PickupSlotCapacityTests(TestCase):
+    """Scheduled pickups book prep minutes in their slot; full slots point elsewhere"""
+
+    def setUp(self):
+        self.latte = Product.objects.create(name="Latte", price=Decimal("4.50"), prep_time_minutes=4)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.eight = timezone.make_aware(datetime.combine(tomorrow, datetime.min.time())) + timedelta(hours=8)
+        self.client = APIClient()
+
+    def _checkout(self, quantity, pickup):
+        return self.client.post(reverse("order-list"), {
+            "customer_name": "Guest Gus",
+            "requested_pickup_time": pickup.isoformat(),
+            "items": [{"product": self.latte.pk, "quantity": quantity}],
+        }, format="json")
+
+    def _slot(self, start):
+        return PickupSlot.objects.get(start=start)
+
+    def test_full_slot_offers_next_available(self):
+        self.assertEqual(self._checkout(2, self.eight + timedelta(minutes=5)).status_code, status.HTTP_201_CREATED)
+        response = self._checkout(1, self.eight + timedelta(minutes=10))  # 8 + 4 > 10
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("requested_pickup_time", response.data)
+        self.assertEqual(
+            [datetime.fromisoformat(start) for start in response.data["next_available_slots"]],
+            [self.eight + timedelta(minutes=m) for m in (15, 30, 45)],
+        )
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self._slot(self.eight).booked_minutes, 8)
+
+    def test_oversized_order_gets_an_empty_slot(self):
+        self.assertEqual(self._checkout(5, self.eight).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._checkout(1, self.eight).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cancel_gives_minutes_back(self):
+        order_id = self._checkout(2, self.eight).data["id"]
+        barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        self.client.force_authenticate(barista)
+        self.client.patch(reverse("order-update-status", args=[order_id]), {"status": "CANCELLED"}, format="json")
+        self.assertEqual(self._slot(self.eight).booked_minutes, 0)
+
+    def test_availability_from_counters(self):
+        self._checkout(2, self.eight)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("order-slots"), {"date": self.eight.date().isoformat(), "minutes": 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = {datetime.fromisoformat(str(slot["start"])): slot for slot in response.data["slots"]}
+        self.assertEqual(slots[self.eight]["available_minutes"], 2)
+        self.assertFalse(slots[self.eight]["fits"])
+        self.assertTrue(slots[self.eight + timedelta(minutes=15)]["fits"])
+
+
+class OrderStatusEventTests(TestCase):
+    """Every status change is logged with the time spent in the previous status"""
+
+    def setUp(self):
+        self.latte = Product.objects.create(name="Latte", price=Decimal("4.50"))
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.barista)
+
+    def _order(self, created_ago=0):
+        serializer = OrderCreateSerializer(data={"customer_name": "Guest", "items": [{"product": self.latte.pk}]})
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(seconds=created_ago))
+        return order
+
+    def _move(self, order, new_status):
+        return self.client.patch(reverse("order-update-status", args=[order.pk]), {"status": new_status}, format="json")
+
+    def test_transitions_logged_with_durations(self):
+        order = self._order(created_ago=120)
+        self._move(order, "CONFIRMED")
+        OrderStatusEvent.objects.filter(order=order).update(at=timezone.now() - timedelta(seconds=45))
+        self._move(order, "PREPARING")
+
+        events = list(order.status_events.values_list("from_status", "to_status", "duration_seconds", "changed_by"))
+        self.assertEqual([e[:2] for e in events], [("PENDING", "CONFIRMED"), ("CONFIRMED", "PREPARING")])
+        self.assertAlmostEqual(events[0][2], 120, delta=2)
+        self.assertAlmostEqual(events[1][2], 45, delta=2)
+        self.assertEqual(events[1][3], self.barista.pk)
+
+    def test_rejected_transition_not_logged(self):
+        order = self._order()
+        self.assertEqual(self._move(order, "READY").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OrderStatusEvent.objects.exists())
+
+    def test_rollup_percentiles(self):
+        order = self._order()
+        at = timezone.localtime().replace(minute=30, second=0, microsecond=0) - timedelta(hours=1)
+        OrderStatusEvent.objects.bulk_create([
+            OrderStatusEvent(order=order, from_status="CONFIRMED", to_status="PREPARING", at=at, duration_seconds=s)
+            for s in range(10, 110, 10)  # 10..100
+        ])
+
+        call_command("rollup_status_events", stdout=io.StringIO())
+        call_command("rollup_status_events", stdout=io.StringIO())  # re-run upserts, no duplicates
+
+        hour = StatusTransitionStats.objects.get(granularity="hour")
+        self.assertEqual(hour.bucket, at.replace(minute=0))
+        self.assertEqual((hour.count, hour.p50_seconds, hour.max_seconds), (10, 55.0, 100))
+        self.assertAlmostEqual(hour.p90_seconds, 91.0)
+        self.assertEqual(StatusTransitionStats.objects.get(granularity="day").count, 10)
+
+
+class LoyaltyLedgerTests(TestCase):
+    """Points are earned on pickup and spent at checkout, through the ledger"""
+
+    def setUp(self):
+        self.latte = Product.objects.create(name="Latte", price=Decimal("5.00"))
+        self.cookie = Product.objects.create(name="Cookie", price=Decimal("2.50"))
+        self.mug = Product.objects.create(name="Mug", price=Decimal("15.00"), is_merch=True, stock_count=10)
+        self.customer = User.objects.create_user(email="kahawa@coffeehouse.com", password="pass12345", full_name="Kahawa Fan")
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+
+    def _checkout(self, items, login=None, **extra):
+        client = APIClient()
+        if login is not None:
+            client.force_authenticate(login)
+        return client.post(reverse("order-list"), {
+            "customer_name": "Guest Gus",
+            "items": [{"product": product.pk, "quantity": quantity} for product, quantity in items],
+            **extra,
+        }, format="json")
+
+    def _move(self, order_id, *statuses):
+        client = APIClient()
+        client.force_authenticate(self.barista)
+        for new_status in statuses:
+            response = client.patch(reverse("order-update-status", args=[order_id]), {"status": new_status}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_points_awarded_once_on_completion(self):
+        order = self._checkout([(self.latte, 2), (self.cookie, 1), (self.mug, 1)], login=self.customer).data
+        self._move(order["id"], "CONFIRMED", "PREPARING", "READY")
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.loyalty_points, 0)
+
+        self._move(order["id"], "COMPLETED")
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.loyalty_points, 3)  # the mug doesn't count
+        self.assertEqual(
+            list(LoyaltyEntry.objects.values_list("order_id", "points", "reason")), [(order["id"], 3, "earned")]
+        )
+
+    def test_completing_twice_is_rejected_not_awarded_twice(self):
+        order = self._checkout([(self.latte, 2)], login=self.customer).data
+        self._move(order["id"], "CONFIRMED", "PREPARING", "READY", "COMPLETED")
+
+        client = APIClient()
+        client.force_authenticate(self.barista)
+        again = client.patch(reverse("order-update-status", args=[order["id"]]), {"status": "COMPLETED"}, format="json")
+        self.assertEqual(again.status_code, status.HTTP_400_BAD_REQUEST)
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.loyalty_points, 2)
+        self.assertEqual(LoyaltyEntry.objects.filter(order_id=order["id"]).count(), 1)
+
+    def test_guests_earn_nothing(self):
+        order = self._checkout([(self.latte, 1)]).data
+        self._move(order["id"], "CONFIRMED", "PREPARING", "READY", "COMPLETED")
+        self.assertFalse(LoyaltyEntry.objects.exists())
+
+    def test_redeem_takes_cheapest_item_off_and_cancel_refunds(self):
+        self.customer.award_loyalty_points(12)
+        response = self._checkout([(self.latte, 1), (self.cookie, 2), (self.mug, 1)], login=self.customer, redeem_reward=True)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["discount_amount"], "2.50")
+        self.assertEqual(response.data["total_amount"], "22.50")  # 5 + 2×2.50 + 15 − 2.50
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.loyalty_points, 2)
+
+        self.assertEqual(Order.objects.get(pk=response.data["id"]).calculate_total(), Decimal("22.50"))
+
+        self._move(response.data["id"], "CANCELLED")
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.loyalty_points, 12)
+        self.assertEqual(
+            list(LoyaltyEntry.objects.order_by("id").values_list("points", "reason")),
+            [(12, "adjusted"), (-10, "redeemed"), (10, "refunded")],
+        )
+
+    def test_redeem_rejected_without_writes(self):
+        self.customer.award_loyalty_points(9)
+        attempts = (
+            ([(self.latte, 1)], {"login": self.customer}),   # 9 points
+            ([(self.latte, 1)], {"user": self.customer.pk}),  # guest naming someone else's account
+        )
+        for items, who in attempts:
+            response = self._checkout(items, redeem_reward=True, **who)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("redeem_reward", response.data)
+        self.customer.award_loyalty_points(1)
+        response = self._checkout([(self.mug, 1)], login=self.customer, redeem_reward=True)  # nothing to make free
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.loyalty_points, 10)
+
+    def test_lost_race_for_points_rolls_checkout_back(self):
+        self.customer.award_loyalty_points(10)
+        User.objects.filter(pk=self.customer.pk).update(loyalty_points=0)  # spent by a parallel checkout
+        response = self._checkout([(self.latte, 1)], login=self.customer, redeem_reward=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self.customer.award_loyalty_points(5)
+        call_command("reconcile_loyalty", stdout=io.StringIO())
+
+        User.objects.filter(pk=self.customer.pk).update(loyalty_points=50)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(mismatched_balances()), [(self.customer.pk, self.customer.email, 50, 5)])
+        with self.assertRaises(CommandError):
+            call_command("reconcile_loyalty", stdout=io.StringIO())
+
+        call_command("reconcile_loyalty", "--fix", stdout=io.StringIO())
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.loyalty_points, 5)
+
+
+class LoyaltyConcurrencyTests(TransactionTestCase):
+    """Concurrent accruals and redemptions neither lose points nor overspend"""
+
+    THREADS = 8
+
+    def test_balance_matches_ledger_under_contention(self):
+        customer = User.objects.create_user(email="kahawa@coffeehouse.com", password="pass12345", full_name="Kahawa Fan")
+        barrier = threading.Barrier(self.THREADS)
+        errors, spent = [], []
+
+        def worker(n):
+            try:
+                barrier.wait()
+                for _ in range(10):
+                    with transaction.atomic():
+                        post_points(customer.pk, 1, LoyaltyEntry.EARNED)
+                    try:
+                        with transaction.atomic():
+                            post_points(customer.pk, -10, LoyaltyEntry.REDEEMED)
+                        spent.append(n)
+                    except NotEnoughPoints:
+                        pass
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        customer.refresh_from_db()
+        self.assertEqual(customer.loyalty_points, self.THREADS * 10 - 10 * len(spent))
+        self.assertEqual(list(mismatched_balances()), [])
+
+
+@skipUnless("replica" in settings.DATABASES, "needs the 'replica' alias from coffe_house.test_settings")
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReadReplicaRoutingTests(TestCase):
+    """
+    'replica' is a second connection to the test database. It can't see this
+    test's uncommitted rows — which is exactly what a lagging replica looks like.
+    """
+    databases = {"default", "replica"} & settings.DATABASES.keys()  # just "default" when skipped
+
+    def setUp(self):
+        menu_cache().clear()
+        self.latte = Product.objects.create(name="Latte", price=Decimal("5.00"))
+        self.customer = User.objects.create_user(email="kahawa@coffeehouse.com", password="pass12345", full_name="Kahawa Fan")
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+
+    def _get(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(primary), len(replica)
+
+    def test_router_sends_writes_and_migrations_to_the_primary(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Order))
+        with use_replica() as alias:
+            self.assertEqual(alias, "replica")
+            self.assertEqual(router.db_for_read(Order), "replica")
+            self.assertEqual(router.db_for_write(Order), "default")
+        self.assertIsNone(router.db_for_read(Order))
+        self.assertFalse(router.allow_migrate("replica", "orders"))
+
+    def test_history_menu_and_reports_read_from_the_replica(self):
+        for url in (reverse("order-list"), reverse("product-list"), reverse("category-list")):
+            with self.subTest(url=url):
+                _, on_primary, on_replica = self._get(self.customer, url)
+                self.assertEqual(on_primary, 0)
+                self.assertGreater(on_replica, 0)
+
+        manager = User.objects.create_user(
+            email="manager@coffeehouse.com", password="pass12345", full_name="Man Ager", role="manager"
+        )
+        _, on_primary, on_replica = self._get(manager, reverse("report-sales"))
+        self.assertEqual((on_primary, on_replica), (0, 1))
+
+    def test_barista_queue_stays_on_the_primary(self):
+        _, on_primary, on_replica = self._get(self.barista, reverse("order-active"))
+        self.assertGreater(on_primary, 0)
+        self.assertEqual(on_replica, 0)
+
+    def test_own_checkout_is_read_back_from_the_primary(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        response = client.post(reverse("order-list"), {"items": [{"product": self.latte.pk}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(pinned_to_primary(self.customer))
+
+        history, _, on_replica = self._get(self.customer, reverse("order-list"))
+        self.assertEqual(on_replica, 0)
+        self.assertEqual([o["order_number"] for o in history.data["results"]], [response.data["order_number"]])
+        detail, _, on_replica = self._get(self.customer, reverse("order-detail", args=[response.data["id"]]))
+        self.assertEqual(on_replica, 0)
+
+        # Other customers aren't pinned — and their replica hasn't caught up yet
+        stranger = User.objects.create_user(email="stranger@coffeehouse.com", password="pass12345", full_name="Stranger")
+        self.assertFalse(pinned_to_primary(stranger))
+        _, _, on_replica = self._get(stranger, reverse("order-list"))
+        self.assertGreater(on_replica, 0)
+
+        # Once the lag window is over, the customer reads from the replica again
+        menu_cache().clear()
+        history, _, on_replica = self._get(self.customer, reverse("order-list"))
+        self.assertGreater(on_replica, 0)
+        self.assertEqual(history.data["results"], [])
+
+    def test_failed_write_does_not_pin(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        response = client.post(reverse("order-list"), {"items": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(pinned_to_primary(self.customer))
+
+
+class OrderArchiveTests(TestCase):
+    """Finished orders move to the archive in batches; history reads cover both"""
+
+    def setUp(self):
+        self.latte = Product.objects.create(name="Latte", price=Decimal("5.00"))
+        self.customer = User.objects.create_user(email="kahawa@coffeehouse.com", password="pass12345", full_name="Kahawa Fan")
+        long_ago = timezone.now() - timedelta(days=120)
+        self.orders = {}
+        for name, order_status, placed in (
+            ("old_completed", "COMPLETED", long_ago),
+            ("old_cancelled", "CANCELLED", long_ago + timedelta(minutes=1)),
+            ("old_completed_2", "COMPLETED", long_ago + timedelta(minutes=2)),
+            ("old_pending", "PENDING", long_ago + timedelta(minutes=3)),  # never finished — stays live
+            ("recent", "COMPLETED", timezone.now() - timedelta(days=1)),
+        ):
+            serializer = OrderCreateSerializer(data={"user": self.customer.pk, "items": [{"product": self.latte.pk, "quantity": 2}]})
+            serializer.is_valid(raise_exception=True)
+            order = serializer.save()
+            Order.objects.filter(pk=order.pk).update(status=order_status, created_at=placed)
+            self.orders[name] = order
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def _archive(self, **options):
+        out = io.StringIO()
+        call_command("archive_orders", stdout=out, **options)
+        return out.getvalue()
+
+    def test_moves_finished_orders_in_batches(self):
+        with mock.patch.object(archive, "archive_batch", wraps=archive.archive_batch) as batch:
+            self.assertIn("Archived 3 orders.", self._archive(days=90, batch_size=2))
+        self.assertEqual(batch.call_count, 3)  # 2 + 1 + the empty one that ends the run
+
+        self.assertEqual(
+            set(Order.objects.values_list("pk", flat=True)),
+            {self.orders["old_pending"].pk, self.orders["recent"].pk},
+        )
+        archived = ArchivedOrder.objects.get(pk=self.orders["old_completed"].pk)
+        self.assertEqual(archived.order_number, self.orders["old_completed"].order_number)
+        self.assertEqual(archived.total_amount, Decimal("10.00"))
+        self.assertEqual(list(archived.items.values_list("product_id", "quantity")), [(self.latte.pk, 2)])
+        self.assertIsNotNone(archived.archived_at)
+        self.assertFalse(OrderItem.objects.filter(order_id=archived.pk).exists())
+
+        self.assertIn("Archived 0 orders.", self._archive(days=90))
+
+    def test_history_and_receipts_span_live_and_archive(self):
+        self._archive(days=90)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("order-list"), {"pagination": "cursor"})
+        self.assertEqual(
+            [order["id"] for order in response.data["results"]],
+            [self.orders[n].pk for n in ("recent", "old_pending", "old_completed_2", "old_cancelled", "old_completed")],
+        )
+
+        archived = self.orders["old_cancelled"]
+        for key in (archived.order_number, archived.pk):
+            with self.subTest(lookup=key):
+                response = self.client.get(reverse("order-detail", args=[key]))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["status"], "CANCELLED")
+                self.assertEqual(response.data["items"][0]["subtotal"], Decimal("10.00"))
+
+    def test_status_events_and_loyalty_links_move_with_the_order(self):
+        order = self.orders["old_completed"]
+        placed = Order.objects.get(pk=order.pk).created_at
+        for from_status, to_status, minute in (("PENDING", "PREPARING", 1), ("PREPARING", "COMPLETED", 4)):
+            OrderStatusEvent.objects.create(
+                order=order, from_status=from_status, to_status=to_status,
+                at=placed + timedelta(minutes=minute), duration_seconds=60 * minute,
+            )
+        post_points(self.customer.pk, 10, LoyaltyEntry.EARNED, order=order)
+        window = (placed - timedelta(days=1), placed + timedelta(days=1))
+        rollup_status_events(*window)
+
+        def stats():
+            return sorted(StatusTransitionStats.objects.values_list("granularity", "from_status", "count", "max_seconds"))
+
+        before = stats()
+
+        self._archive(days=90)
+
+        self.assertFalse(OrderStatusEvent.objects.filter(order_id=order.pk).exists())
+        self.assertEqual(
+            list(ArchivedOrderStatusEvent.objects.filter(order_id=order.pk).values_list("to_status", "duration_seconds")),
+            [("PREPARING", 60), ("COMPLETED", 240)],
+        )
+        entry = LoyaltyEntry.objects.get(reason=LoyaltyEntry.EARNED)
+        self.assertEqual((entry.order_id, entry.archived_order_id), (None, order.pk))
+
+        StatusTransitionStats.objects.all().delete()
+        rollup_status_events(*window)  # rebuilt from the archive
+        self.assertEqual(stats(), before)
+
+    def test_archived_orders_are_read_only(self):
+        self._archive(days=90)
+        barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        self.client.force_authenticate(barista)
+        response = self.client.patch(
+            reverse("order-update-status", args=[self.orders["old_completed"].order_number]), {"status": "READY"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ActiveQueuePlanTests(TestCase):
+    """The barista queue reads the active-queue partial index, in order — no sort"""
+
+    def setUp(self):
+        self.latte = Product.objects.create(name="Latte", price=Decimal("5.00"))
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.barista)
+        # History the queue must not wade through
+        Order.objects.bulk_create(
+            Order(order_number=f"20250101-{n:04d}", customer_name="Guest", status="COMPLETED") for n in range(300)
+        )
+
+    def _order(self, order_status, pickup_in=None):
+        order = Order.objects.create(customer_name="Guest", status=order_status)
+        if pickup_in is not None:
+            order.requested_pickup_time = timezone.now() + timedelta(minutes=pickup_in)
+            order.save(update_fields=["requested_pickup_time"])
+        return order.pk
+
+    def test_on_time_first_then_late_each_in_pickup_order(self):
+        late_later = self._order("READY", pickup_in=-5)
+        walk_in = self._order("PENDING")
+        soon = self._order("CONFIRMED", pickup_in=10)
+        overdue_but_unstarted = self._order("PENDING", pickup_in=-20)  # not late until it's being made
+        late_first = self._order("PREPARING", pickup_in=-15)
+        later = self._order("PREPARING", pickup_in=30)
+
+        response = self.client.get(reverse("order-active"))
+        self.assertEqual(
+            [order["id"] for order in response.data["results"]],
+            [overdue_but_unstarted, soon, later, walk_in, late_first, late_later],
+        )
+
+    def test_queue_query_uses_partial_index(self):
+        self._order("PENDING", pickup_in=10)
+        self._order("READY", pickup_in=-5)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("order-active"))
+        [queue_sql] = [q["sql"] for q in queries if 'ORDER BY "orders_order"."requested_pickup_time"' in q["sql"]]
+        self.assertNotIn('"orders_order"."slot_minutes"', queue_sql)  # only what the dashboard renders
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Tables this small would just be read whole (or bitmap-scanned and sorted) — rule that out
+            cursor.execute("SET LOCAL enable_seqscan = off; SET LOCAL enable_bitmapscan = off")
+            cursor.execute(f"EXPLAIN {queue_sql}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn("orders_active_queue_idx", plan)
+        self.assertNotIn("Sort", plan)
@@ -1,7 +1,7 @@
 # orders/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OrderViewSet
+from .views import OrderViewSet, active_orders_stream
 
 # ────────────────────── ROUTER ────────────────────── #
 router = DefaultRouter()
@@ -9,6 +9,9 @@ router.register(r'', OrderViewSet, basename='order')  # → /api/orders/
 
 # ────────────────────── URL PATTERNS ────────────────────── #
 urlpatterns = [
+    # Live barista dashboard (Server-Sent Events, ASGI) — before the router's detail route
+    path('stream/', active_orders_stream, name='order-stream'),
+
     # Main order endpoints
     path('', include(router.urls)),
 
@@ -17,6 +20,7 @@ urlpatterns = [
     # GET    /api/orders/{number}/         → retrieve
     # PATCH  /api/orders/{number}/status/  → update_status (custom action)
     # GET    /api/orders/active/           → active (custom action)
+    # GET    /api/orders/slots/            → slots (custom action)
 ]
 
 # Final URLs your café will have:
@@ -24,4 +28,6 @@ urlpatterns = [
 # GET    /api/orders/                     → your history
 # GET    /api/orders/20251117-0001/       → receipt
 # PATCH  /api/orders/20251117-0001/status/ → barista changes status
-# GET    /api/orders/active/              → barista iPad dashboard
\ No newline at end of file
+# GET    /api/orders/active/              → barista iPad dashboard
+# GET    /api/orders/slots/               → pickup slots with room left
+# GET    /api/orders/stream/              → live dashboard push (snapshot + events)
\ No newline at end of file
@@ -1,28 +1,55 @@
 # orders/views.py
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from asgiref.sync import sync_to_async
+from datetime import date, datetime, time, timedelta
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from django.db.models import Case, When, BooleanField, Q
+from django.db.models import prefetch_related_objects
 from  rest_framework import permissions
-from .models import Order
+from coffe_house.replicas import ReplicaReadMixin
+from . import idempotency
+from .events import ORDER_CREATED, ORDER_STATUS_CHANGED, SNAPSHOT, get_broker, make_event, publish_on_commit
+from .models import ACTIVE_STATUSES, Order, OrderHistory, OrderHistoryItem, OrderStatusEvent
+from .pagination import OrderCursorPagination
+from .scheduling import kitchen, schedule_on_commit
+from .slots import availability, fits, release_slot
+from products.inventory import merch_quantities, release_stock
+from users.loyalty import award_order, refund_order
 from .serializers import (
+    ActiveOrderSerializer,
     OrderCreateSerializer,
     OrderListRetrieveSerializer,
     OrderStatusUpdateSerializer,
 )
 
 
+LATE_STATUSES = ('PREPARING', 'READY')  # past the pickup time and still not handed over
+# What the dashboard renders (ActiveOrderSerializer) — not the slot bookkeeping
+ACTIVE_QUEUE_FIELDS = (
+    'id', 'order_number', 'user_id', 'total_amount', 'discount_amount', 'points_redeemed', 'status',
+    'is_paid', 'requested_pickup_time', 'notes', 'customer_name', 'created_at', 'updated_at',
+)
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_RETRY_MS = 3000
+
+
 # ────────────────────── PERMISSIONS ────────────────────── #
 class IsOwnerOrStaff(permissions.BasePermission):
     """Customer sees own orders, staff sees all, guests see nothing"""
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff or request.user.is_manager or request.user.is_owner:
             return True
-        return obj.user == request.user or obj.user is None
+        return obj.user_id == request.user.pk or obj.user_id is None
 
 
 class IsBaristaOrBetter(permissions.BasePermission):
@@ -35,12 +62,18 @@ class IsBaristaOrBetter(permissions.BasePermission):
 
 
 # ────────────────────── MAIN VIEWSET ────────────────────── #
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.select_related('user').prefetch_related('items__product')
+class OrderViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    # Order history from a replica; the barista queue and slot counters need the primary.
+    # A customer's own checkout pins them to the primary, so it shows up in their history
+    replica_actions = ('list', 'retrieve')
+    queryset = Order.objects.prefetch_related(OrderListRetrieveSerializer.items_prefetch())
+    # Receipts and history also cover archived orders — read through the live + archive view
+    history_queryset = OrderHistory.objects.prefetch_related(OrderListRetrieveSerializer.items_prefetch(OrderHistoryItem))
+    history_actions = ('list', 'retrieve')
     ordering = ['-created_at']
 
     def get_permissions(self):
-        if self.action == 'create':
+        if self.action in ['create', 'slots']:
             return [AllowAny()]
         if self.action in ['list', 'retrieve', 'active']:
             return [IsAuthenticated(), IsOwnerOrStaff()]
@@ -55,17 +88,69 @@ class OrderViewSet(viewsets.ModelViewSet):
             return OrderStatusUpdateSerializer
         return OrderListRetrieveSerializer
 
+    @property
+    def paginator(self):
+        """
+        History (list) pages by number, with a count, unless the client asks for
+        cursor pages: `?pagination=cursor` on the first request, then the
+        `?cursor=` in each `next`/`previous` link. The active queue is always
+        page-number: it is small and ordered by lateness.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if self.action == 'list' and (
+                params.get('pagination') == 'cursor' or OrderCursorPagination.cursor_query_param in params
+            ):
+                self._paginator = OrderCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = self.history_queryset.all() if self.action in self.history_actions else super().get_queryset()
+        if self.action == 'update_status':
+            # Lock the row before the transition is validated: a second PATCH waits,
+            # then sees the new status — stock, slot and points are settled once
+            qs = qs.select_for_update(of=('self',))
         if self.request.user.is_staff or self.request.user.is_manager or self.request.user.is_owner:
             return qs
         if self.request.user.is_authenticated:
             return qs.filter(user=self.request.user)
-        return Order.objects.none()  # guests can't list
+        return qs.none()  # guests can't list
+
+    def get_object(self):
+        # Receipt links use the order number (/orders/20251117-0001/); the id works too
+        if not self.kwargs[self.lookup_field].isdigit():
+            self.lookup_field = 'order_number'
+            self.lookup_url_kwarg = 'pk'
+        return super().get_object()
 
     # ────────────────────── 1. CREATE ORDER (guest + logged-in) ────────────────────── #
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
+        key = request.headers.get(idempotency.IDEMPOTENCY_HEADER)
+        if key is None:
+            return self._place_order(request)
+
+        # Retried checkout (flaky café Wi-Fi) → replay the first answer, no second order
+        record = idempotency.begin(key, idempotency.fingerprint(request))
+        if record is not None:
+            return Response(
+                record.response_body,
+                status=record.response_code,
+                headers={'Idempotent-Replayed': 'true'},
+            )
+
+        try:
+            response = self._place_order(request, idempotency_key=key)
+        except BaseException:
+            idempotency.abandon(key)
+            raise
+        if response.status_code != status.HTTP_201_CREATED:
+            idempotency.abandon(key)
+        return response
+
+    @transaction.atomic
+    def _place_order(self, request, idempotency_key=None):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -80,18 +165,38 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
         order = serializer.save()
-        return Response(
-            OrderListRetrieveSerializer(order).data,
-            status=status.HTTP_201_CREATED
-        )
+        prefetch_related_objects([order], OrderListRetrieveSerializer.items_prefetch())
+        # Realistic pickup quote: behind everything already queued in the kitchen
+        data = ActiveOrderSerializer(order, context={'estimates': {order.pk: kitchen.quote(order)}}).data
+        schedule_on_commit(order)
+        publish_on_commit(ORDER_CREATED, data)
+        if idempotency_key is not None:
+            idempotency.complete(idempotency_key, status.HTTP_201_CREATED, data)
+        return Response(data, status=status.HTTP_201_CREATED)
 
     # ────────────────────── 2. BARISTA: Update status ────────────────────── #
     @action(detail=True, methods=['patch'], url_path='status')
+    @transaction.atomic
     def update_status(self, request, pk=None):
         order = self.get_object()
+        previous_status = order.status
         serializer = OrderStatusUpdateSerializer(order, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        if order.status != previous_status:
+            OrderStatusEvent.record(order, previous_status, changed_by=request.user)  # same transaction
+
+        # Cancelled before pickup → merch goes back on the shelf
+        if serializer.validated_data.get('status') == 'CANCELLED':
+            release_stock(merch_quantities((item.product, item.quantity) for item in order.items.all()))
+            if order.pickup_slot_id:
+                release_slot(order.pickup_slot_id, order.slot_minutes)  # frees the pickup window too
+            refund_order(order)  # a reward spent on it goes back to the customer
+
+        # Picked up → loyalty points, in this transaction. The row lock makes a repeated
+        # COMPLETED a 400 above; the ledger's once-per-order constraint is only a backstop
+        if serializer.validated_data.get('status') == 'COMPLETED':
+            award_order(order)
 
         # Auto-mark as paid when confirming (common café flow)
         if serializer.validated_data.get('status') == 'CONFIRMED':
@@ -99,30 +204,143 @@ class OrderViewSet(viewsets.ModelViewSet):
                 order.is_paid = True
                 order.save(update_fields=['is_paid'])
 
-        return Response(OrderListRetrieveSerializer(order).data)
+        data = OrderListRetrieveSerializer(order).data
+        schedule_on_commit(order)
+        # The dashboard's shape, with the ETA from the schedule this commit has just updated
+        publish_on_commit(ORDER_STATUS_CHANGED, lambda: active_order_data(order))
+        return Response(data)
 
     # ────────────────────── 3. BARISTA DASHBOARD: Active orders ────────────────────── #
     @action(detail=False, methods=['get'], permission_classes=[IsBaristaOrBetter])
     def active(self, request):
-        """The iPad behind the counter — shows only current orders"""
-        active_statuses = ['PENDING', 'CONFIRMED', 'PREPARING', 'READY']
+        """The iPad behind the counter — shows only current orders, with kitchen ETAs"""
+        orders = active_queue(self.get_queryset())
+
+        page = self.paginate_queryset(orders)
+        rows = page if page is not None else orders
+        prefetch_related_objects(rows, OrderListRetrieveSerializer.items_prefetch())  # this page's items only
+        serializer = ActiveOrderSerializer(rows, many=True, context={'estimates': kitchen.estimates(rows)})
+        return self.get_paginated_response(serializer.data)
+
+    # ────────────────────── 4. CHECKOUT: Pickup slot availability ────────────────────── #
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def slots(self, request):
+        """
+        GET /api/orders/slots/?date=2025-11-17&minutes=9 → remaining prep minutes per
+        pickup slot for the day (default today), straight from the slot counters.
+        `minutes` (the basket's prep time) adds a `fits` flag per slot.
+        """
+        try:
+            day = date.fromisoformat(request.query_params['date']) if 'date' in request.query_params else None
+            minutes = int(request.query_params.get('minutes', 0))
+        except ValueError:
+            return Response({"detail": "Use ?date=YYYY-MM-DD and an integer ?minutes=."}, status=status.HTTP_400_BAD_REQUEST)
+
         now = timezone.now()
+        day_start = timezone.make_aware(datetime.combine(day or timezone.localdate(), time.min))
+        slots = availability(max(day_start, now), day_start + timedelta(days=1))
+        if minutes:
+            for slot in slots:
+                slot['fits'] = fits(slot, minutes)
+        return Response({'slot_minutes': settings.PICKUP_SLOT_MINUTES, 'slots': slots})
 
-        orders = self.get_queryset().filter(status__in=active_statuses)
-
-        # Highlight late orders
-        orders = orders.annotate(
-            is_late=Case(
-                When(
-                    Q(requested_pickup_time__lt=now) &
-                    Q(status__in=['PREPARING', 'READY']),
-                    then=True
-                ),
-                default=False,
-                output_field=BooleanField()
-            )
-        ).order_by('is_late', 'requested_pickup_time')
 
-        page = self.paginate_queryset(orders)
-        serializer = OrderListRetrieveSerializer(page or orders, many=True)
-        return self.get_paginated_response(serializer.data)
\ No newline at end of file
+def active_order_data(order) -> dict:
+    """One order as the live dashboard shows it — the same fields as the stream's snapshot"""
+    return ActiveOrderSerializer(order, context={'estimates': kitchen.estimates()}).data
+
+
+def active_queue(queryset) -> list:
+    """
+    Current orders, on-time ones first, each group in pickup order — shared by
+    /active/ and the live stream. One scan of the orders_active_queue_idx
+    partial index, which already yields them by (requested_pickup_time,
+    created_at): lateness depends on now(), so rather than sort on it the
+    list is split in two, keeping that order. Items are not prefetched —
+    callers do that for the rows they render.
+    """
+    now = timezone.now()
+    on_time, late = [], []
+    rows = (
+        queryset.prefetch_related(None)
+        .filter(status__in=ACTIVE_STATUSES)
+        .only(*ACTIVE_QUEUE_FIELDS)
+        .order_by('requested_pickup_time', 'created_at')
+    )
+    for order in rows:
+        order.is_late = (
+            order.requested_pickup_time is not None
+            and order.requested_pickup_time < now
+            and order.status in LATE_STATUSES
+        )
+        (late if order.is_late else on_time).append(order)
+    return on_time + late
+
+
+# ────────────────────── 5. BARISTA DASHBOARD: Live stream (SSE) ────────────────────── #
+async def active_orders_stream(request):
+    """
+    GET /api/orders/stream/ → text/event-stream for the iPads, served by the ASGI app.
+    One `snapshot` of the active queue, then `order.created` / `order.status_changed`
+    as they commit — no more polling /active/.
+
+    Under WSGI (runserver, gunicorn's sync workers) an endless async stream would
+    be read to the end before anything is sent, holding a worker forever — so
+    there it is refused, and the dashboard keeps polling /active/.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "The live stream needs the ASGI server (coffe_house.asgi); poll /api/orders/active/ instead."},
+            status=400,
+        )
+    user = await _authenticate_stream(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    request.user = user
+    if not IsBaristaOrBetter().has_permission(request, None):
+        return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+
+    return StreamingHttpResponse(
+        _event_stream(),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def _authenticate_stream(request):
+    """Same credentials as the REST API: JWT bearer header or session"""
+    jwt_auth = JWTAuthentication()
+    header = jwt_auth.get_header(request)
+    if header is not None:
+        raw_token = jwt_auth.get_raw_token(header)
+        if raw_token is None:
+            return None
+        try:
+            validated = jwt_auth.get_validated_token(raw_token)
+            return await sync_to_async(jwt_auth.get_user)(validated)
+        except (InvalidToken, AuthenticationFailed):
+            return None
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def _active_snapshot():
+    orders = active_queue(Order.objects.all())
+    prefetch_related_objects(orders, OrderListRetrieveSerializer.items_prefetch())
+    serializer = ActiveOrderSerializer(orders, many=True, context={'estimates': kitchen.estimates(orders)})
+    return make_event(SNAPSHOT, serializer.data)
+
+
+async def _event_stream():
+    # Subscribe on the loop that serves the stream, and before the snapshot
+    # so nothing committed in between is missed
+    subscription = get_broker().subscribe()
+    try:
+        snapshot = await sync_to_async(_active_snapshot)()
+        yield f"retry: {STREAM_RETRY_MS}\n\n" + snapshot.to_sse()
+        while not subscription.overflowed:
+            event = await subscription.get(timeout=STREAM_KEEPALIVE_SECONDS)
+            # Comment line keeps proxies and the iPad from timing out an idle stream
+            yield event.to_sse() if event else ": keep-alive\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,88 @@
+# products/cache.py
+"""
+Menu snapshot cache — public menu responses rendered once per menu version.
+
+Every Product/Category save or delete bumps the menu version (signals.py),
+which retires every cached response at once: keys embed the version, no
+key-by-key invalidation needed. Cached entries carry a strong ETag, so
+clients revalidating with If-None-Match get an empty 304.
+
+A snapshot rendered from a read replica may predate the version it is stored
+under (the replica hadn't replayed the change yet), so those are only kept
+for REPLICA_LAG_SECONDS.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from coffe_house.replicas import reading_from_replica
+
+MENU_VERSION_KEY = 'menu:version'
+
+
+def menu_cache():
+    return caches[settings.MENU_CACHE_ALIAS]
+
+
+def get_menu_version() -> int:
+    # Seed with a timestamp, not 1: if the version key is ever evicted we must
+    # not land back on a version whose snapshots are still cached
+    return menu_cache().get_or_set(MENU_VERSION_KEY, lambda: time.time_ns(), timeout=None)
+
+
+def bump_menu_version():
+    cache = menu_cache()
+    try:
+        cache.incr(MENU_VERSION_KEY)
+    except ValueError:  # key missing → any new seed is already a fresh version
+        cache.set(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def _snapshot_key(request, version: int) -> str:
+    query = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    # Scheme and host too: bodies carry absolute image URLs built for this request
+    raw = f"{request.scheme}://{request.get_host()}{request.path}|{query}|{request.accepted_renderer.format}"
+    return f"menu:{version}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def _add_cache_headers(response, etag: str):
+    response['ETag'] = etag
+    # Store, but always revalidate — a 304 costs the client nothing
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def menu_snapshot(action):
+    """
+    Cache a read-only menu action (list/featured) per menu version.
+    Staff see unpublished items, so their requests always go to the database.
+    """
+    @functools.wraps(action)
+    def wrapper(self, request, *args, **kwargs):
+        if request.user.is_staff:
+            return action(self, request, *args, **kwargs)
+
+        cache = menu_cache()
+        key = _snapshot_key(request, get_menu_version())
+        entry = cache.get(key)
+        if entry is not None:
+            etag, content, content_type = entry
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                return _add_cache_headers(HttpResponseNotModified(), etag)
+            return _add_cache_headers(HttpResponse(content, content_type=content_type), etag)
+
+        timeout = settings.REPLICA_LAG_SECONDS if reading_from_replica() else settings.MENU_CACHE_TIMEOUT
+        response = action(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            def store(rendered):
+                etag = quote_etag(hashlib.sha256(rendered.content).hexdigest())
+                cache.set(key, (etag, rendered.content, rendered['Content-Type']), timeout)
+                _add_cache_headers(rendered, etag)
+            response.add_post_render_callback(store)
+        return response
+    return wrapper
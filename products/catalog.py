@@ -0,0 +1,140 @@
+# products/catalog.py
+"""
+Bulk catalog import — CSV or JSON rows in, products created/updated in bulk.
+
+    slug,name,category,price,prep_time_minutes
+    flat-white,Flat White,Drinks,4.75,3
+    ,Maple Cortado,Drinks,5.25,4          ← no slug → new product, slug made up
+
+Rows carrying a slug update that product (only the columns present, and only
+if something actually changed) or create it; rows without one are new
+products. The whole catalog is read once, so the diff, category lookup and
+unique-slug generation all happen in memory; writes go out as bulk_create /
+bulk_update in chunks of CHUNK_SIZE. Bulk writes skip the per-row save
+signals, so the menu version is bumped exactly once, after commit.
+
+All or nothing: any invalid row and nothing is written.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import bump_menu_version
+from .models import Category, Product, unique_slug
+from .serializers import CatalogRowSerializer
+
+CHUNK_SIZE = 500
+FORMATS = ("csv", "json")
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deactivated: int = 0
+    errors: list = field(default_factory=list)  # [{"row": n, "errors": {...}}] — n is 1-based
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def parse_catalog(content, fmt: str) -> list:
+    """Rows (dicts) from CSV text or a JSON list / {"products": [...]}; blank CSV cells are left out"""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    if fmt == "csv":
+        return [
+            {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            for row in csv.DictReader(io.StringIO(content))
+        ]
+    data = json.loads(content)
+    rows = data.get("products") if isinstance(data, dict) else data
+    if not isinstance(rows, list):
+        raise ValueError('JSON catalog must be a list of products or {"products": [...]}.')
+    return rows
+
+
+def import_catalog(rows, *, deactivate_missing=False, dry_run=False) -> ImportResult:
+    result = ImportResult()
+    serializer = CatalogRowSerializer(data=rows, many=True)
+    if not serializer.is_valid():
+        result.errors = [{"row": n, "errors": errors} for n, errors in enumerate(serializer.errors, start=1) if errors]
+        return result
+
+    # Two queries for the whole file: every product and every category
+    existing = {product.slug: product for product in Product.objects.order_by()}
+    categories = {}
+    for category in Category.objects.all():
+        categories[category.slug] = categories[category.name.casefold()] = category
+    taken = set(existing)
+
+    creates, updates, seen = [], [], set()  # updates: (product, the fields its row changed)
+    for n, row in enumerate(serializer.validated_data, start=1):
+        row = dict(row)
+        if "category" in row:
+            name = row.pop("category")
+            category = categories.get(name) or categories.get(name.casefold()) if name else None
+            if name and category is None:
+                result.errors.append({"row": n, "errors": {"category": [f"Unknown category '{name}'."]}})
+                continue
+            row["category_id"] = category.pk if category else None  # compared by id: no FK fetch
+
+        slug = row.pop("slug", None)
+        if slug in seen:
+            result.errors.append({"row": n, "errors": {"slug": [f"Duplicate slug '{slug}' in this file."]}})
+            continue
+        product = existing.get(slug)
+
+        if product is None:
+            missing = [f for f in ("name", "price") if f not in row]
+            if missing:
+                result.errors.append({"row": n, "errors": {f: ["Required for new products."] for f in missing}})
+                continue
+            # Given slug is unused (else we'd be updating); otherwise derive one
+            slug = unique_slug(slug or slugify(row["name"]), taken)
+            creates.append(Product(slug=slug, **row))
+        else:
+            dirty = [name for name, value in row.items() if getattr(product, name) != value]
+            if dirty:
+                for name in dirty:
+                    setattr(product, name, row[name])
+                updates.append((product, frozenset(dirty)))
+            else:
+                result.unchanged += 1
+        seen.add(slug)
+
+    if result.errors:
+        return result
+
+    if deactivate_missing:
+        for slug, product in existing.items():
+            if slug not in seen and product.is_available:
+                product.is_available = False
+                updates.append((product, frozenset({"is_available"})))
+                result.deactivated += 1
+
+    result.created = len(creates)
+    result.updated = len(updates) - result.deactivated
+    if dry_run or not (creates or updates):
+        return result
+
+    # One bulk_update per set of changed fields: a product never has a column written
+    # that its row didn't change (stock_count read at load time would undo checkouts since)
+    now = timezone.now()
+    groups = defaultdict(list)
+    for product, fields in updates:
+        product.updated_at = now  # bulk_update skips auto_now; suggestions sync reads it
+        groups[fields].append(product)
+    with transaction.atomic():
+        Product.objects.bulk_create(creates, batch_size=CHUNK_SIZE)
+        for fields, products in groups.items():
+            Product.objects.bulk_update(products, [*sorted(fields), "updated_at"], batch_size=CHUNK_SIZE)
+        transaction.on_commit(bump_menu_version)  # once per import, not once per row
+    return result
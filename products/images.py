@@ -0,0 +1,174 @@
+# products/images.py
+"""
+Responsive product images — the menu grid shouldn't ship a 4 MB photo to a phone.
+
+When a product gets a new image, a background worker renders it at each of
+PRODUCT_IMAGE_WIDTHS (never upscaling) as WebP and JPEG:
+
+    products/variants/oat-milk-latte.3f9a1c0b52de.320w.webp
+
+The hash is of the encoded file, so a URL never changes meaning and can be
+cached forever; a new upload gets new names. The result is stored on
+Product.image_variants together with the upload it was made from:
+
+    {"source": "products/oat.jpg", "webp": {"320": "...", "640": "..."}, "jpeg": {...}}
+
+Saving a product only queues its id (after commit); the resizing happens on
+a daemon thread, one per process, so checkout and admin requests never wait
+on Pillow. With PRODUCT_IMAGE_ASYNC off (tests, single-process scripts) the
+work runs inline instead.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+import queue
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from .cache import bump_menu_version
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = "products/variants"
+ENCODINGS = {
+    # format → (Pillow format, extension, save options)
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _widths(source_width: int) -> list:
+    """Configured widths that don't upscale; a small original is kept at its own width"""
+    widths = [w for w in sorted(settings.PRODUCT_IMAGE_WIDTHS) if w <= source_width]
+    return widths or [source_width]
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    pil_format, _, options = ENCODINGS[fmt]
+    if fmt == "jpeg" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, "white")  # JPEG has no alpha — flatten onto white
+        background.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(source_name: str) -> dict:
+    """Write every derivative of one stored image; returns {fmt: {width: name}}"""
+    with default_storage.open(source_name, "rb") as f:
+        image = ImageOps.exif_transpose(Image.open(f))  # phone photos are rotated by EXIF
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.getbands() else "RGB")
+
+    stem = posixpath.splitext(posixpath.basename(source_name))[0]
+    variants = {fmt: {} for fmt in ENCODINGS}
+    for width in _widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, (_, extension, _) in ENCODINGS.items():
+            data = _encode(resized, fmt)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            name = f"{VARIANT_DIR}/{stem}.{digest}.{width}w.{extension}"
+            if not default_storage.exists(name):  # same bytes → same name, nothing to write
+                default_storage.save(name, ContentFile(data))
+            variants[fmt][str(width)] = name
+    return variants
+
+
+def _variant_names(variants: dict) -> set:
+    return {name for fmt in ENCODINGS for name in (variants or {}).get(fmt, {}).values()}
+
+
+def build_variants(product_id: int) -> bool:
+    """
+    (Re)build one product's derivatives if its image changed since the last
+    build. Returns True when something was written.
+    """
+    product = Product.objects.filter(pk=product_id).only("image", "image_variants").first()
+    if product is None:
+        return False
+    source = product.image.name if product.image else None
+    previous = product.image_variants or {}
+    if previous.get("source") == source and (source is None or _variant_names(previous)):
+        return False
+
+    variants = {"source": source, **render_variants(source)} if source else {}
+    # Only if the image is still the one we rendered — a newer upload queues its own build
+    current = Q(image=source) if source else Q(image="") | Q(image__isnull=True)
+    updated = Product.objects.filter(current, pk=product_id).update(image_variants=variants)
+    if not updated:
+        return False
+    stale = _variant_names(previous) - _variant_names(variants)
+    transaction.on_commit(lambda: _delete(stale))
+    transaction.on_commit(bump_menu_version)  # cached menu snapshots pick up the srcset
+    return True
+
+
+def _delete(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+class ImageWorker:
+    """A queue of product ids and the daemon thread that drains it"""
+
+    def __init__(self, handler=build_variants):
+        self.handler = handler
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, product_id: int):
+        if not settings.PRODUCT_IMAGE_ASYNC:
+            self.handler(product_id)
+            return
+        self._queue.put(product_id)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="product-images", daemon=True)
+                self._thread.start()
+
+    def join(self):
+        """Block until everything queued so far is processed"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            product_id = self._queue.get()
+            close_old_connections()
+            try:
+                self.handler(product_id)
+            except Exception:  # a broken upload must not kill the worker
+                logger.exception("Image variants failed for product %s", product_id)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+
+image_worker = ImageWorker()
+
+
+def schedule_variants(product):
+    """Queue a (re)build once the save that changed the image is committed"""
+    source = product.image.name if product.image else None
+    if (product.image_variants or {}).get("source") != source:
+        product_id = product.pk
+        transaction.on_commit(lambda: image_worker.enqueue(product_id))
+
+
+def srcset(variants: dict, url) -> dict:
+    """{"webp": "<url> 320w, <url> 640w", "jpeg": ...} — `url` turns a storage name into a URL"""
+    return {
+        fmt: ", ".join(f"{url(name)} {width}w" for width, name in sorted(variants[fmt].items(), key=lambda i: int(i[0])))
+        for fmt in ENCODINGS if variants.get(fmt)
+    }
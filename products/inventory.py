@@ -0,0 +1,76 @@
+# products/inventory.py
+"""
+Stock for physical items (beans, mugs) — reserved inside the checkout transaction.
+
+Each line is one conditional `UPDATE ... SET stock_count = stock_count - qty
+WHERE stock_count >= qty RETURNING ...`: the check and the decrement are the
+same statement, so two customers can never both buy the last bag, and there's
+no SELECT FOR UPDATE round trip. Drinks/food (is_merch=False) are not counted.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import bump_menu_version
+from .models import Product
+from .signals import low_stock
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f"Not enough stock for product {product_id} (wanted {requested}).")
+
+
+def merch_quantities(lines) -> Counter:
+    """{product_id: total quantity} for the merch in (product, quantity) lines"""
+    quantities = Counter()
+    for product, quantity in lines:
+        if product.is_merch:
+            quantities[product.pk] += quantity
+    return quantities
+
+
+def _adjust(product_id, delta, *, require):
+    qn = connection.ops.quote_name
+    sql = (
+        f"UPDATE {qn(Product._meta.db_table)} "
+        f"SET {qn('stock_count')} = {qn('stock_count')} + %s, {qn('updated_at')} = %s "
+        f"WHERE {qn('id')} = %s AND {qn('is_merch')} AND {qn('stock_count')} >= %s "
+        f"RETURNING {qn('stock_count')}, {qn('low_stock_threshold')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [delta, timezone.now(), product_id, require])
+        return cursor.fetchone()
+
+
+def reserve_stock(quantities):
+    """
+    Take stock for every line or none — raises InsufficientStock and leaves the
+    surrounding transaction to roll back the lines already taken.
+    """
+    # Fixed order: two baskets sharing products lock rows in the same sequence (no deadlock)
+    for product_id, quantity in sorted(quantities.items()):
+        row = _adjust(product_id, -quantity, require=quantity)
+        if row is None:
+            raise InsufficientStock(product_id, quantity)
+
+        remaining, threshold = row
+        if remaining == 0:
+            transaction.on_commit(bump_menu_version)  # sold out → drops off the menu
+        if remaining <= threshold < remaining + quantity:  # just crossed the line
+            transaction.on_commit(
+                lambda pk=product_id, left=remaining, limit=threshold: low_stock.send(
+                    sender=Product, product_id=pk, stock_count=left, threshold=limit
+                )
+            )
+
+
+def release_stock(quantities):
+    """Put reserved stock back (cancelled orders)"""
+    for product_id, quantity in sorted(quantities.items()):
+        row = _adjust(product_id, quantity, require=0)
+        if row is not None and row[0] == quantity:
+            transaction.on_commit(bump_menu_version)  # back in stock → back on the menu
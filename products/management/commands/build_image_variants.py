@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from products.images import build_variants
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Build responsive image variants for products whose image has none yet (or changed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, action="append", help="Only this product id (repeatable)")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image="").exclude(image__isnull=True)
+        if options["product"]:
+            products = products.filter(pk__in=options["product"])
+        built = sum(build_variants(pk) for pk in products.values_list("pk", flat=True).iterator())
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {built} product(s)."))
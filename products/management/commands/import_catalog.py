@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog import FORMATS, import_catalog, parse_catalog
+
+
+class Command(BaseCommand):
+    help = "Create/update products in bulk from a CSV or JSON catalog (rows matched by slug)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Catalog file (.csv or .json)")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+        parser.add_argument("--deactivate-missing", action="store_true", help="Mark products not in the file unavailable")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change, write nothing")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Can't tell the format of {path.name} — pass --format {'/'.join(FORMATS)}.")
+        try:
+            rows = parse_catalog(path.read_bytes(), fmt)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        result = import_catalog(
+            rows, deactivate_missing=options["deactivate_missing"], dry_run=options["dry_run"]
+        )
+        if result.errors:
+            raise CommandError("Nothing imported:\n" + "\n".join(json.dumps(error) for error in result.errors))
+        prefix = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}: {result.created} created, {result.updated} updated, "
+            f"{result.unchanged} unchanged, {result.deactivated} deactivated."
+        ))
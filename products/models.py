@@ -3,7 +3,26 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.utils.text import slugify
-from django.db.models import Q
+from django.db.models import Count, Q
+
+
+def unique_slug(base_slug: str, taken: set) -> str:
+    """First of base, base-1, base-2, ... not in `taken` — which it then joins"""
+    slug, counter = base_slug, 1
+    while slug in taken:
+        slug = f"{base_slug}-{counter}"
+        counter += 1
+    taken.add(slug)
+    return slug
+
+
+class CategoryQuerySet(models.QuerySet):
+    def with_products_count(self):
+        """Available products per category, counted in the same query (no COUNT per row)"""
+        available = Q(products__is_available=True) & (
+            Q(products__is_merch=False) | Q(products__stock_count__gt=0)
+        )
+        return self.annotate(products_count=Count('products', filter=available))
 
 
 class Category(models.Model):
@@ -20,6 +39,8 @@ class Category(models.Model):
         help_text="Uncheck to hide from menu without deleting"
     )
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
@@ -73,6 +94,7 @@ class Product(models.Model):
 
     # Visual & Operations
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # resized copies, see images.py
     featured = models.BooleanField(default=False)
     prep_time_minutes = models.PositiveIntegerField(default=3, help_text="Used for kitchen pacing")
 
@@ -90,16 +112,13 @@ class Product(models.Model):
         ]
 
     def save(self, *args, **kwargs):
-        # Generate slug only if missing
+        # Generate slug only if missing — one query for the taken "<base>*" slugs, not one per attempt
         if not self.slug:
             base_slug = slugify(self.name)
-            slug = base_slug
-            counter = 1
-            # ← FIXED: Was "Products" (typo) → now "Product"
-            while Product.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            taken = set(
+                Product.objects.filter(slug__startswith=base_slug).exclude(pk=self.pk).values_list("slug", flat=True)
+            )
+            self.slug = unique_slug(base_slug, taken)
 
         super().save(*args, **kwargs)
 
@@ -1,19 +1,20 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from django.utils.text import slugify #auto generate SEO slugs
+from .images import srcset
 from .models import Product, Category
 
 #Category serializer
 class CategoryListSerializer(serializers.ModelSerializer):
     """Compact- Used in product listings $ menu."""
-    product_count = serializers.SerializerMethodField()
+    # Annotated by Category.objects.with_products_count(); left out when nested
+    # under a product, where the category row isn't annotated
+    products_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Category
         fields = ['id', "name", "slug", "description","is_active", "products_count"]
         read_only_fields = ["slug", "products_count"]
 
-    def get_products_count(self,obj) -> int:
-        return  obj.products.filters(is_available=True).count()
 class CategoryDetailSerializer(CategoryListSerializer):
     """Full detail - admin or deep links."""
     products = serializers.HyperlinkedRelatedField(
@@ -38,13 +39,14 @@ class ProductListSerializer(serializers.ModelSerializer):
     )
     in_stock = serializers.BooleanField(read_only=True) #stock is available or not
     image_url =serializers.SerializerMethodField() #build the full image url needed by clients
+    image_srcset = serializers.SerializerMethodField() # resized webp/jpeg copies for the menu grid
     class Meta :
         model = Product
         fields = [
-            "id", "name", 'slug', 'short_description', 'price', 'image', 'image_url', 
-            'is_available', 'featured', 'category','categort_id', 'in-stock','prep_time_minutes',
+            "id", "name", 'slug', 'short_description', 'price', 'image', 'image_url', 'image_srcset',
+            'is_available', 'featured', 'category','category_id', 'in_stock','prep_time_minutes',
         ] # only send what the menu needs
-        read_only_fields = ["slug", "in_stock", "image_url"]
+        read_only_fields = ["slug", "in_stock", "image_url", "image_srcset"]
     def get_image_url(self, obj):
         if obj.image:
             request = self.context.get("request")
@@ -52,6 +54,18 @@ class ProductListSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.image.url) #auto generate image url for clients
             return None # return none if no image
 
+    def get_image_srcset(self, obj):
+        """{"webp": "<url> 320w, ...", "jpeg": ...} — None until the variants are built (use image_url)"""
+        variants = obj.image_variants
+        if not variants or not obj.image or variants.get("source") != obj.image.name:
+            return None
+        request = self.context.get("request")
+
+        def url(name):
+            return request.build_absolute_uri(default_storage.url(name)) if request else default_storage.url(name)
+
+        return srcset(variants, url) or None
+
 class ProductDetailSerializer(serializers.ModelSerializer):
     """ full product card  -detail page."""
     category = CategoryDetailSerializer(read_only=True)
@@ -103,13 +117,24 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        """Auto-generate unique slug."""
-        name = validated-data["name"]
-        base_slug = slugify(name)
-        slug = base_slug
-        counter = 1
-        while Product.objects.filter(slug=slug).exists():
-            slug = f"{base_slug}- {counter}"
-            counter += 1
-        validated_data["slug"] = slug
-        return super().create(validated_data)
\ No newline at end of file
+        """Slug is generated by Product.save (unique, one query)."""
+        return super().create(validated_data)
+
+
+class CatalogRowSerializer(serializers.ModelSerializer):
+    """
+    One row of a catalog import (products/catalog.py). Every field is optional
+    here: updates only touch the columns a row carries, creates need name+price.
+    """
+    # Explicit field → no UniqueValidator, i.e. no query per row; the import diffs in bulk
+    slug = serializers.SlugField(max_length=120, required=False)
+    category = serializers.CharField(required=False, allow_blank=True, help_text="Category name or slug")
+
+    class Meta:
+        model = Product
+        fields = [
+            "slug", "name", "category", "short_description", "description", "price",
+            "is_available", "stock_count", "low_stock_threshold", "is_coffee_drink", "caffeine_mg",
+            "is_merch", "weight_grams", "featured", "prep_time_minutes",
+        ]
+        extra_kwargs = {field: {"required": False} for field in fields}
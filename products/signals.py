@@ -0,0 +1,25 @@
+# products/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import bump_menu_version
+from .images import schedule_variants
+from .models import Category, Product
+
+# Sent (after commit) when a reservation takes merch stock to or below
+# low_stock_threshold — kwargs: product_id, stock_count, threshold
+low_stock = Signal()
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def menu_changed(sender, **kwargs):
+    """Any menu edit retires every cached menu snapshot — once the edit is visible"""
+    transaction.on_commit(bump_menu_version)
+
+
+@receiver(post_save, sender=Product)
+def image_changed(sender, instance, **kwargs):
+    """A new (or removed) upload → rebuild its responsive variants off the request path"""
+    schedule_variants(instance)
@@ -0,0 +1,273 @@
+# products/suggestions.py
+"""
+In-memory autocomplete for GET /api/products/suggestions/.
+
+Every product name and short_description is split into normalized tokens
+(case- and accent-insensitive: "Café" → "cafe") kept in a sorted array, so a
+prefix lookup is a bisect plus a short scan — no database round trip per
+keystroke. Results rank featured items first, then popular ones (units sold),
+then name matches over description matches.
+
+Each process keeps its own index. It follows the menu version (products/cache.py):
+when the version moves, only products touched since the last sync are
+re-read; a full rebuild (which also refreshes popularity) happens on first
+use and every SUGGESTIONS_REBUILD_SECONDS.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .cache import get_menu_version
+from .models import Category, Product
+
+_WORD = re.compile(r"[a-z0-9]+")
+_EMPTY = frozenset()
+
+# Re-read rows updated slightly before the last sync: a save can commit after
+# its auto_now timestamp was taken
+SYNC_OVERLAP = timedelta(minutes=5)
+
+SUGGESTION_FIELDS = (
+    "id", "name", "short_description", "featured", "is_available",
+    "is_merch", "stock_count", "category_id",
+)
+
+
+def normalize(text: str) -> str:
+    """'Crème Brûlée' → 'creme brulee'"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> list:
+    return _WORD.findall(normalize(text or ""))
+
+
+@dataclass(slots=True)
+class Entry:
+    pk: int
+    name: str
+    sort_key: tuple      # (not featured, -popularity, normalized name) — query independent
+    available: bool
+    category_id: int
+    name_tokens: frozenset
+    tokens: frozenset
+
+
+class SuggestionIndex:
+    """Sorted prefix array over product tokens → product ids"""
+
+    MEMO_SIZE = 4096  # distinct recent queries answered straight from memory
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}        # pk → Entry
+        self._postings = {}       # token → {pk, ...}   (name + description)
+        self._name_postings = {}  # token → {pk, ...}   (name only, for ranking)
+        self._keys = []           # sorted tokens, for bisect prefix scans
+        self._active_categories = set()
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def pks(self) -> set:
+        return set(self._entries)
+
+    def popularity(self, pk) -> int:
+        entry = self._entries.get(pk)
+        return -entry.sort_key[1] if entry else 0
+
+    # ────────────── maintenance ────────────── #
+    def build(self, products, active_categories, popularity):
+        with self._lock:
+            self._entries, self._postings, self._name_postings = {}, {}, {}
+            self._active_categories = set(active_categories)
+            for product in products:
+                self._add(self._entry(product, popularity.get(product["id"], 0)))
+            self._keys = sorted(self._postings)
+            self._memo = {}
+
+    def upsert(self, product):
+        with self._lock:
+            popularity = self.popularity(product["id"])
+            self.remove(product["id"])
+            for token in self._add(self._entry(product, popularity)):
+                bisect.insort(self._keys, token)
+            self._memo = {}
+
+    def remove(self, pk):
+        with self._lock:
+            entry = self._entries.pop(pk, None)
+            if entry is None:
+                return
+            for token in entry.name_tokens:
+                self._discard(self._name_postings, token, pk)
+            for token in entry.tokens:
+                if self._discard(self._postings, token, pk):
+                    del self._keys[bisect.bisect_left(self._keys, token)]
+            self._memo = {}
+
+    def set_active_categories(self, active_categories):
+        with self._lock:
+            self._active_categories = set(active_categories)
+            self._memo = {}
+
+    @staticmethod
+    def _discard(postings, token, pk) -> bool:
+        """Drop pk from token's postings; True when the token is gone altogether"""
+        ids = postings[token]
+        ids.discard(pk)
+        if not ids:
+            del postings[token]
+            return True
+        return False
+
+    def _entry(self, product, popularity) -> Entry:
+        """`product` is a .values(*SUGGESTION_FIELDS) row — no model instances on the build path"""
+        name_tokens = frozenset(tokenize(product["name"]))
+        return Entry(
+            pk=product["id"],
+            name=product["name"],
+            sort_key=(not product["featured"], -popularity, normalize(product["name"])),
+            available=product["is_available"] and (not product["is_merch"] or product["stock_count"] > 0),
+            category_id=product["category_id"],
+            name_tokens=name_tokens,
+            tokens=name_tokens | frozenset(tokenize(product["short_description"])),
+        )
+
+    def _add(self, entry: Entry) -> list:
+        """Index the entry, return tokens that are new to the index"""
+        self._entries[entry.pk] = entry
+        for token in entry.name_tokens:
+            self._name_postings.setdefault(token, set()).add(entry.pk)
+        new_tokens = []
+        for token in entry.tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                new_tokens.append(token)
+            ids.add(entry.pk)
+        return new_tokens
+
+    # ────────────── lookup ────────────── #
+    def _prefix_matches(self, prefix: str):
+        """(pks with any token starting with prefix, pks with such a NAME token)"""
+        matches, name_matches = set(), set()
+        keys = self._keys
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            matches |= self._postings[keys[i]]
+            name_matches |= self._name_postings.get(keys[i], _EMPTY)
+            i += 1
+        return matches, name_matches
+
+    def suggest(self, query: str, limit: int = 10, include_hidden: bool = False) -> list:
+        """Names of products where every query word prefixes one of their words"""
+        words = tuple(tokenize(query))
+        if not words:
+            return []
+        memo_key = (words, limit, include_hidden)
+        with self._lock:
+            cached = self._memo.get(memo_key)
+            if cached is not None:
+                return list(cached)
+
+            candidates = name_hits = None
+            for word in words:
+                matches, name_matches = self._prefix_matches(word)
+                if candidates is None:
+                    candidates, name_hits = matches, name_matches
+                else:
+                    candidates &= matches
+                    name_hits &= name_matches
+                if not candidates:
+                    break
+
+            entries = (self._entries[pk] for pk in candidates)
+            if not include_hidden:
+                active = self._active_categories
+                entries = (e for e in entries if e.available and e.category_id in active)
+
+            # Featured, then popular, then name matches before description matches
+            best = heapq.nsmallest(
+                limit, entries,
+                key=lambda e: (e.sort_key[0], e.sort_key[1], e.pk not in name_hits, e.sort_key[2]),
+            )
+            result = [entry.name for entry in best]
+
+            if len(self._memo) >= self.MEMO_SIZE:
+                self._memo = {}
+            self._memo[memo_key] = result
+            return list(result)
+
+
+class MenuSuggestions:
+    """Process-wide index kept in step with the menu version"""
+
+    def __init__(self):
+        self.index = SuggestionIndex()
+        self._lock = threading.Lock()
+        self._version = None
+        self._synced_at = None
+        self._built_at = 0.0
+
+    def suggest(self, query, limit=10, include_hidden=False):
+        self.refresh()
+        return self.index.suggest(query, limit=limit, include_hidden=include_hidden)
+
+    def refresh(self):
+        version = get_menu_version()
+        stale = time.monotonic() - self._built_at > settings.SUGGESTIONS_REBUILD_SECONDS
+        if version == self._version and not stale:
+            return
+        with self._lock:
+            if self._synced_at is None or stale:
+                self.rebuild()
+            elif version != self._version:
+                self.sync()
+            self._version = version
+
+    def rebuild(self):
+        """Full build — one query for products, one for units sold, one for categories"""
+        started = timezone.now()
+        products = Product.objects.order_by().values(*SUGGESTION_FIELDS)
+        # Units sold per product, grouped on order items alone (no join back to products)
+        order_items = Product._meta.get_field("order_items").related_model.objects
+        popularity = dict(
+            order_items.order_by().values_list("product_id").annotate(sold=Sum("quantity"))
+        )
+        self.index.build(products, self._active_category_ids(), popularity)
+        self._synced_at = started
+        self._built_at = time.monotonic()
+
+    def sync(self):
+        """Incremental catch-up after a menu change — only rows touched since the last sync"""
+        started = timezone.now()
+        for product in Product.objects.filter(
+            updated_at__gte=self._synced_at - SYNC_OVERLAP
+        ).order_by().values(*SUGGESTION_FIELDS):
+            self.index.upsert(product)
+
+        existing = set(Product.objects.values_list("pk", flat=True))
+        for pk in self.index.pks() - existing:
+            self.index.remove(pk)
+
+        self.index.set_active_categories(self._active_category_ids())
+        self._synced_at = started
+
+    @staticmethod
+    def _active_category_ids():
+        return Category.objects.filter(is_active=True).values_list("pk", flat=True)
+
+
+menu_suggestions = MenuSuggestions()
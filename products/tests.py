@@ -1,3 +1,448 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from orders.models import Order, OrderItem
+from products.cache import get_menu_version, menu_cache
+from products.catalog import import_catalog, parse_catalog
+from products.images import ImageWorker, build_variants
+from products.inventory import InsufficientStock, merch_quantities, release_stock, reserve_stock
+from products.models import Category, Product
+from products.serializers import ProductListSerializer
+from products.signals import low_stock
+from products.suggestions import MenuSuggestions
+
+class MenuSnapshotCacheTests(TestCase):
+    """Public menu responses come from the versioned snapshot cache"""
+
+    def setUp(self):
+        menu_cache().clear()
+        self.client = APIClient()
+        self.drinks = Category.objects.create(name="Drinks")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.latte = Product.objects.create(
+                name="Oat Milk Latte", category=self.drinks, price=Decimal("5.75"), featured=True
+            )
+            Product.objects.create(name="Americano", category=self.drinks, price=Decimal("3.50"))
+
+    def test_second_request_served_without_queries(self):
+        url = reverse("product-list")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data["count"], 2)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        for url in (reverse("product-list"), reverse("product-featured"), reverse("category-list")):
+            etag = self.client.get(url)["ETag"]
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b"")
+
+    def test_menu_edit_bumps_version_and_refreshes_snapshot(self):
+        url = reverse("product-featured")
+        before = self.client.get(url)
+        version = get_menu_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.latte.price = Decimal("6.25")
+            self.latte.save()
+
+        self.assertGreater(get_menu_version(), version)
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=before["ETag"])
+        self.assertEqual(after.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(after["ETag"], before["ETag"])
+        self.assertEqual(after.data[0]["price"], "6.25")
+
+    def test_query_params_get_their_own_snapshot(self):
+        everything = self.client.get(reverse("product-list"))
+        featured_only = self.client.get(reverse("product-list"), {"featured": "true"})
+        self.assertEqual(featured_only.data["count"], 1)
+        self.assertNotEqual(everything["ETag"], featured_only["ETag"])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "menu.internal"])
+    def test_scheme_and_host_get_their_own_snapshot(self):
+        """Absolute image URLs in the body must not leak from one host or scheme to another"""
+        url = reverse("product-list")
+        self.client.get(url)
+        for extra in ({"HTTP_HOST": "menu.internal"}, {"secure": True}):
+            with self.subTest(**extra), self.assertNumQueries(2):  # count + page: a miss
+                self.client.get(url, **extra)
+            with self.assertNumQueries(0):
+                self.client.get(url, **extra)
+
+
+class CategoryProductsCountTests(TestCase):
+    """Category listing counts available products in the listing query itself"""
+
+    def setUp(self):
+        self.client = APIClient()
+        for c in range(5):
+            category = Category.objects.create(name=f"Category {c}")
+            for p in range(c):
+                Product.objects.create(name=f"Drink {c}-{p}", category=category, price=Decimal("4.00"))
+            # Never counted: switched off, or merch with nothing on the shelf
+            Product.objects.create(name=f"Off {c}", category=category, price=Decimal("4.00"), is_available=False)
+            Product.objects.create(name=f"Mug {c}", category=category, price=Decimal("9.00"), is_merch=True)
+        Category.objects.create(name="Hidden", is_active=False)
+
+    def test_list_is_one_query(self):
+        menu_cache().clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("category-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = {c["name"]: c["products_count"] for c in response.data}
+        self.assertEqual(counts, {f"Category {c}": c for c in range(5)})
+
+    def test_nested_category_omits_count(self):
+        """Product cards don't pay for per-category counts"""
+        product = Product.objects.filter(is_available=True, is_merch=False).first()
+        data = ProductListSerializer(product).data
+        self.assertEqual(data["category"]["slug"], product.category.slug)
+        self.assertNotIn("products_count", data["category"])
+
+
+class SuggestionIndexTests(TestCase):
+    """Prefix autocomplete answered from memory"""
+
+    def setUp(self):
+        menu_cache().clear()
+        self.suggestions = MenuSuggestions()
+        patcher = mock.patch("products.views.menu_suggestions", self.suggestions)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.drinks = Category.objects.create(name="Drinks")
+        self.latte = Product.objects.create(name="Iced Latte", category=self.drinks, price=Decimal("5.00"))
+        Product.objects.create(name="Oat Milk Latte", category=self.drinks, price=Decimal("5.75"), featured=True)
+        Product.objects.create(
+            name="Crème Brûlée Cold Brew", category=self.drinks, price=Decimal("6.00"),
+            short_description="Vanilla custard notes",
+        )
+        Product.objects.create(name="Latte Mug", category=self.drinks, price=Decimal("15.00"), is_merch=True)
+        Product.objects.create(name="Secret Latte", category=self.drinks, price=Decimal("5.00"), is_available=False)
+
+    def _get(self, q):
+        return self.client.get(reverse("product-suggestions"), {"q": q}).data
+
+    def test_featured_first_and_hidden_excluded(self):
+        self.assertEqual(self._get("latt"), ["Oat Milk Latte", "Iced Latte"])
+
+    def test_case_and_accent_insensitive(self):
+        self.assertEqual(self._get("CREME bru"), ["Crème Brûlée Cold Brew"])
+        self.assertEqual(self._get("crème"), ["Crème Brûlée Cold Brew"])
+
+    def test_description_terms_match_after_name_terms(self):
+        self.assertEqual(self._get("vanil"), ["Crème Brûlée Cold Brew"])
+
+    def test_popular_items_rank_higher(self):
+        order = Order.objects.create(customer_name="Guest")
+        OrderItem.objects.create(order=order, product=self.latte, quantity=3)
+        self.suggestions.rebuild()
+        self.assertEqual(self._get("latte"), ["Oat Milk Latte", "Iced Latte"])  # featured still wins
+
+        Product.objects.filter(featured=True).update(featured=False)
+        self.suggestions.rebuild()
+        self.assertEqual(self._get("latte"), ["Iced Latte", "Oat Milk Latte"])
+
+    def test_warm_lookups_skip_the_database(self):
+        self._get("latte")
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get("oat mi"), ["Oat Milk Latte"])
+
+    def test_menu_change_syncs_incrementally(self):
+        self._get("latte")
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Lavender Latte", category=self.drinks, price=Decimal("6.00"))
+            self.latte.delete()
+
+        with mock.patch.object(self.suggestions, "rebuild") as rebuild:
+            self.assertEqual(self._get("lat"), ["Oat Milk Latte", "Lavender Latte"])
+        rebuild.assert_not_called()
+
+
+class StockReservationTests(TestCase):
+    """Merch stock is taken with one conditional UPDATE per line"""
+
+    def setUp(self):
+        self.beans = Product.objects.create(
+            name="Yirgacheffe Beans", price=Decimal("18.00"), is_merch=True, stock_count=8, low_stock_threshold=5
+        )
+        self.latte = Product.objects.create(name="Latte", price=Decimal("5.00"))
+
+    def test_reserve_and_release(self):
+        with self.assertNumQueries(1):
+            reserve_stock(merch_quantities([(self.beans, 2), (self.latte, 3)]))
+        self.beans.refresh_from_db()
+        self.assertEqual(self.beans.stock_count, 6)
+
+        release_stock({self.beans.pk: 2})
+        self.beans.refresh_from_db()
+        self.assertEqual(self.beans.stock_count, 8)
+
+    def test_insufficient_stock_raises(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            reserve_stock({self.beans.pk: 9})
+        self.assertEqual(ctx.exception.product_id, self.beans.pk)
+        self.beans.refresh_from_db()
+        self.assertEqual(self.beans.stock_count, 8)
+
+    def test_low_stock_event_fires_once_on_crossing(self):
+        events = []
+
+        def receiver(sender, **kwargs):
+            events.append(kwargs)
+
+        low_stock.connect(receiver)
+        self.addCleanup(low_stock.disconnect, receiver)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock({self.beans.pk: 2})   # 8 → 6, still fine
+            reserve_stock({self.beans.pk: 1})   # 6 → 5, crossed
+            reserve_stock({self.beans.pk: 1})   # 5 → 4, already low
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual((events[0]["product_id"], events[0]["stock_count"]), (self.beans.pk, 5))
+
+
+class CatalogImportTests(TestCase):
+    """Catalog sync: one read of the catalog, bulk writes, one menu bump"""
+
+    def setUp(self):
+        self.drinks = Category.objects.create(name="Drinks")
+        self.flat_white = Product.objects.create(name="Flat White", category=self.drinks, price=Decimal("4.75"))
+        self.mocha = Product.objects.create(name="Mocha", category=self.drinks, price=Decimal("5.25"))
+
+    def _rows(self, count):
+        return [{"name": f"Blend {i}", "category": "Drinks", "price": "4.00"} for i in range(count)]
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # products + categories, savepoint, insert, release — independent of the file size
+        with self.assertNumQueries(5):
+            import_catalog(self._rows(5))
+        with self.assertNumQueries(5):
+            import_catalog(self._rows(50))
+        self.assertEqual(Product.objects.filter(name="Blend 0").count(), 2)
+
+    def test_rows_write_only_their_own_columns(self):
+        """A checkout between load and write keeps its stock decrement on products whose stock wasn't in the file"""
+        mug = Product.objects.create(name="Mug", price=Decimal("15.00"), is_merch=True, stock_count=10)
+        beans = Product.objects.create(name="Beans", price=Decimal("18.00"), is_merch=True, stock_count=10)
+        load_categories = Category.objects.all
+
+        def checkout_meanwhile():
+            reserve_stock({mug.pk: 3})  # lands after import_catalog has read the products
+            return load_categories()
+
+        with mock.patch.object(Category.objects, "all", side_effect=checkout_meanwhile):
+            result = import_catalog([
+                {"slug": mug.slug, "price": "16.00"},
+                {"slug": beans.slug, "stock_count": 40},
+            ])
+        self.assertEqual(result.updated, 2)
+        mug.refresh_from_db()
+        beans.refresh_from_db()
+        self.assertEqual((mug.price, mug.stock_count), (Decimal("16.00"), 7))
+        self.assertEqual((beans.price, beans.stock_count), (Decimal("18.00"), 40))
+
+    def test_slugs_made_unique_in_memory(self):
+        result = import_catalog([
+            {"name": "Flat White", "price": "5.00"},
+            {"name": "Flat White", "price": "5.50"},
+        ])
+        self.assertEqual(result.created, 2)
+        self.assertEqual(
+            sorted(Product.objects.filter(name="Flat White").values_list("slug", flat=True)),
+            ["flat-white", "flat-white-1", "flat-white-2"],
+        )
+
+    def test_updates_only_changed_rows_and_bumps_menu_once(self):
+        csv_file = (
+            "slug,name,category,price\n"
+            "flat-white,Flat White,drinks,4.75\n"   # unchanged
+            "mocha,,Drinks,5.50\n"                  # price only; blank name untouched
+            ",Cortado,Drinks,4.25\n"
+        )
+        with mock.patch("products.catalog.bump_menu_version") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = import_catalog(parse_catalog(csv_file, "csv"))
+        bump.assert_called_once_with()
+        self.assertEqual((result.created, result.updated, result.unchanged), (1, 1, 1))
+
+        self.mocha.refresh_from_db()
+        self.flat_white.refresh_from_db()
+        self.assertEqual((self.mocha.name, self.mocha.price), ("Mocha", Decimal("5.50")))
+        self.assertGreater(self.mocha.updated_at, self.flat_white.updated_at)
+        self.assertEqual(Product.objects.get(slug="cortado").category, self.drinks)
+
+    def test_any_bad_row_aborts_the_import(self):
+        result = import_catalog([
+            {"name": "Cortado", "price": "4.25"},
+            {"name": "Affogato", "price": "-1"},
+            {"slug": "mocha", "category": "Pastries"},
+            {"name": "Cortado"},
+        ])
+        self.assertEqual([error["row"] for error in result.errors], [2])  # field validation first
+
+        result = import_catalog([
+            {"name": "Cortado", "price": "4.25"},
+            {"slug": "mocha", "category": "Pastries"},
+            {"name": "Lungo"},
+        ])
+        self.assertEqual([error["row"] for error in result.errors], [2, 3])
+        self.assertFalse(Product.objects.filter(name="Cortado").exists())
+
+    def test_deactivate_missing_and_dry_run(self):
+        rows = [{"slug": "flat-white", "price": "4.75"}]
+        result = import_catalog(rows, deactivate_missing=True, dry_run=True)
+        self.assertEqual((result.unchanged, result.deactivated), (1, 1))
+        self.mocha.refresh_from_db()
+        self.assertTrue(self.mocha.is_available)
+
+        import_catalog(rows, deactivate_missing=True)
+        self.mocha.refresh_from_db()
+        self.assertFalse(self.mocha.is_available)
+
+    def test_staff_csv_upload(self):
+        client = APIClient()
+        url = reverse("product-import-catalog")
+        upload = SimpleUploadedFile("menu.csv", b"name,category,price\nCortado,Drinks,4.25\n", "text/csv")
+        self.assertEqual(client.post(url, {"file": upload}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        staff = get_user_model().objects.create_user(
+            email="manager@coffeehouse.com", password="pass12345", full_name="Man Ager", is_staff=True
+        )
+        client.force_authenticate(staff)
+        upload.seek(0)
+        response = client.post(url, {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+
+        response = client.post(url, [{"slug": "mocha", "price": "oops"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["row"], 1)
+
+
+MEDIA_DIR = tempfile.mkdtemp(prefix="coffeehouse-media-")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_DIR, PRODUCT_IMAGE_ASYNC=False, PRODUCT_IMAGE_WIDTHS=(160, 320, 640))
+class ProductImageVariantTests(TestCase):
+    """Uploads are re-encoded at fixed widths under content-hashed names"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_DIR, ignore_errors=True)
+
+    def _photo(self, width=500, height=400, name="latte.png"):
+        buffer = io.BytesIO()
+        Image.new("RGBA", (width, height), (120, 80, 40, 255)).save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+    def test_save_builds_variants_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            latte = Product.objects.create(name="Latte", price=Decimal("5.00"), image=self._photo())
+            latte.refresh_from_db()
+            self.assertEqual(latte.image_variants, {})  # nothing rendered inside the request's transaction
+        self.assertTrue(callbacks)
+
+        latte.refresh_from_db()
+        variants = latte.image_variants
+        self.assertEqual(variants["source"], latte.image.name)
+        self.assertEqual(sorted(variants["webp"], key=int), ["160", "320"])  # 500px source: no upscaling to 640
+        name = variants["jpeg"]["320"]
+        self.assertRegex(name, r"^products/variants/latte\w*\.[0-9a-f]{12}\.320w\.jpg$")
+        with default_storage.open(name) as f:
+            self.assertEqual(Image.open(f).size, (320, 256))
+
+        # Same image → nothing to do; a new upload → new names, old files removed
+        self.assertFalse(build_variants(latte.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            latte.image = self._photo(width=800, height=800)
+            latte.save()
+        latte.refresh_from_db()
+        self.assertEqual(sorted(latte.image_variants["webp"], key=int), ["160", "320", "640"])
+        self.assertFalse(default_storage.exists(name))
+
+    def test_list_serializer_exposes_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            latte = Product.objects.create(name="Latte", price=Decimal("5.00"), image=self._photo())
+            plain = Product.objects.create(name="Water", price=Decimal("1.00"))
+        latte.refresh_from_db()
+
+        data = ProductListSerializer(latte).data
+        webp = data["image_srcset"]["webp"].split(", ")
+        self.assertEqual([entry.rsplit(" ", 1)[1] for entry in webp], ["160w", "320w"])
+        self.assertRegex(webp[0], r"^/media/products/variants/latte\w*\.[0-9a-f]{12}\.160w\.webp 160w$")
+        self.assertIsNone(ProductListSerializer(plain).data["image_srcset"])
+
+    def test_worker_runs_jobs_off_thread_and_survives_errors(self):
+        done = []
+
+        def handler(product_id):
+            if product_id == 1:
+                raise OSError("truncated upload")
+            done.append((product_id, threading.current_thread().name))
+
+        worker = ImageWorker(handler)
+        with self.settings(PRODUCT_IMAGE_ASYNC=True), self.assertLogs("products.images", "ERROR"):
+            worker.enqueue(1)
+            worker.enqueue(2)
+            worker.join()
+        self.assertEqual(done, [(2, "product-images")])
+
+
+class StockOversellStressTests(TransactionTestCase):
+    """Many concurrent checkouts for the last bags never oversell"""
+
+    THREADS = 12
+
+    def test_never_oversells(self):
+        bag = Product.objects.create(name="Last Bags", price=Decimal("18.00"), is_merch=True, stock_count=5)
+        barrier = threading.Barrier(self.THREADS)
+        sold, refused, errors = [], [], []
+
+        def customer():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    reserve_stock({bag.pk: 1})
+                sold.append(1)
+            except InsufficientStock:
+                refused.append(1)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=customer) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual((len(sold), len(refused)), (5, self.THREADS - 5))
+        bag.refresh_from_db()
+        self.assertEqual(bag.stock_count, 0)
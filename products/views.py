@@ -2,12 +2,18 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly, AllowAny
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
+from rest_framework import status
 from django.db.models import Prefetch, Q
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from coffe_house.replicas import ReplicaReadMixin
+from .cache import menu_snapshot
+from .catalog import FORMATS, import_catalog, parse_catalog
 from .models import Product, Category
+from .suggestions import menu_suggestions
 from .serializers import (
     ProductListSerializer,
     ProductDetailSerializer,
@@ -16,7 +22,12 @@ from .serializers import (
 )
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+def _query_flag(request, name) -> bool:
+    """?name=1 / true / yes"""
+    return request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+class CategoryViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     Public menu categories – only active ones visible to customers
     Staff can see all in admin panel (we don't expose inactive via API)
@@ -25,6 +36,8 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         Prefetch('products', queryset=Product.objects.filter(is_available=True))
     )
     lookup_field = "slug"                      # /categories/drinks/ – beautiful URLs
+    permission_classes = [AllowAny]            # read-only menu, browsable by guests
+    pagination_class = None                    # a menu has a handful of categories → one query
     filter_backends = [filters.SearchFilter]
     search_fields = ["name"]
 
@@ -32,7 +45,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Staff sees all categories (for admin), customers see only active ones
         """
-        qs = Category.objects.all()
+        qs = Category.objects.with_products_count()
         if not self.request.user.is_staff:
             qs = qs.filter(is_active=True)
         return qs.order_by('name')
@@ -42,11 +55,16 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
             return CategoryDetailSerializer
         return CategoryListSerializer
 
+    @menu_snapshot
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Main menu API – the heart of your coffee shop
     """
+    replica_actions = ("list", "retrieve", "featured")  # menu reads — a few seconds stale is fine
     queryset = Product.objects.select_related("category").all()
     filter_backends = [
         DjangoFilterBackend,
@@ -99,8 +117,13 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductListSerializer
         return ProductDetailSerializer
 
+    @menu_snapshot
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     # BONUS: Homepage carousel
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    @menu_snapshot
     def featured(self, request):
         """GET /api/products/featured/ → 6 featured items for homepage"""
         products = self.get_queryset().filter(featured=True)[:6]
@@ -115,8 +138,34 @@ class ProductViewSet(viewsets.ModelViewSet):
         if len(q) < 2:
             return Response([])
 
-        suggestions = self.get_queryset()\
-            .filter(name__icontains=q)\
-            .values_list('name', flat=True)[:10]
+        # In-memory prefix index — no query per keystroke (products/suggestions.py)
+        return Response(menu_suggestions.suggest(q, include_hidden=request.user.is_staff))
 
-        return Response(list(suggestions))
\ No newline at end of file
+    # Bulk menu sync (admin / scripts)
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, JSONParser])
+    def import_catalog(self, request):
+        """
+        POST /api/products/catalog/import/ — a CSV/JSON `file` upload, or a JSON list
+        of products as the body. ?dry_run=1 reports without writing,
+        ?deactivate_missing=1 hides products the catalog doesn't mention.
+        """
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                fmt = upload.name.rsplit('.', 1)[-1].lower()
+                if fmt not in FORMATS:
+                    return Response({"file": ["Upload a .csv or .json catalog."]}, status=status.HTTP_400_BAD_REQUEST)
+                rows = parse_catalog(upload.read(), fmt)
+            else:
+                rows = request.data.get('products') if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise ValueError('Send a `file`, a JSON list of products or {"products": [...]}.')
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_catalog(
+            rows,
+            deactivate_missing=_query_flag(request, 'deactivate_missing'),
+            dry_run=_query_flag(request, 'dry_run'),
+        )
+        return Response(result.as_dict(), status=status.HTTP_400_BAD_REQUEST if result.errors else status.HTTP_200_OK)
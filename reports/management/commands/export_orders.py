@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.models import Order
+from reports.export import FORMATS, stream_export
+from reports.rollup import day_bounds
+
+
+class Command(BaseCommand):
+    help = "Stream orders (with items) in a date range to CSV or NDJSON, in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="end", type=date.fromisoformat, required=True, help="YYYY-MM-DD (inclusive)")
+        parser.add_argument("--type", dest="fmt", choices=list(FORMATS), default="csv")
+        parser.add_argument("--status", action="append", choices=[s for s, _ in Order.STATUS_CHOICES])
+        parser.add_argument("--output", "-o", default="-", help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        if options["end"] < options["start"]:
+            raise CommandError("--from must not be after --to.")
+        chunks = stream_export(
+            options["fmt"], day_bounds(options["start"])[0], day_bounds(options["end"])[1], options["status"]
+        )
+        if options["output"] == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as out:
+            for chunk in chunks:
+                out.write(chunk)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reports.rollup import rollup_sales
+
+
+class Command(BaseCommand):
+    help = "Update the sales rollups from orders changed since the last run (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild every day, ignoring the watermark")
+
+    def handle(self, *args, **options):
+        days = rollup_sales(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(days)} day(s) of sales rollups."))
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0002_remove_category_unique_category_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HourlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('is_paid', models.BooleanField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('items', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+            ],
+            options={
+                'verbose_name': 'Hourly Sales',
+                'verbose_name_plural': 'Hourly Sales',
+                'ordering': ['day', 'hour', 'is_paid'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'hour', 'is_paid'), name='reports_hourly_sales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('is_paid', models.BooleanField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.category')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Product Daily Sales',
+                'verbose_name_plural': 'Product Daily Sales',
+                'ordering': ['day', 'product'],
+                'indexes': [models.Index(fields=['day', 'category'], name='reports_product_day_category')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'product', 'is_paid'), name='reports_product_daily_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# reports/models.py
+"""
+Sales rollups — maintained by `manage.py rollup_sales` (reports/rollup.py),
+read by /api/reports/. Days are local (TIME_ZONE); cancelled orders never count.
+"""
+from decimal import Decimal
+
+from django.db import models
+
+from products.models import Category, Product
+
+
+class HourlySales(models.Model):
+    """Orders, items and revenue per local hour, paid and unpaid apart — days sum 24 rows"""
+    day = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    is_paid = models.BooleanField()
+    orders = models.PositiveIntegerField(default=0)
+    items = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        ordering = ["day", "hour", "is_paid"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "hour", "is_paid"], name="reports_hourly_sales_unique"),
+        ]
+        verbose_name = "Hourly Sales"
+        verbose_name_plural = "Hourly Sales"
+
+    def __str__(self):
+        return f"{self.day} {self.hour:02d}h {'paid' if self.is_paid else 'unpaid'}: {self.revenue}"
+
+
+class ProductDailySales(models.Model):
+    """Units and revenue per product per day — category is the product's at rollup time"""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    is_paid = models.BooleanField()
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        ordering = ["day", "product"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product", "is_paid"], name="reports_product_daily_unique"),
+        ]
+        indexes = [models.Index(fields=["day", "category"], name="reports_product_day_category")]
+        verbose_name = "Product Daily Sales"
+        verbose_name_plural = "Product Daily Sales"
+
+    def __str__(self):
+        return f"{self.day} product {self.product_id}: {self.quantity} × → {self.revenue}"
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup has read — orders updated after `value` are still to be processed"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.value:%Y-%m-%d %H:%M:%S}"
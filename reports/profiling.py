@@ -0,0 +1,244 @@
+# reports/profiling.py
+"""
+Per-endpoint request profiling — which views are slow, and how many queries
+do they run?
+
+ProfilingMiddleware (opt-in: PROFILING_ENABLED) names each request after the
+view that served it — `OrderViewSet.active`, `ProductViewSet.list`,
+`SalesReportAPI` — and records:
+
+    queries       SQL statements, on every database alias
+    db_ms         time inside those statements
+    serialize_ms  building the response data (serializer `.data`, inside the
+                  view; queries it triggers count in db_ms as well)
+    render_ms     turning the response data into bytes (DRF renderers)
+    total_ms      the whole request, middleware included
+    bytes         response body size (not measured for streamed responses)
+
+Samples land in fixed-bucket histograms kept in process memory, one set per
+endpoint — constant memory however much traffic there is, percentiles
+estimated from the buckets. Each process keeps its own numbers, like the
+menu suggestion index; GET /api/reports/metrics/ (staff) shows this
+worker's.
+
+QUERY_BUDGETS declares the most queries an endpoint may run. Going over it is
+logged and counted here; reports/testing.py turns it into a test failure.
+"""
+import bisect
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100, 200)
+MS_BUCKETS = (1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250, 500, 1000, 2500, 5000, 10000)
+BYTE_BUCKETS = (1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20, 16 << 20)
+
+METRICS = {
+    "queries": QUERY_BUCKETS,
+    "db_ms": MS_BUCKETS,
+    "serialize_ms": MS_BUCKETS,
+    "render_ms": MS_BUCKETS,
+    "total_ms": MS_BUCKETS,
+    "bytes": BYTE_BUCKETS,
+}
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Counts per upper bound (last bucket: anything bigger), plus sum and max"""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (capped at the max seen)"""
+        if not self.count:
+            return None
+        rank = self.count * p / 100
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else None,
+            **{f"p{p}": self.percentile(p) for p in PERCENTILES},
+            "max": self.max,
+        }
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    queries: int = 0
+    db_ms: float = 0.0
+    serialize_ms: float = 0.0
+    render_ms: float = 0.0
+    total_ms: float = 0.0
+    bytes: int = None
+    statements: tuple = ()  # SQL of this request — for test failures, not kept in the histograms
+
+
+class EndpointMetrics:
+    """endpoint → metric → Histogram, shared by every thread of the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._over_budget = {}
+        self.started_at = time.time()
+
+    def record(self, sample: Sample):
+        budget = settings.QUERY_BUDGETS.get(sample.endpoint)
+        over = budget is not None and sample.queries > budget
+        if over:
+            logger.warning("%s ran %d queries (budget %d)", sample.endpoint, sample.queries, budget)
+        with self._lock:
+            histograms = self._endpoints.get(sample.endpoint)
+            if histograms is None:
+                histograms = self._endpoints[sample.endpoint] = {m: Histogram(b) for m, b in METRICS.items()}
+            for metric in METRICS:
+                value = getattr(sample, metric)
+                if value is not None:
+                    histograms[metric].add(value)
+            self._over_budget[sample.endpoint] = self._over_budget.get(sample.endpoint, 0) + over
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": histograms["total_ms"].count,
+                    "query_budget": settings.QUERY_BUDGETS.get(endpoint),
+                    "over_budget": self._over_budget[endpoint],
+                    **{metric: histogram.summary() for metric, histogram in histograms.items()},
+                }
+                for endpoint, histograms in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._over_budget.clear()
+            self.started_at = time.time()
+
+
+endpoint_metrics = EndpointMetrics()
+
+# The Sample of the request being served, for serializer timing
+_current_sample = contextvars.ContextVar("profile_sample", default=None)
+
+
+def _time_serializer_data():
+    """
+    Wrap BaseSerializer.data (Serializer.data and ListSerializer.data call it
+    through super()) so it adds to the current request's serialize_ms. Only the
+    outermost call counts: nested serializers and a `.data` read inside
+    another serializer's method are part of it.
+    """
+    data = BaseSerializer.data
+    if getattr(data.fget, "profiled", False):
+        return
+
+    @functools.wraps(data.fget)
+    def timed(serializer):
+        sample = _current_sample.get()
+        if sample is None:
+            return data.fget(serializer)
+        token, started = _current_sample.set(None), time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            sample.serialize_ms += (time.perf_counter() - started) * 1000
+            _current_sample.reset(token)
+
+    timed.profiled = True
+    BaseSerializer.data = property(timed)
+
+
+def endpoint_name(view_func, method: str) -> str:
+    """`OrderViewSet.active` for viewset actions, the class name for APIViews"""
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if cls is None:
+        return getattr(view_func, "__qualname__", repr(view_func))
+    action = (getattr(view_func, "actions", None) or {}).get(method.lower())
+    return f"{cls.__name__}.{action}" if action else cls.__name__
+
+
+class ProfilingMiddleware:
+    """Put it near the top of MIDDLEWARE so total_ms covers the other middleware too"""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        _time_serializer_data()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        sample = request._profile = Sample(endpoint="unresolved")
+        statements = []
+
+        def timed(execute, sql, params, many, context):
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                sample.db_ms += (time.perf_counter() - t0) * 1000
+                statements.append(sql)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timed))
+            token = _current_sample.set(sample)
+            stack.callback(_current_sample.reset, token)
+            response = self.get_response(request)
+
+        sample.queries = len(statements)
+        sample.statements = tuple(statements)
+        sample.total_ms = (time.perf_counter() - started) * 1000
+        if not response.streaming:
+            sample.bytes = len(response.content)
+        if sample.endpoint != "unresolved":  # 404s and static files aren't endpoints
+            endpoint_metrics.record(sample)
+        response.profile = sample
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._profile.endpoint = endpoint_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time it from here to the callback
+        sample, started = request._profile, time.perf_counter()
+
+        def rendered(response):
+            sample.render_ms += (time.perf_counter() - started) * 1000
+
+        response.add_post_render_callback(rendered)
+        return response
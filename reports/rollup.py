@@ -0,0 +1,95 @@
+# reports/rollup.py
+"""
+Incremental sales rollups.
+
+Every run reads the orders whose `updated_at` moved since the watermark (new
+orders, status changes, payments), finds the local days they were placed on,
+and rebuilds exactly those days: delete + insert in one transaction, so a
+report never sees half a day. The watermark is the run's start time, read
+back with a small overlap — an order saved just before that moment may
+commit just after it.
+
+Deleted orders and re-categorised products don't move `updated_at`; run
+with --full to rebuild everything.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from orders.models import Order, OrderHistory, OrderHistoryItem
+
+from .models import HourlySales, ProductDailySales, RollupWatermark
+
+WATERMARK = "sales"
+OVERLAP = timedelta(minutes=5)
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _days_placed(orders) -> set:
+    return set(
+        orders.annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .order_by().values_list("day", flat=True).distinct()
+    )
+
+
+def rebuild_day(day):
+    """Recompute every rollup row of one local day from the orders themselves"""
+    tz = timezone.get_current_timezone()
+    start, end = day_bounds(day)
+    # Live and archived orders alike — archiving an old day must not empty its rollups
+    orders = OrderHistory.objects.filter(created_at__gte=start, created_at__lt=end).exclude(status="CANCELLED")
+    items = OrderHistoryItem.objects.filter(order__in=orders)
+
+    hourly = {
+        (row["hour"], row["is_paid"]): HourlySales(day=day, **row)
+        for row in orders.annotate(hour=ExtractHour("created_at", tzinfo=tz)).order_by()
+        .values("hour", "is_paid").annotate(orders=Count("id"), revenue=Sum("total_amount"))
+    }
+    for row in items.annotate(hour=ExtractHour("order__created_at", tzinfo=tz)).order_by() \
+            .values("hour", "order__is_paid").annotate(units=Sum("quantity")):
+        hourly[row["hour"], row["order__is_paid"]].items = row["units"]
+
+    line_total = ExpressionWrapper(F("unit_price") * F("quantity"), output_field=DecimalField(max_digits=12, decimal_places=2))
+    products = [
+        ProductDailySales(
+            day=day,
+            product_id=row["product_id"],
+            category_id=row["product__category_id"],
+            is_paid=row["order__is_paid"],
+            quantity=row["units"],
+            revenue=row["line_revenue"],
+        )
+        for row in items.order_by().values("product_id", "product__category_id", "order__is_paid")
+        .annotate(units=Sum("quantity"), line_revenue=Sum(line_total))
+    ]
+
+    with transaction.atomic():
+        HourlySales.objects.filter(day=day).delete()
+        ProductDailySales.objects.filter(day=day).delete()
+        HourlySales.objects.bulk_create(hourly.values())
+        ProductDailySales.objects.bulk_create(products)
+
+
+def rollup_sales(full=False) -> list:
+    """Bring the rollups up to date; returns the days that were rebuilt"""
+    started = timezone.now()
+    watermark = RollupWatermark.objects.filter(name=WATERMARK).first()
+
+    if full or watermark is None:
+        days = _days_placed(OrderHistory.objects.all())
+        # Days that lost all their orders (deleted) still need their rows cleared
+        days |= set(HourlySales.objects.values_list("day", flat=True).distinct())
+    else:
+        days = _days_placed(Order.objects.filter(updated_at__gte=watermark.value - OVERLAP))  # archived orders don't change
+
+    for day in sorted(days):
+        rebuild_day(day)
+    RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={"value": started})
+    return sorted(days)
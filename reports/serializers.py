@@ -0,0 +1,54 @@
+# reports/serializers.py
+from rest_framework import serializers
+
+
+class ReportRangeSerializer(serializers.Serializer):
+    """?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive) — defaults to the last 7 days"""
+    MAX_DAYS = 366
+
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, data):
+        if data["end"] < data["start"]:
+            raise serializers.ValidationError("`from` must not be after `to`.")
+        if (data["end"] - data["start"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Reports cover at most {self.MAX_DAYS} days.")
+        return data
+
+
+class SalesRowSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    hour = serializers.IntegerField(required=False)
+    orders = serializers.IntegerField()
+    items = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    paid_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    unpaid_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class ProductSalesRowSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    name = serializers.CharField(source="product__name")
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    paid_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class CategorySalesRowSerializer(serializers.Serializer):
+    category_id = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField(source="category__name", allow_null=True)
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    paid_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class TransitionTimingRowSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    from_status = serializers.CharField()
+    to_status = serializers.CharField()
+    count = serializers.IntegerField()
+    p50_seconds = serializers.FloatField()
+    p90_seconds = serializers.FloatField()
+    p95_seconds = serializers.FloatField()
+    max_seconds = serializers.IntegerField()
@@ -0,0 +1,34 @@
+# reports/testing.py
+"""Query budgets in tests — the numbers in settings.QUERY_BUDGETS, enforced"""
+from django.conf import settings
+from django.test import override_settings
+
+
+class QueryBudgetMixin:
+    """
+    For TestCase classes: requests go through ProfilingMiddleware, and
+
+        self.assertWithinQueryBudget(self.client.get(url))
+
+    fails when the endpoint that answered ran more queries than its budget
+    (or has none declared), listing the SQL it ran.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        profiling = override_settings(PROFILING_ENABLED=True)
+        profiling.enable()
+        cls.addClassCleanup(profiling.disable)
+        super().setUpClass()
+
+    def assertWithinQueryBudget(self, response):
+        sample = getattr(response, "profile", None)
+        if sample is None:
+            self.fail("Response wasn't profiled — was the client created before PROFILING_ENABLED was set?")
+        budget = settings.QUERY_BUDGETS.get(sample.endpoint)
+        if budget is None:
+            self.fail(f"No query budget declared for {sample.endpoint} in settings.QUERY_BUDGETS.")
+        if sample.queries > budget:
+            sql = "\n".join(f"{n}. {statement}" for n, statement in enumerate(sample.statements, start=1))
+            self.fail(f"{sample.endpoint} ran {sample.queries} queries, budget is {budget}:\n{sql}")
+        return sample
@@ -0,0 +1,313 @@
+import csv
+import io
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from orders.models import ArchivedOrder, Order, OrderItem
+from products.cache import menu_cache
+from products.models import Category, Product
+from products.serializers import ProductListSerializer
+from reports.models import HourlySales, ProductDailySales
+from reports.profiling import Histogram, endpoint_metrics
+from reports.rollup import rollup_sales
+from reports.testing import QueryBudgetMixin
+from users.models import User
+
+
+class SalesRollupTests(TestCase):
+    """Rollups must equal a brute-force aggregate over the raw orders"""
+
+    def setUp(self):
+        rng = random.Random(2025)
+        categories = [Category.objects.create(name=name) for name in ("Drinks", "Beans", "Pastries")]
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}", category=rng.choice(categories), price=Decimal(rng.randint(250, 1800)) / 100
+            )
+            for i in range(8)
+        ]
+        now = timezone.now()
+        statuses = ["PENDING", "CONFIRMED", "READY", "COMPLETED", "COMPLETED", "CANCELLED"]
+        for _ in range(150):
+            order = Order.objects.create(
+                customer_name="Guest", status=rng.choice(statuses), is_paid=rng.random() < 0.7,
+            )
+            items = [
+                OrderItem(order=order, product=product, quantity=rng.randint(1, 3), unit_price=product.price)
+                for product in rng.sample(self.products, rng.randint(1, 4))
+            ]
+            OrderItem.objects.bulk_create(items)
+            Order.objects.filter(pk=order.pk).update(
+                created_at=now - timedelta(days=rng.randint(0, 4), hours=rng.randint(0, 23), minutes=rng.randint(0, 59)),
+                updated_at=now - timedelta(hours=1),
+                total_amount=sum(item.get_subtotal() for item in items),
+            )
+
+    def _brute_force(self):
+        hourly = defaultdict(lambda: [0, 0, Decimal("0.00")])
+        products = defaultdict(lambda: [0, Decimal("0.00")])
+        for order in Order.objects.exclude(status="CANCELLED").prefetch_related("items"):
+            local = timezone.localtime(order.created_at)
+            row = hourly[local.date(), local.hour, order.is_paid]
+            row[0] += 1
+            row[2] += order.total_amount
+            for item in order.items.all():
+                row[1] += item.quantity
+                product_row = products[local.date(), item.product_id, order.is_paid]
+                product_row[0] += item.quantity
+                product_row[1] += item.get_subtotal()
+        return (
+            {key: tuple(value) for key, value in hourly.items()},
+            {key: tuple(value) for key, value in products.items()},
+        )
+
+    def _rollups(self):
+        return (
+            {
+                (r.day, r.hour, r.is_paid): (r.orders, r.items, r.revenue)
+                for r in HourlySales.objects.all()
+            },
+            {
+                (r.day, r.product_id, r.is_paid): (r.quantity, r.revenue)
+                for r in ProductDailySales.objects.all()
+            },
+        )
+
+    def test_rollups_match_brute_force(self):
+        call_command("rollup_sales", stdout=io.StringIO())
+        self.assertEqual(self._rollups(), self._brute_force())
+
+    def test_archived_orders_keep_their_rollups(self):
+        rollup_sales()
+        before = self._rollups()
+        call_command("archive_orders", "--days", "2", stdout=io.StringIO())
+        self.assertTrue(ArchivedOrder.objects.exists())
+        rollup_sales(full=True)
+        self.assertEqual(self._rollups(), before)
+
+    def test_incremental_run_rebuilds_only_changed_days(self):
+        rollup_sales()
+        self.assertEqual(rollup_sales(), [])  # nothing changed since the watermark
+
+        order = Order.objects.exclude(status="CANCELLED").first()
+        order.status = "CANCELLED"
+        order.save()  # moves updated_at
+        paid = Order.objects.filter(is_paid=False).last()
+        paid.is_paid = True
+        paid.save()
+
+        rebuilt = rollup_sales()
+        expected_days = {timezone.localtime(o.created_at).date() for o in (order, paid)}
+        self.assertEqual(set(rebuilt), expected_days)
+        self.assertEqual(self._rollups(), self._brute_force())
+
+
+class ReportApiTests(TestCase):
+    def setUp(self):
+        latte = Product.objects.create(
+            name="Latte", category=Category.objects.create(name="Drinks"), price=Decimal("4.50")
+        )
+        for is_paid in (True, True, False):
+            order = Order.objects.create(customer_name="Guest", is_paid=is_paid, total_amount=Decimal("9.00"))
+            OrderItem.objects.bulk_create([OrderItem(order=order, product=latte, quantity=2, unit_price=latte.price)])
+        rollup_sales()
+
+        self.manager = User.objects.create_user(
+            email="manager@coffeehouse.com", password="pass12345", full_name="Man Ager", role="manager"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_sales_report_reads_rollups_only(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("report-sales"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [today] = response.data["results"]
+        self.assertEqual(
+            (today["orders"], today["items"], today["revenue"], today["paid_revenue"], today["unpaid_revenue"]),
+            (3, 6, "27.00", "18.00", "9.00"),
+        )
+
+    def test_product_and_category_reports(self):
+        [product] = self.client.get(reverse("report-products")).data["results"]
+        self.assertEqual((product["name"], product["quantity"], product["revenue"]), ("Latte", 6, "27.00"))
+        [category] = self.client.get(reverse("report-categories")).data["results"]
+        self.assertEqual((category["name"], category["paid_revenue"]), ("Drinks", "18.00"))
+
+    def test_bad_range_rejected(self):
+        response = self.client.get(reverse("report-sales"), {"from": "2025-11-20", "to": "2025-11-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_baristas_cannot_read_reports(self):
+        barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        self.client.force_authenticate(barista)
+        self.assertEqual(self.client.get(reverse("report-sales")).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.latte = Product.objects.create(name="Latte", price=Decimal("4.50"))
+        self.mug = Product.objects.create(name="Savannah Mug", price=Decimal("15.00"))
+        self.orders = []
+        for n, order_status in enumerate(["COMPLETED", "CANCELLED", "COMPLETED"]):
+            order = Order.objects.create(customer_name=f"Guest {n}", status=order_status, total_amount=Decimal("24.00"))
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=self.latte, quantity=2, unit_price=self.latte.price),
+                OrderItem(order=order, product=self.mug, quantity=1, unit_price=self.mug.price),
+            ])
+            self.orders.append(order)
+        owner = User.objects.create_user(
+            email="owner@coffeehouse.com", password="pass12345", full_name="Own Er", role="owner"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def _export(self, **params):
+        response = self.client.get(reverse("report-export"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_one_line_per_item(self):
+        lines = list(csv.DictReader(io.StringIO(self._export(type="csv", status="COMPLETED"))))
+        self.assertEqual(len(lines), 4)
+        self.assertEqual({line["order_number"] for line in lines}, {self.orders[0].order_number, self.orders[2].order_number})
+        self.assertEqual(lines[0]["line_total"], "9.00")
+
+    def test_ndjson_one_order_per_line(self):
+        orders = [json.loads(line) for line in self._export(type="ndjson").splitlines()]
+        self.assertEqual([o["order_number"] for o in orders], [o.order_number for o in self.orders])
+        self.assertEqual(
+            orders[1]["items"],
+            [
+                {"product_id": self.latte.pk, "product": "Latte", "quantity": 2, "unit_price": "4.50"},
+                {"product_id": self.mug.pk, "product": "Savannah Mug", "quantity": 1, "unit_price": "15.00"},
+            ],
+        )
+
+    def test_archived_orders_still_exported(self):
+        exported = self._export(type="ndjson")
+        call_command("archive_orders", "--days", "0", stdout=io.StringIO())
+        self.assertTrue(ArchivedOrder.objects.exists())
+        self.assertEqual(self._export(type="ndjson"), exported)
+
+    def test_streams_in_chunks(self):
+        with mock.patch("reports.export.FLUSH_ROWS", 2):
+            response = self.client.get(reverse("report-export"), {"type": "csv"})
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 4)  # header + 6 lines, two per chunk
+
+    def test_command_writes_file(self):
+        out = io.StringIO()
+        today = timezone.localdate().isoformat()
+        call_command("export_orders", "--from", today, "--to", today, "--type", "ndjson", "--status", "CANCELLED", stdout=out)
+        self.assertEqual([json.loads(line)["order_number"] for line in out.getvalue().splitlines()], [self.orders[1].order_number])
+
+    def test_invalid_params_rejected(self):
+        self.assertEqual(self.client.get(reverse("report-export"), {"type": "xlsx"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("report-export"), {"status": "LOST"}).status_code, 400)
+
+
+class ProfilingTests(QueryBudgetMixin, TestCase):
+    """ProfilingMiddleware → per-endpoint histograms, budgets and the metrics endpoint"""
+
+    def setUp(self):
+        endpoint_metrics.reset()
+        self.addCleanup(endpoint_metrics.reset)
+        drinks = Category.objects.create(name="Drinks")
+        self.latte = Product.objects.create(name="Latte", category=drinks, price=Decimal("5.00"))
+        self.barista = User.objects.create_user(
+            email="barista@coffeehouse.com", password="pass12345", full_name="Bar Ista", role="barista", is_staff=True
+        )
+        self.client = APIClient()
+
+    def _checkout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("order-list"), {
+                "customer_name": "Guest Gus", "items": [{"product": self.latte.pk, "quantity": 2}],
+            }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def test_hot_endpoints_within_budget(self):
+        order = self._checkout()
+        self.assertWithinQueryBudget(order)
+        self.assertWithinQueryBudget(self.client.get(reverse("product-list")))
+        self.assertWithinQueryBudget(self.client.get(reverse("category-list")))
+
+        self.client.force_authenticate(self.barista)
+        self.assertWithinQueryBudget(self.client.get(reverse("order-active")))
+        self.assertWithinQueryBudget(self.client.get(reverse("order-list")))
+        self.assertWithinQueryBudget(self.client.get(reverse("order-detail", args=[order.data["id"]])))
+        with self.captureOnCommitCallbacks(execute=True):
+            confirmed = self.client.patch(
+                reverse("order-update-status", args=[order.data["id"]]), {"status": "CONFIRMED"}, format="json"
+            )
+        self.assertWithinQueryBudget(confirmed)
+
+    def test_over_budget_fails_with_the_sql(self):
+        self.client.force_authenticate(self.barista)
+        response = self.client.get(reverse("order-list"))
+        with override_settings(QUERY_BUDGETS={"OrderViewSet.list": 0}):
+            with self.assertRaisesRegex(AssertionError, r"OrderViewSet.list ran \d+ queries, budget is 0:\n1\. SELECT"):
+                self.assertWithinQueryBudget(response)
+        with override_settings(QUERY_BUDGETS={}):
+            with self.assertRaisesRegex(AssertionError, "No query budget declared"):
+                self.assertWithinQueryBudget(response)
+
+    def test_metrics_endpoint_aggregates_per_action(self):
+        for _ in range(3):
+            self.client.get(reverse("product-list"))
+        self.client.get("/api/nowhere/")  # unresolved → not an endpoint
+
+        url = reverse("report-metrics")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(self.barista)
+        self.client.get(reverse("order-active"))
+
+        endpoints = self.client.get(url).data["endpoints"]
+        self.assertEqual(set(endpoints), {"ProductViewSet.list", "OrderViewSet.active", "MetricsAPI"})
+        products = endpoints["ProductViewSet.list"]
+        self.assertEqual((products["requests"], products["query_budget"], products["over_budget"]), (3, 3, 0))
+        self.assertEqual(products["bytes"]["count"], 3)
+        self.assertGreater(products["bytes"]["max"], 0)
+        self.assertLessEqual(products["render_ms"]["max"], products["total_ms"]["max"])
+        self.assertEqual(products["serialize_ms"]["count"], 3)
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(self.client.get(url).data["endpoints"]), ["MetricsAPI"])  # just the DELETE
+
+    def test_serialization_timed_inside_the_view(self):
+        to_representation = ProductListSerializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.01)
+            return to_representation(serializer, instance)
+
+        menu_cache().clear()  # a snapshot hit wouldn't serialize at all
+        with mock.patch.object(ProductListSerializer, "to_representation", slow):
+            sample = self.client.get(reverse("product-list")).profile
+        self.assertGreaterEqual(sample.serialize_ms, 10)  # one product: one nap
+        self.assertLess(sample.render_ms, 10)  # rendering only turns ready data into bytes
+        self.assertLessEqual(sample.serialize_ms, sample.total_ms)
+
+    def test_histogram_percentiles_from_buckets(self):
+        histogram = Histogram((1, 2, 5, 10))
+        for value in (1, 1, 2, 3, 4, 4, 5, 8, 9, 40):
+            histogram.add(value)
+        summary = histogram.summary()
+        self.assertEqual((summary["p50"], summary["p95"], summary["max"], summary["mean"]), (5, 40, 40, 7.7))
+        self.assertEqual(histogram.percentile(20), 1)
@@ -0,0 +1,16 @@
+# reports/urls.py
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    # ───── Manager reports (read from the rollup tables only) ─────
+    path('sales/', views.SalesReportAPI.as_view(), name='report-sales'),
+    path('products/', views.ProductSalesReportAPI.as_view(), name='report-products'),
+    path('categories/', views.CategorySalesReportAPI.as_view(), name='report-categories'),
+    path('timings/', views.TransitionTimingsReportAPI.as_view(), name='report-timings'),
+    path('export/', views.OrderExportAPI.as_view(), name='report-export'),      # streamed CSV / NDJSON
+
+    # ───── Staff: request profiling (reports/profiling.py) ─────
+    path('metrics/', views.MetricsAPI.as_view(), name='report-metrics'),
+]
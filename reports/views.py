@@ -0,0 +1,169 @@
+# reports/views.py
+"""
+GET /api/reports/... — managers and owners only. Every endpoint reads the
+rollup tables (a few hundred rows at most), never orders or order items, so
+reports don't compete with checkout on the primary — and with replicas
+configured they are read from one (coffe_house/replicas.py).
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from coffe_house.replicas import ReplicaReadMixin, read_alias
+from orders.models import Order, StatusTransitionStats
+
+from .export import FORMATS, stream_export
+from .profiling import endpoint_metrics
+from .models import HourlySales, ProductDailySales
+from .rollup import day_bounds
+from .serializers import (
+    CategorySalesRowSerializer,
+    ProductSalesRowSerializer,
+    ReportRangeSerializer,
+    SalesRowSerializer,
+    TransitionTimingRowSerializer,
+)
+
+DEFAULT_DAYS = 7
+
+
+class IsManagerOrOwner(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (request.user.is_manager or request.user.is_owner)
+
+
+class ReportAPI(ReplicaReadMixin, APIView):
+    permission_classes = [IsManagerOrOwner]
+
+    def date_range(self, request):
+        today = timezone.localdate()
+        params = ReportRangeSerializer(data={
+            "start": request.query_params.get("from", today - timedelta(days=DEFAULT_DAYS - 1)),
+            "end": request.query_params.get("to", today),
+        })
+        params.is_valid(raise_exception=True)
+        return params.validated_data["start"], params.validated_data["end"]
+
+
+def _revenue_split():
+    # paid_revenue first: once "revenue" is an annotation, Sum("revenue") would refer to it
+    return {
+        "paid_revenue": Sum("revenue", filter=Q(is_paid=True), default=Decimal("0.00")),
+        "revenue": Sum("revenue"),
+    }
+
+
+class SalesReportAPI(ReportAPI):
+    """GET /api/reports/sales/?from=&to=&by=day|hour → orders, items, revenue (paid / unpaid)"""
+
+    def get(self, request):
+        start, end = self.date_range(request)
+        group = ["day", "hour"] if request.query_params.get("by") == "hour" else ["day"]
+        rows = (
+            HourlySales.objects.filter(day__range=(start, end))
+            .values(*group)
+            .annotate(orders=Sum("orders"), items=Sum("items"), **_revenue_split())
+            .order_by(*group)
+        )
+        for row in rows:
+            row["unpaid_revenue"] = row["revenue"] - row["paid_revenue"]
+        return Response({"from": start, "to": end, "results": SalesRowSerializer(rows, many=True).data})
+
+
+class ProductSalesReportAPI(ReportAPI):
+    """GET /api/reports/products/?from=&to=&limit=20 → best sellers by revenue"""
+
+    def get(self, request):
+        start, end = self.date_range(request)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        rows = (
+            ProductDailySales.objects.filter(day__range=(start, end))
+            .values("product_id", "product__name")
+            .annotate(quantity=Sum("quantity"), **_revenue_split())
+            .order_by("-revenue", "product_id")[:limit]
+        )
+        return Response({"from": start, "to": end, "results": ProductSalesRowSerializer(rows, many=True).data})
+
+
+class CategorySalesReportAPI(ReportAPI):
+    """GET /api/reports/categories/?from=&to= → revenue per menu category"""
+
+    def get(self, request):
+        start, end = self.date_range(request)
+        rows = (
+            ProductDailySales.objects.filter(day__range=(start, end))
+            .values("category_id", "category__name")
+            .annotate(quantity=Sum("quantity"), **_revenue_split())
+            .order_by("-revenue", "category_id")
+        )
+        return Response({"from": start, "to": end, "results": CategorySalesRowSerializer(rows, many=True).data})
+
+
+class TransitionTimingsReportAPI(ReportAPI):
+    """GET /api/reports/timings/?from=&to=&granularity=day|hour → queue / prep / pickup times"""
+
+    def get(self, request):
+        start, end = self.date_range(request)
+        granularity = request.query_params.get("granularity", StatusTransitionStats.DAY)
+        if granularity not in dict(StatusTransitionStats.GRANULARITY_CHOICES):
+            granularity = StatusTransitionStats.DAY
+        rows = StatusTransitionStats.objects.filter(
+            granularity=granularity,
+            bucket__gte=day_bounds(start)[0],
+            bucket__lt=day_bounds(end)[1],
+        ).values()
+        return Response({"from": start, "to": end, "results": TransitionTimingRowSerializer(rows, many=True).data})
+
+
+class OrderExportAPI(ReportAPI):
+    """
+    GET /api/reports/export/?from=&to=&type=csv|ndjson&status=COMPLETED,READY
+    → streamed file of every order (and item) in the range, for accounting.
+    Uses `type`, not `format` — DRF reserves ?format= for its renderers.
+    """
+
+    def get(self, request):
+        start, end = self.date_range(request)
+        fmt = request.query_params.get("type", "csv")
+        statuses = [s for s in request.query_params.get("status", "").upper().split(",") if s]
+        valid_statuses = dict(Order.STATUS_CHOICES)
+        if fmt not in FORMATS or any(s not in valid_statuses for s in statuses):
+            return Response(
+                {"detail": f"type must be one of {', '.join(FORMATS)}; status one of {', '.join(valid_statuses)}."},
+                status=400,
+            )
+
+        start_at, end_at = day_bounds(start)[0], day_bounds(end)[1]
+        response = StreamingHttpResponse(stream_export(fmt, start_at, end_at, statuses, using=read_alias()), content_type=FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="orders-{start}-{end}.{fmt}"'
+        return response
+
+
+class MetricsAPI(APIView):
+    """
+    GET /api/reports/metrics/ — per-endpoint query counts, DB / serialize / render / total
+    time and response sizes for this worker process (PROFILING_ENABLED).
+    DELETE starts the histograms over. Staff only.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "enabled": settings.PROFILING_ENABLED,
+            "since": datetime.fromtimestamp(endpoint_metrics.started_at, tz=timezone.get_current_timezone()),
+            "endpoints": endpoint_metrics.snapshot(),
+        })
+
+    def delete(self, request):
+        endpoint_metrics.reset()
+        return Response(status=204)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import LoyaltyEntry, User
 
 # Register your models here.
 @admin.register(User)
@@ -21,4 +21,18 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('email', 'full_name', 'password1', 'password2', 'role'),
 
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(LoyaltyEntry)
+class LoyaltyEntryAdmin(admin.ModelAdmin):
+    """Read-only: balances only move through users/loyalty.py"""
+    list_display = ['user', 'points', 'reason', 'order', 'created_at']
+    list_filter = ['reason']
+    search_fields = ['user__email', 'order__order_number']
+    raw_id_fields = ['user', 'order']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
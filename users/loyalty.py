@@ -0,0 +1,84 @@
+# users/loyalty.py
+"""
+Loyalty points — "10 = 1 free".
+
+Completed orders earn LOYALTY_POINTS_PER_ITEM per drink/food item (merch
+doesn't count); LOYALTY_REWARD_POINTS buy the cheapest such item in a later
+basket. Every change is a LoyaltyEntry row plus one relative update of the
+balance,
+
+    UPDATE users_user SET loyalty_points = loyalty_points + %s
+    WHERE id = %s [AND loyalty_points >= %s]      ← spending only
+
+so concurrent completions can't lose points and two checkouts can't spend
+the same ones. Callers run inside their request's transaction: the order
+change and its points commit or roll back together.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import LoyaltyEntry, User
+
+
+class NotEnoughPoints(Exception):
+    pass
+
+
+def post_points(user_id: int, points: int, reason: str, order=None) -> int:
+    """Apply a signed change and record it; returns the new balance"""
+    users = User.objects.filter(pk=user_id)
+    if points < 0:
+        users = users.filter(loyalty_points__gte=-points)
+    with transaction.atomic():
+        if not users.update(loyalty_points=F("loyalty_points") + points):
+            raise NotEnoughPoints(f"User {user_id} can't spend {-points} points.")
+        LoyaltyEntry.objects.create(user_id=user_id, order=order, points=points, reason=reason)
+        return User.objects.values_list("loyalty_points", flat=True).get(pk=user_id)
+
+
+def earnable_points(order) -> int:
+    """Points a completed order is worth — one aggregate, items aren't loaded"""
+    items = order.items.filter(product__is_merch=False).aggregate(units=Sum("quantity"))["units"] or 0
+    return items * settings.LOYALTY_POINTS_PER_ITEM
+
+
+def award_order(order):
+    """COMPLETED → credit the customer (guests collect nothing)"""
+    points = earnable_points(order) if order.user_id else 0
+    if points:
+        post_points(order.user_id, points, LoyaltyEntry.EARNED, order=order)
+
+
+def reward_discount(lines) -> Decimal:
+    """What one reward takes off a basket: its cheapest non-merch (product, unit_price)"""
+    prices = [price for product, price in lines if not product.is_merch]
+    return min(prices) if prices else None
+
+
+def redeem_for_order(order):
+    """Spend one reward on a just-created order (raises NotEnoughPoints)"""
+    post_points(order.user_id, -order.points_redeemed, LoyaltyEntry.REDEEMED, order=order)
+
+
+def refund_order(order):
+    """Cancelled order → the reward it used is given back"""
+    if order.points_redeemed and order.user_id:
+        post_points(order.user_id, order.points_redeemed, LoyaltyEntry.REFUNDED, order=order)
+
+
+def mismatched_balances(user_ids=None):
+    """
+    Users whose balance disagrees with their ledger, as (id, email, balance,
+    ledger) rows — one grouped query over the ledger.
+    """
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    return (
+        users.order_by()
+        .annotate(ledger=Coalesce(Sum("loyalty_entries__points"), Value(0), output_field=IntegerField()))
+        .filter(~Q(loyalty_points=F("ledger")))
+        .values_list("id", "email", "loyalty_points", "ledger")
+    )
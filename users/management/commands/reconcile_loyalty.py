@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from users.loyalty import mismatched_balances
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Check every loyalty balance against the ledger (run nightly from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true",
+            help="Move mismatched balances to the ledger total (the ledger is the source of truth)",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = list(mismatched_balances())
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All loyalty balances match the ledger."))
+            return
+
+        lines = [f"{email} (#{pk}): balance {balance}, ledger {ledger}" for pk, email, balance, ledger in mismatches]
+        if not options["fix"]:
+            raise CommandError(f"{len(mismatches)} loyalty balance(s) disagree with the ledger:\n" + "\n".join(lines))
+
+        with transaction.atomic():
+            for pk, _, balance, ledger in mismatches:
+                # Relative, so points posted since the check above aren't overwritten
+                User.objects.filter(pk=pk).update(loyalty_points=F("loyalty_points") + (ledger - balance))
+        self.stdout.write(self.style.SUCCESS(f"Fixed {len(mismatches)} loyalty balance(s):\n" + "\n".join(lines)))
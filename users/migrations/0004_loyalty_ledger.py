@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def opening_balances(apps, schema_editor):
+    """Points earned before the ledger existed become one adjustment each, so balances reconcile"""
+    User = apps.get_model('users', 'User')
+    LoyaltyEntry = apps.get_model('users', 'LoyaltyEntry')
+    LoyaltyEntry.objects.bulk_create(
+        LoyaltyEntry(user_id=user_id, points=points, reason='adjusted')
+        for user_id, points in User.objects.filter(loyalty_points__gt=0).values_list('id', 'loyalty_points').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_loyalty_redemption'),
+        ('users', '0003_alter_user_options_user_favourite_drink_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoyaltyEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(help_text='Positive = credit, negative = spent')),
+                ('reason', models.CharField(choices=[('earned', 'Earned'), ('redeemed', 'Redeemed'), ('refunded', 'Refunded'), ('adjusted', 'Adjusted')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loyalty_entries', to='orders.order')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loyalty_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Loyalty Entry',
+                'verbose_name_plural': 'Loyalty Ledger',
+                'ordering': ['user', 'created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='users_loyalty_user_created')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('order__isnull', False)), fields=('order', 'reason'), name='users_loyalty_once_per_order')],
+            },
+        ),
+        migrations.RunPython(opening_balances, migrations.RunPython.noop),
+    ]
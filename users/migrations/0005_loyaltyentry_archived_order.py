@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_archive_status_events'),
+        ('users', '0004_loyalty_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loyaltyentry',
+            name='archived_order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loyalty_entries', to='orders.archivedorder'),
+        ),
+    ]
@@ -86,6 +86,53 @@ class User(AbstractBaseUser, PermissionsMixin):
     def is_owner(self):
         return self.role == 'owner'
 
-    def award_loyalty_points(self, points: int):
-        self.loyalty_points += points
-        self.save(update_fields=['loyalty_points'])
\ No newline at end of file
+    def award_loyalty_points(self, points: int, reason='adjusted', order=None):
+        """Goodwill / manual adjustments — goes through the ledger like everything else"""
+        from .loyalty import post_points
+        self.loyalty_points = post_points(self.pk, points, reason, order=order)
+
+
+class LoyaltyEntry(models.Model):
+    """
+    Loyalty ledger — one signed row per change to a user's points, usually tied
+    to the order that earned or spent them. User.loyalty_points is the running
+    balance, updated in the same transaction (users/loyalty.py); the nightly
+    reconcile_loyalty command checks the two agree.
+    """
+    EARNED = 'earned'
+    REDEEMED = 'redeemed'
+    REFUNDED = 'refunded'
+    ADJUSTED = 'adjusted'
+    REASON_CHOICES = [
+        (EARNED, 'Earned'),
+        (REDEEMED, 'Redeemed'),
+        (REFUNDED, 'Refunded'),
+        (ADJUSTED, 'Adjusted'),
+    ]
+
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='loyalty_entries')
+    order = models.ForeignKey(
+        'orders.Order', on_delete=models.SET_NULL, null=True, blank=True, related_name='loyalty_entries'
+    )
+    # Archiving an order (orders/archive.py) moves the link here — the id stays the same
+    archived_order = models.ForeignKey(
+        'orders.ArchivedOrder', on_delete=models.SET_NULL, null=True, blank=True, related_name='loyalty_entries'
+    )
+    points = models.IntegerField(help_text="Positive = credit, negative = spent")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['user', 'created_at']
+        indexes = [models.Index(fields=['user', 'created_at'], name='users_loyalty_user_created')]
+        constraints = [
+            # An order earns, spends and refunds at most once each
+            models.UniqueConstraint(
+                fields=['order', 'reason'], condition=models.Q(order__isnull=False), name='users_loyalty_once_per_order'
+            ),
+        ]
+        verbose_name = 'Loyalty Entry'
+        verbose_name_plural = 'Loyalty Ledger'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.points:+d} ({self.reason})"
\ No newline at end of file